@@ -0,0 +1,91 @@
+# In-process read-through cache for catalog collections
+# (regions, sites, guides, preset_packages)
+
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class CatalogCache:
+    def __init__(self, ttl_seconds=300.0, max_entries=1024, enabled=True, single_flight=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        # Optional SingleFlight: concurrent misses for one key share a single load
+        self.single_flight = single_flight
+        # (collection, kind, filter) -> (expires_at, value), kept in LRU order
+        self._entries = OrderedDict()
+        # Bumped on every invalidation, so a load that started before one is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(collection, kind, query):
+        return (collection, kind, tuple(sorted(query.items())))
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key, loader):
+        if self.single_flight is None:
+            return loader()
+        # Calls started before an invalidation are not joined by later callers
+        return self.single_flight.do((self._generation, key), loader)
+
+    async def get_or_load(self, collection, kind, query, loader):
+        key = self.make_key(collection, kind, query)
+        if not self.enabled:
+            return await self._load(key, loader)
+        value = self.get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        generation = self._generation
+        value = await self._load(key, loader)
+        if generation == self._generation:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, collection=None):
+        # Drop every entry for one collection, or the whole cache
+        if collection is None:
+            self._entries.clear()
+        else:
+            for key in [k for k in self._entries if k[0] == collection]:
+                del self._entries[key]
+        self._generation += 1
+        self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,247 @@
+# Idempotent catalog import for regions, sites and guides
+#
+# Reads JSON (an array) or NDJSON (one document per line, streamed) and upserts
+# in unordered bulk_write batches keyed on a natural key, so re-importing a
+# catalog only touches documents that changed. Existing ids are preserved.
+# Every document is validated against the API's model first; invalid ones are
+# skipped, counted as "invalid", and make the CLI exit non-zero.
+#
+#   python catalog_import.py --regions regions.json --sites sites.ndjson
+#   python catalog_import.py --enhanced        # ENHANCED_SITES_DATA
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import uuid
+from pathlib import Path
+
+from pymongo import UpdateOne
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+import site_content
+from catalog_sync import bump_versions
+from models import Guide, Region, Site
+
+logger = logging.getLogger(__name__)
+
+# Upsert key per collection; guides have no slug
+KEY_FIELDS = {"regions": "slug", "sites": "slug", "guides": "name"}
+
+# The models the API serves each collection with
+DOCUMENT_MODELS = {"regions": Region, "sites": Site, "guides": Guide}
+
+# Import order, so site region placeholders can resolve against imported regions
+IMPORT_ORDER = ("regions", "sites", "guides")
+
+# "CHAMBAL_REGION_ID" -> region slug "chambal"
+REGION_PLACEHOLDER = re.compile(r"^([A-Z0-9_]+)_REGION_ID$")
+
+# Documents per bulk_write round-trip
+DEFAULT_BATCH_SIZE = 1000
+
+
+def read_documents(path):
+    # NDJSON is streamed line by line; JSON must be an array (or {"items": [...]})
+    path = Path(path)
+    if path.suffix == ".ndjson":
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    text = path.read_text(encoding="utf-8")
+    if not text.strip():
+        return
+    data = json.loads(text)
+    yield from data["items"] if isinstance(data, dict) else data
+
+
+def region_slug_for(placeholder):
+    match = REGION_PLACEHOLDER.match(placeholder or "")
+    return match.group(1).lower().replace("_", "-") if match else None
+
+
+def prepare_site(doc, region_ids):
+    # Resolve region placeholders and derive fields the API relies on; returns
+    # None when the region cannot be resolved
+    doc = dict(doc)
+    slug = region_slug_for(doc.get("region_id"))
+    if slug is not None:
+        if slug not in region_ids:
+            return None
+        doc["region_id"] = region_ids[slug]
+    # Extended content is long-form and is stored apart, see site_content.py
+    doc.pop("extended_content", None)
+    if "latitude" in doc and "longitude" in doc:
+        doc["location"] = {"type": "Point", "coordinates": [doc["longitude"], doc["latitude"]]}
+    return doc
+
+
+def validation_error(model, collection, doc):
+    # None when doc would be a valid stored document, else the validation message
+    if collection == "sites" and "full_description" not in doc:
+        doc = {**doc, "full_description": doc.get("short_description", "")}
+    try:
+        model.model_validate(doc)
+    except ValidationError as e:
+        return str(e)
+    return None
+
+
+def upsert_operation(collection, doc):
+    key = KEY_FIELDS[collection]
+    doc = dict(doc)
+    on_insert = {"id": doc.pop("id", None) or str(uuid.uuid4())}
+    if collection == "sites" and "full_description" not in doc:
+        on_insert["full_description"] = doc.get("short_description", "")
+    return UpdateOne({key: doc[key]}, {"$set": doc, "$setOnInsert": on_insert}, upsert=True)
+
+
+async def import_documents(db, collection, docs, batch_size=DEFAULT_BATCH_SIZE, model=None):
+    stats = {"read": 0, "upserted": 0, "modified": 0, "unchanged": 0, "skipped": 0, "invalid": 0, "errors": 0}
+    model = model or DOCUMENT_MODELS[collection]
+    region_ids = {}
+    if collection == "sites":
+        regions = await db.regions.find({}, {"_id": 0, "id": 1, "slug": 1}).to_list(None)
+        region_ids = {region["slug"]: region["id"] for region in regions}
+
+    batch = []
+    content_batch = []
+
+    async def flush(target, operations):
+        try:
+            result = await db[target].bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            stats["errors"] += len(details.get("writeErrors", []))
+            for error in details.get("writeErrors", [])[:3]:
+                logger.error(f"Import error in {target}: {error.get('errmsg')}")
+        operations.clear()
+        return details
+
+    async def flush_documents():
+        details = await flush(collection, batch)
+        modified = details.get("nModified", 0)
+        stats["upserted"] += details.get("nUpserted", 0)
+        stats["modified"] += modified
+        stats["unchanged"] += details.get("nMatched", 0) - modified
+
+    async def flush_content():
+        details = await flush(site_content.COLLECTION, content_batch)
+        stats["content_sections_written"] += details.get("nUpserted", 0) + details.get("nModified", 0)
+
+    if collection == "sites":
+        stats["content_sections_written"] = 0
+
+    for doc in docs:
+        stats["read"] += 1
+        extended = doc.get("extended_content") if collection == "sites" else None
+        if collection == "sites":
+            doc = prepare_site(doc, region_ids)
+        if doc is None or not doc.get(KEY_FIELDS[collection]):
+            stats["skipped"] += 1
+            continue
+        error = validation_error(model, collection, doc)
+        if error is not None:
+            stats["invalid"] += 1
+            if stats["invalid"] <= 3:
+                logger.error(f"Invalid {collection} document {doc.get(KEY_FIELDS[collection])!r}: {error}")
+            continue
+        batch.append(upsert_operation(collection, doc))
+        if extended:
+            content_batch.extend(site_content.section_operations(doc["slug"], extended))
+        if len(batch) >= batch_size:
+            await flush_documents()
+        if len(content_batch) >= batch_size:
+            await flush_content()
+    if batch:
+        await flush_documents()
+    if content_batch:
+        await flush_content()
+    return stats
+
+
+async def import_catalog(db, sources, batch_size=DEFAULT_BATCH_SIZE):
+    # sources maps collection -> iterable of documents (or a file path)
+    report = {}
+    for collection in IMPORT_ORDER:
+        source = sources.get(collection)
+        if source is None:
+            continue
+        docs = read_documents(source) if isinstance(source, (str, Path)) else source
+        report[collection] = await import_documents(db, collection, docs, batch_size)
+        logger.info(f"Imported {collection}: {report[collection]}")
+    return report
+
+
+def changed_collections(report):
+    # Collections an import_catalog report says were written
+    changed = {collection for collection, stats in report.items() if stats["upserted"] or stats["modified"]}
+    if report.get("sites", {}).get("content_sections_written"):
+        changed.add(site_content.COLLECTION)
+    return changed
+
+
+def rejected_documents(report):
+    return sum(stats["invalid"] for stats in report.values())
+
+
+def catalog_dir_sources(directory):
+    # {collection}.ndjson or {collection}.json files found in a directory
+    sources = {}
+    for collection in IMPORT_ORDER:
+        for suffix in (".ndjson", ".json"):
+            path = Path(directory) / f"{collection}{suffix}"
+            if path.exists():
+                sources[collection] = path
+                break
+    return sources
+
+
+async def main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Import regions, sites and guides into MongoDB")
+    parser.add_argument("--regions", help="JSON or NDJSON file of regions")
+    parser.add_argument("--sites", help="JSON or NDJSON file of sites")
+    parser.add_argument("--guides", help="JSON or NDJSON file of guides")
+    parser.add_argument("--dir", help="Directory holding regions/sites/guides .json or .ndjson files")
+    parser.add_argument("--enhanced", action="store_true", help="Import ENHANCED_SITES_DATA")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / ".env")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    sources = catalog_dir_sources(args.dir) if args.dir else {}
+    for collection in IMPORT_ORDER:
+        if getattr(args, collection):
+            sources[collection] = getattr(args, collection)
+    if args.enhanced:
+        from enhanced_seed_data import ENHANCED_SITES_DATA
+        sources["sites"] = ENHANCED_SITES_DATA
+    if not sources:
+        parser.error("nothing to import")
+
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    try:
+        db = client[os.environ["DB_NAME"]]
+        report = await import_catalog(db, sources, args.batch_size)
+        # Running servers reload the changed collections within CATALOG_SYNC_INTERVAL_SECONDS
+        await bump_versions(db, changed_collections(report))
+    finally:
+        client.close()
+    print(json.dumps(report, indent=2))
+    if rejected_documents(report):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,249 @@
+# Catalog change tracking across workers
+#
+# Each catalog collection has a version in catalog_versions: a BSON Timestamp
+# that only moves forward. Writers in this app bump it after changing a
+# collection (bump_versions). With a replica set every worker also watches a
+# change stream on the catalog collections and raises the version to each
+# change's clusterTime, so writes made outside the app are picked up too; on a
+# standalone mongod workers poll the versions instead. Either way each worker
+# calls on_change(collections) within about `interval` seconds of a change.
+# start() never waits on MongoDB: the first version read happens in the
+# background task, retried with backoff, and `synced` turns True once it succeeds.
+
+import asyncio
+import logging
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+
+from bson import Timestamp
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_COLLECTION = "catalog_versions"
+LEASES_COLLECTION = "startup_leases"
+
+# ChangeStreamFatalError, ChangeStreamHistoryLost: the resume point is gone
+RESUME_FAILED_CODES = (280, 286)
+
+# Backoff between failed first version reads, doubling up to the max
+FIRST_READ_RETRY_SECONDS = 0.5
+FIRST_READ_RETRY_MAX_SECONDS = 30.0
+
+
+def format_version(version):
+    return f"{version.time}.{version.inc}" if isinstance(version, Timestamp) else "0"
+
+
+async def bump_versions(db, collections):
+    # Mark collections as changed after writing them; returns {collection: version}
+    versions = {}
+    for collection in collections:
+        doc = await db[VERSIONS_COLLECTION].find_one_and_update(
+            {"_id": collection}, {"$currentDate": {"version": {"$type": "timestamp"}}},
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        versions[collection] = doc["version"]
+    return versions
+
+
+async def raise_version(db, collection, version):
+    # Idempotent, so every worker seeing the same change can apply it
+    try:
+        await db[VERSIONS_COLLECTION].update_one({"_id": collection}, {"$max": {"version": version}}, upsert=True)
+    except DuplicateKeyError:
+        # Another worker created the document first
+        await db[VERSIONS_COLLECTION].update_one({"_id": collection}, {"$max": {"version": version}})
+
+
+async def acquire_lease(db, name, seconds):
+    # True for the single caller holding `name` until it is released or expires
+    now = datetime.now(timezone.utc)
+    try:
+        await db[LEASES_COLLECTION].update_one(
+            {"_id": name, "expires_at": {"$lt": now}},
+            {"$set": {"expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+async def release_lease(db, name):
+    await db[LEASES_COLLECTION].delete_one({"_id": name})
+
+
+class CatalogSync:
+    def __init__(self, get_db, collections, on_change, mode="auto", interval=2.0):
+        # get_db() returns the (primary) Motor database; on_change(collections)
+        # is awaited with the set of collections that changed.
+        # mode: auto (change streams, else polling), changestream, poll or off
+        self.get_db = get_db
+        self.collections = frozenset(collections)
+        self.on_change = on_change
+        self.mode = mode
+        self.interval = interval
+        self.versions = {}
+        self.source = None
+        self.synced = False
+        self._task = None
+        self.events = 0
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def version(self, collection):
+        return format_version(self.versions.get(collection))
+
+    async def start(self):
+        if self.mode == "off":
+            return
+        self.source = None
+        self.synced = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def bump(self, collections):
+        # After this worker changed collections, so its own next poll does not
+        # report them again
+        if self.mode == "off":
+            return
+        collections = [collection for collection in collections if collection in self.collections]
+        self.versions.update(await bump_versions(self.get_db(), collections))
+
+    async def _read_versions(self):
+        docs = await self.get_db()[VERSIONS_COLLECTION].find(
+            {"_id": {"$in": sorted(self.collections)}}
+        ).to_list(None)
+        return {doc["_id"]: doc["version"] for doc in docs}
+
+    async def _first_read(self):
+        delay = FIRST_READ_RETRY_SECONDS
+        failed = False
+        while True:
+            try:
+                self.versions = await self._read_versions()
+                break
+            except Exception as e:
+                self.errors += 1
+                failed = True
+                logger.warning(f"Reading catalog versions failed ({e}); retrying in {delay:g}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, FIRST_READ_RETRY_MAX_SECONDS)
+        self.synced = True
+        if failed:
+            # Changes made while MongoDB was unreachable were not seen
+            await self._apply(set(self.collections))
+
+    async def poll(self):
+        # Collections whose stored version differs from ours
+        versions = await self._read_versions()
+        changed = {collection for collection, version in versions.items() if self.versions.get(collection) != version}
+        self.versions = versions
+        self.polls += 1
+        return changed
+
+    async def _apply(self, changed):
+        if not changed:
+            return
+        self.changes += 1
+        try:
+            await self.on_change(changed)
+        except Exception:
+            self.errors += 1
+            logger.exception(f"Catalog change handler failed for {sorted(changed)}")
+
+    async def _run(self):
+        await self._first_read()
+        if self.mode in ("auto", "changestream"):
+            await self._watch()
+        self.source = "poll"
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self._apply(await self.poll())
+            except Exception:
+                self.errors += 1
+                logger.exception("Catalog version poll failed")
+
+    async def _watch(self):
+        # Returns when change streams are unavailable, so _run falls back to polling
+        pipeline = [{"$match": {"ns.coll": {"$in": sorted(self.collections | {VERSIONS_COLLECTION})}}}]
+        max_await_ms = max(100, int(min(self.interval, 1.0) * 1000))
+        loop = asyncio.get_running_loop()
+        resume_token = None
+        while True:
+            try:
+                async with self.get_db().watch(
+                    pipeline, resume_after=resume_token, max_await_time_ms=max_await_ms
+                ) as stream:
+                    if self.source is None:
+                        logger.info("Watching catalog collections for changes")
+                    elif resume_token is None:
+                        # Reopened without a resume point: changes may have been missed
+                        await self._apply(set(self.collections))
+                    self.source = "changestream"
+                    pending = {}
+                    touched = False
+                    deadline = None
+                    while True:
+                        change = await stream.try_next()
+                        if change is not None:
+                            self.events += 1
+                            collection = change.get("ns", {}).get("coll")
+                            if collection in self.collections:
+                                cluster_time = change["clusterTime"]
+                                pending[collection] = max(pending.get(collection, cluster_time), cluster_time)
+                            touched = True
+                            # Batch bursts (bulk imports), but flush at least every interval
+                            deadline = deadline or loop.time() + self.interval
+                            if loop.time() < deadline:
+                                continue
+                        if touched:
+                            db = self.get_db()
+                            for collection, cluster_time in pending.items():
+                                await raise_version(db, collection, cluster_time)
+                            await self._apply(await self.poll() | set(pending))
+                            pending = {}
+                            touched = False
+                            deadline = None
+                        resume_token = stream.resume_token
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.source is None:
+                    # Standalone mongod, or a driver stand-in without change streams
+                    logger.info(f"Change streams unavailable ({e}); polling catalog versions every {self.interval}s")
+                    return
+                self.errors += 1
+                logger.warning(f"Catalog change stream failed ({e}); reopening")
+                if getattr(e, "code", None) in RESUME_FAILED_CODES:
+                    resume_token = None
+                await asyncio.sleep(self.interval)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "source": self.source,
+            "running": self.running,
+            "synced": self.synced,
+            "interval_seconds": self.interval,
+            "versions": {collection: format_version(version) for collection, version in sorted(self.versions.items())},
+            "events": self.events,
+            "polls": self.polls,
+            "changes": self.changes,
+            "errors": self.errors,
+        }
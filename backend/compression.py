@@ -0,0 +1,206 @@
+# Response compression: Accept-Encoding negotiation, an ASGI middleware for
+# dynamic responses, and memoised precompressed variants for cached catalog bodies
+
+import asyncio
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Dynamic responses favour speed; precompressed variants are built once, so they
+# use the best ratio
+DYNAMIC_LEVELS = {"br": 4, "gzip": 6}
+STATIC_LEVELS = {"br": 11, "gzip": 9}
+# Top levels take seconds on multi-megabyte bodies (15 MB of sites: 0.8 s at
+# gzip 9, far longer at brotli 11), so large bodies get faster levels
+LARGE_BODY_BYTES = 1 << 20
+LARGE_BODY_LEVELS = {"br": 5, "gzip": 6}
+
+
+def static_level(encoding, size):
+    return (LARGE_BODY_LEVELS if size >= LARGE_BODY_BYTES else STATIC_LEVELS)[encoding]
+
+
+def negotiate(accept_encoding, available=SUPPORTED_ENCODINGS):
+    # Best encoding the client accepts (by q-value, then our preference order),
+    # or None for identity
+    if not accept_encoding:
+        return None
+    qvalues = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qvalues[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = qvalues.get(encoding, qvalues.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body, encoding, level=None):
+    if encoding == "br":
+        return brotli.compress(body, quality=DYNAMIC_LEVELS["br"] if level is None else level)
+    return gzip.compress(body, compresslevel=DYNAMIC_LEVELS["gzip"] if level is None else level, mtime=0)
+
+
+def variant_etag(etag, encoding):
+    # Each encoding is a separate representation, so it gets its own strong ETag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+class RenderedBody:
+    # Cached response bytes with their ETag and lazily built compressed variants
+    __slots__ = ("body", "etag", "_variants", "_pending")
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+        self._variants = {}
+        self._pending = {}
+
+    async def variant(self, encoding):
+        # Compressed in a worker thread the first time it is asked for; requests
+        # arriving meanwhile wait for that same compression
+        compressed = self._variants.get(encoding)
+        if compressed is not None:
+            return compressed
+        pending = self._pending.get(encoding)
+        if pending is None:
+            level = static_level(encoding, len(self.body))
+            pending = self._pending[encoding] = asyncio.ensure_future(
+                asyncio.to_thread(compress, self.body, encoding, level)
+            )
+        # Shielded, so a cancelled request does not cancel it for the others
+        compressed = await asyncio.shield(pending)
+        self._variants[encoding] = compressed
+        self._pending.pop(encoding, None)
+        return compressed
+
+
+class _StreamCompressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=DYNAMIC_LEVELS["br"])
+        else:
+            self._obj = zlib.compressobj(DYNAMIC_LEVELS["gzip"], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data):
+        # Flush per chunk so streamed exports still arrive progressively
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.finish() if self.encoding == "br" else self._obj.flush()
+
+
+class CompressionMiddleware:
+    # Compresses compressible responses of at least min_size bytes, and every
+    # streamed one chunk by chunk. Responses that already carry Content-Encoding
+    # (precompressed catalog variants) pass through untouched.
+
+    def __init__(self, app, min_size=1024):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                response_headers = {k.lower(): v for k, v in message["headers"]}
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in response_headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if message["status"] == 304:
+                    # No body, but caches must still key it like the compressed 200
+                    start = _with_vary(start)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if passthrough:
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                if not more_body:
+                    # Complete body: small ones go out as-is, others in one shot
+                    if len(body) < self.min_size:
+                        await send(_with_vary(start))
+                    else:
+                        body = compress(body, encoding)
+                        await send(_compressed_start(start, encoding, len(body)))
+                    start = None
+                    passthrough = True
+                    await send({"type": "http.response.body", "body": body, "more_body": False})
+                    return
+                compressor = _StreamCompressor(encoding)
+                await send(_compressed_start(start, encoding))
+                start = None
+            data = compressor.chunk(body) if more_body else compressor.chunk(body) + compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _with_vary(start):
+    headers = list(start["headers"])
+    vary = b", ".join(v for k, v in headers if k.lower() == b"vary")
+    if b"accept-encoding" not in vary.lower():
+        headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+        headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+    return {**start, "headers": headers}
+
+
+def _compressed_start(start, encoding, length=None):
+    # Headers for a compressed body; without length the body is streamed
+    headers = []
+    for k, v in _with_vary(start)["headers"]:
+        name = k.lower()
+        if name == b"content-length":
+            continue
+        if name == b"etag" and not v.startswith(b"W/"):
+            # The compressed bytes differ from what the strong ETag describes
+            v = b"W/" + v
+        headers.append((k, v))
+    headers.append((b"content-encoding", encoding.encode("ascii")))
+    if length is not None:
+        headers.append((b"content-length", str(length).encode("ascii")))
+    return {**start, "headers": headers}
@@ -0,0 +1,159 @@
+# Precomputed site-to-site distance and travel-time matrix, indexed by site id
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Rows computed per vectorised block while building, bounds temporary memory
+BUILD_CHUNK_ROWS = 1024
+
+
+def haversine_rows(lat_a, lon_a, lat_b, lon_b):
+    # Great-circle km between every point in a (rows) and every point in b (columns);
+    # all inputs are radians
+    dlat = lat_b[None, :] - lat_a[:, None]
+    dlon = lon_b[None, :] - lon_a[:, None]
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat_a)[:, None] * np.cos(lat_b)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+class SiteDistanceMatrix:
+    def __init__(self, avg_speed_kmh=40.0, road_factor=1.3, max_precomputed=4000):
+        # Travel time assumes road distance is road_factor x straight-line distance.
+        # Above max_precomputed sites the n x n matrix (4 bytes per pair) is not
+        # kept and distances are computed per lookup instead.
+        self.avg_speed_kmh = avg_speed_kmh
+        self.road_factor = road_factor
+        self.max_precomputed = max_precomputed
+        self.precomputed = True
+        self.ids = []
+        self.index = {}
+        self._radians = np.empty((0, 2), dtype=np.float64)
+        self._km = np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, site_id):
+        return site_id in self.index
+
+    @property
+    def km(self):
+        n = len(self.ids)
+        return self._km[:n, :n]
+
+    @property
+    def minutes_per_km(self):
+        return 60.0 * self.road_factor / self.avg_speed_kmh
+
+    def build(self, sites):
+        # Full rebuild from site dicts carrying id, latitude and longitude
+        self.ids = [site['id'] for site in sites]
+        self.index = {site_id: i for i, site_id in enumerate(self.ids)}
+        n = len(self.ids)
+        coords = np.array([[site['latitude'], site['longitude']] for site in sites], dtype=np.float64).reshape(n, 2)
+        self._radians = np.radians(coords)
+        self.precomputed = n <= self.max_precomputed
+        if not self.precomputed:
+            self._km = np.empty((0, 0), dtype=np.float32)
+            return
+        self._km = np.empty((n, n), dtype=np.float32)
+        lat, lon = self._radians[:, 0], self._radians[:, 1]
+        for start in range(0, n, BUILD_CHUNK_ROWS):
+            end = min(start + BUILD_CHUNK_ROWS, n)
+            self._km[start:end] = haversine_rows(lat[start:end], lon[start:end], lat, lon)
+
+    def changes(self, sites):
+        # (sites that are new or moved, ids no longer present) against the current build
+        n = len(sites)
+        idx = np.fromiter((self.index.get(site['id'], -1) for site in sites), dtype=np.intp, count=n)
+        points = np.radians(np.array([[site['latitude'], site['longitude']] for site in sites], dtype=np.float64).reshape(n, 2))
+        stale = idx < 0
+        known = ~stale
+        stale[known] = np.any(self._radians[idx[known]] != points[known], axis=1)
+        seen = {site['id'] for site in sites}
+        return [sites[i] for i in np.flatnonzero(stale)], [site_id for site_id in self.ids if site_id not in seen]
+
+    def upsert(self, site):
+        # Add a new site or refresh a moved one; only its row and column are recomputed
+        site_id = site['id']
+        point = np.radians([site['latitude'], site['longitude']])
+        i = self.index.get(site_id)
+        n = len(self.ids)
+        if i is None:
+            if self.precomputed and n + 1 > self.max_precomputed:
+                self.precomputed = False
+                self._km = np.empty((0, 0), dtype=np.float32)
+            if n == self._radians.shape[0]:
+                self._grow(self._next_capacity(n))
+            i = n
+            self.ids.append(site_id)
+            self.index[site_id] = i
+            n += 1
+        elif np.array_equal(self._radians[i], point):
+            return
+        self._radians[i] = point
+        if not self.precomputed:
+            return
+        lat, lon = self._radians[:n, 0], self._radians[:n, 1]
+        row = haversine_rows(lat[i:i + 1], lon[i:i + 1], lat, lon)[0]
+        self._km[i, :n] = row
+        self._km[:n, i] = row
+
+    def remove(self, site_id):
+        i = self.index.pop(site_id, None)
+        if i is None:
+            return
+        # Move the last site into the freed slot to keep storage dense
+        last = len(self.ids) - 1
+        if i != last:
+            moved_id = self.ids[last]
+            self.ids[i] = moved_id
+            self.index[moved_id] = i
+            self._radians[i] = self._radians[last]
+        if i != last and self.precomputed:
+            self._km[i, :last + 1] = self._km[last, :last + 1]
+            self._km[:last + 1, i] = self._km[:last + 1, last]
+            self._km[i, i] = 0.0
+        self.ids.pop()
+
+    def _next_capacity(self, n):
+        # Grow by a quarter, never past max_precomputed while the n x n matrix is kept
+        capacity = max(16, n + n // 4)
+        return min(capacity, self.max_precomputed) if self.precomputed else capacity
+
+    def _grow(self, capacity):
+        n = len(self.ids)
+        radians = np.empty((capacity, 2), dtype=np.float64)
+        radians[:n] = self._radians[:n]
+        self._radians = radians
+        if self.precomputed:
+            km = np.zeros((capacity, capacity), dtype=np.float32)
+            km[:n, :n] = self._km[:n, :n]
+            self._km = km
+
+    def _pairwise(self, idx):
+        lat, lon = self._radians[idx, 0], self._radians[idx, 1]
+        return haversine_rows(lat, lon, lat, lon)
+
+    def submatrix(self, site_ids, origin=None):
+        # Distances among site_ids (in that order); an optional (lat, lon) origin is
+        # appended as the last row/column. Returns None if any id is unknown.
+        try:
+            idx = np.fromiter((self.index[site_id] for site_id in site_ids), dtype=np.intp, count=len(site_ids))
+        except KeyError:
+            return None
+        if self.precomputed:
+            sub = self._km[np.ix_(idx, idx)].astype(np.float64)
+        else:
+            sub = self._pairwise(idx)
+        if origin is None:
+            return sub
+        origin_rad = np.radians(np.asarray(origin, dtype=np.float64)).reshape(1, 2)
+        row = haversine_rows(origin_rad[:, 0], origin_rad[:, 1], self._radians[idx, 0], self._radians[idx, 1])[0]
+        k = len(idx)
+        full = np.zeros((k + 1, k + 1), dtype=np.float64)
+        full[:k, :k] = sub
+        full[k, :k] = row
+        full[:k, k] = row
+        return full
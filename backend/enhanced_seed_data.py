@@ -21,7 +21,7 @@ ENHANCED_SITES_DATA = [
         "image": "https://images.unsplash.com/photo-1681054559674-7e80aad3d2ff?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NTY2Njl8MHwxfHNlYXJjaHwxfHxhbmNpZW50JTIwSW5kaWFuJTIwdGVtcGxlfGVufDB8fHx8MTc2MzU4ODA4OHww&ixlib=rb-4.1.0&q=85",
         "extended_content": {
             "history": {
-                "full_text": """The Bateshwar temple complex represents one of North India's most significant archaeological rediscoveries of the 21st century. Hidden beneath centuries of silt and vegetation along the Yamuna's banks, these structures remained largely forgotten until systematic excavation and restoration began in 2005.\n\n**Origins (8th-9th Century CE)**\nThe earliest structures at Bateshwar date to the reign of the Gurjara-Pratihara dynasty, specifically during King Nagabhata II's rule (805-833 CE). Archaeological evidence suggests the site was chosen for its proximity to the Yamuna River, considered sacred, and its strategic location along ancient trade routes connecting Gwalior to Agra. Initial construction focused on a central Shiva temple, around which smaller shrines were gradually added over two centuries.\n\nInscriptions discovered on temple pedestals indicate royal patronage from multiple generations of Pratihara rulers. The architectural style—characterized by intricate lattice work (jali), sculpted shikharas (spires), and detailed narrative panels—marks the golden age of North Indian temple architecture.\n\n**Golden Age (9th-10th Century)**\nDuring the 9th and 10th centuries, Bateshwar flourished as a major pilgrimage center. Historical records from the period mention annual fairs (melas) attracting thousands of devotees. The complex expanded to include over 200 individual shrines, each dedicated to Shiva in his various forms. The temples served not merely as places of worship but as centers of learning, with evidence of manuscript production and philosophical debate.\n\nThe craftsmanship reached its zenith during this period. Master sculptors (shilpis) created elaborate friezes depicting scenes from the Mahabharata and Ramayana. The precision of stone-cutting and the mathematical accuracy of architectural proportions demonstrate advanced engineering knowledge. Many temples employed the principle of 'garbhagriha' (sanctum) alignment to catch first light during equinoxes.\n\n**Decline & Rediscovery (11th Century-Present)**\nThe decline began in the late 10th century following invasions by Mahmud of Ghazni (1018-1027 CE). Many temples were damaged, and the site gradually lost its prominence. Successive floods of the Yamuna buried structures under meters of alluvial soil. By the 15th century, Bateshwar had been completely abandoned and forgotten.\n\nRediscovery came unexpectedly in 2005 when local archaeologist K.K. Muhammed noticed temple spires protruding from sand dunes. The Archaeological Survey of India (ASI), in partnership with US-based non-profit organisation Archaeological Survey of India Friends, launched a comprehensive restoration project. Over 15 years, more than 80 temples were fully restored using traditional methods and original materials wherever possible. The work continues today, with approximately 120 structures still awaiting excavation.",
+                "full_text": "The Bateshwar temple complex represents one of North India's most significant archaeological rediscoveries of the 21st century. Hidden beneath centuries of silt and vegetation along the Yamuna's banks, these structures remained largely forgotten until systematic excavation and restoration began in 2005.\n\n**Origins (8th-9th Century CE)**\nThe earliest structures at Bateshwar date to the reign of the Gurjara-Pratihara dynasty, specifically during King Nagabhata II's rule (805-833 CE). Archaeological evidence suggests the site was chosen for its proximity to the Yamuna River, considered sacred, and its strategic location along ancient trade routes connecting Gwalior to Agra. Initial construction focused on a central Shiva temple, around which smaller shrines were gradually added over two centuries.\n\nInscriptions discovered on temple pedestals indicate royal patronage from multiple generations of Pratihara rulers. The architectural style—characterized by intricate lattice work (jali), sculpted shikharas (spires), and detailed narrative panels—marks the golden age of North Indian temple architecture.\n\n**Golden Age (9th-10th Century)**\nDuring the 9th and 10th centuries, Bateshwar flourished as a major pilgrimage center. Historical records from the period mention annual fairs (melas) attracting thousands of devotees. The complex expanded to include over 200 individual shrines, each dedicated to Shiva in his various forms. The temples served not merely as places of worship but as centers of learning, with evidence of manuscript production and philosophical debate.\n\nThe craftsmanship reached its zenith during this period. Master sculptors (shilpis) created elaborate friezes depicting scenes from the Mahabharata and Ramayana. The precision of stone-cutting and the mathematical accuracy of architectural proportions demonstrate advanced engineering knowledge. Many temples employed the principle of 'garbhagriha' (sanctum) alignment to catch first light during equinoxes.\n\n**Decline & Rediscovery (11th Century-Present)**\nThe decline began in the late 10th century following invasions by Mahmud of Ghazni (1018-1027 CE). Many temples were damaged, and the site gradually lost its prominence. Successive floods of the Yamuna buried structures under meters of alluvial soil. By the 15th century, Bateshwar had been completely abandoned and forgotten.\n\nRediscovery came unexpectedly in 2005 when local archaeologist K.K. Muhammed noticed temple spires protruding from sand dunes. The Archaeological Survey of India (ASI), in partnership with US-based non-profit organisation Archaeological Survey of India Friends, launched a comprehensive restoration project. Over 15 years, more than 80 temples were fully restored using traditional methods and original materials wherever possible. The work continues today, with approximately 120 structures still awaiting excavation.",
                 "timeline": [
                     {"year": "805 CE", "event": "Foundation under Nagabhata II"},
                     {"year": "850 CE", "event": "Expansion to 50+ temples"},
@@ -0,0 +1,48 @@
+# JSON encoding for API responses and exports
+#
+# Uses orjson (in requirements.txt; datetimes, numpy values and non-str keys are
+# handled natively). The standard library fallback only keeps the app working
+# where orjson cannot be installed, without the speedup.
+
+import json
+from datetime import date, datetime, timezone
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # fallback for environments without orjson wheels
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "tolist"):  # numpy scalars and arrays
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def format_datetime(value: datetime) -> str:
+    # Same shape pydantic uses: UTC with a Z suffix; naive values are UTC, as
+    # BSON dates are
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(value) -> bytes:
+        return orjson.dumps(value, default=_default, option=_OPTIONS)
+else:
+    def dumps(value) -> bytes:
+        return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
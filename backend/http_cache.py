@@ -0,0 +1,67 @@
+# HTTP validators for GET routes: strong ETags, If-None-Match and Cache-Control
+
+import hashlib
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.responses import StreamingResponse
+
+
+# Headers a 304 repeats from the 200 it stands for (RFC 9110 15.4.5)
+NOT_MODIFIED_HEADERS = ("etag", "cache-control", "vary", "content-location", "expires")
+
+
+def make_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_get_route(max_age_by_path: dict, default_cache_control: str = "no-cache"):
+    # Build an APIRoute class that adds validators to every GET route on a router.
+    # max_age_by_path maps a full route path (e.g. "/api/sites/{slug}") to max-age seconds.
+
+    class ConditionalGetRoute(APIRoute):
+        def get_route_handler(self):
+            handler = super().get_route_handler()
+            max_age = max_age_by_path.get(self.path)
+            if max_age is None:
+                cache_control = default_cache_control
+            else:
+                cache_control = f"public, max-age={max_age}"
+
+            async def route_handler(request: Request) -> Response:
+                response = await handler(request)
+                if (
+                    request.method != "GET"
+                    or response.status_code != 200
+                    or isinstance(response, StreamingResponse)
+                ):
+                    return response
+
+                etag = response.headers.get("etag")
+                if etag is None:
+                    etag = make_etag(response.body)
+                    response.headers["etag"] = etag
+                response.headers.setdefault("cache-control", cache_control)
+
+                if_none_match = request.headers.get("if-none-match")
+                if if_none_match and etag_matches(if_none_match, etag):
+                    headers = {name: response.headers[name] for name in NOT_MODIFIED_HEADERS if name in response.headers}
+                    return Response(status_code=304, headers=headers)
+                return response
+
+            return route_handler
+
+    return ConditionalGetRoute
@@ -0,0 +1,96 @@
+# MongoDB index bootstrap and COLLSCAN self-check for the lookups in server.py
+
+import logging
+
+from pymongo import ASCENDING, GEOSPHERE, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Default index names are kept so re-running against existing indexes is a no-op
+INDEX_SPECS = {
+    "regions": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("slug", ASCENDING)], unique=True),
+    ],
+    "sites": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("slug", ASCENDING)], unique=True),
+        # GET /api/sites?region_id= and its _id-ordered pages
+        IndexModel([("region_id", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("location", GEOSPHERE)]),
+    ],
+    "guides": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "site_content": [
+        IndexModel([("slug", ASCENDING), ("section", ASCENDING)], unique=True),
+    ],
+    "preset_packages": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "feedbacks": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "trips": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "pricing_rules": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+}
+
+# Representative filters for every hot lookup; values never need to match
+HOT_QUERIES = [
+    ("regions", {"slug": "_probe"}),
+    ("sites", {"slug": "_probe"}),
+    ("sites", {"region_id": "_probe"}),
+    ("sites", {"id": {"$in": ["_probe"]}}),
+    ("site_content", {"slug": "_probe"}),
+    ("site_content", {"slug": "_probe", "section": "_probe"}),
+    ("guides", {"id": "_probe"}),
+    ("guides", {"id": {"$in": ["_probe"]}}),
+    ("pricing_rules", {"id": "active"}),
+]
+
+
+async def ensure_indexes(db):
+    # Create every declared index, one at a time so a single failure (e.g.
+    # duplicate slugs blocking a unique index) does not stop the rest
+    created, failed = [], []
+    for collection, models in INDEX_SPECS.items():
+        for model in models:
+            try:
+                name = await db[collection].create_indexes([model])
+                created.append(f"{collection}.{name[0]}")
+            except OperationFailure as e:
+                failed.append({"index": f"{collection}.{model.document['name']}", "error": str(e)})
+                logger.error(f"Could not create index {collection}.{model.document['name']}: {e}")
+    return {"created": created, "failed": failed}
+
+
+def _plan_stages(plan):
+    # Every stage name in an explain() plan tree
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def find_collscans(db):
+    # Hot queries whose winning plan still scans the whole collection
+    collscans = []
+    for collection, query in HOT_QUERIES:
+        try:
+            explain = await db[collection].find(query).explain()
+        except Exception as e:
+            logger.warning(f"explain() failed for {collection} {query}: {e}")
+            continue
+        plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _plan_stages(plan):
+            collscans.append({"collection": collection, "query": str(query)})
+            logger.warning(f"Hot query still does a COLLSCAN: {collection} {query}")
+    return collscans
@@ -0,0 +1,288 @@
+# Lightweight in-process metrics with Prometheus text exposition
+#
+# Counters, gauges and histograms keyed by label values, an ASGI middleware for
+# per-route request metrics, pymongo listeners that time every MongoDB command
+# and track connection pool usage, and named spans for timing blocks of
+# application code.
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+# Seconds; tuned for API latencies from sub-millisecond cache hits to slow queries
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        # pymongo listeners run on driver threads, so updates take a lock
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        # Per-bucket (non-cumulative) counts; cumulated when rendered
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self):
+        lines = self.header()
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self._metrics = []
+        # Callables returning [(name, kind, help, [(labels dict, value)])],
+        # sampled at scrape time (cache and queue stats, pool sizes)
+        self._collectors = []
+        self.http_requests = self.counter(
+            "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+        self.http_duration = self.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+        self.http_in_flight = self.gauge("http_requests_in_flight", "HTTP requests being served")
+        self.db_duration = self.histogram(
+            "mongodb_command_duration_seconds", "MongoDB command latency", ("command", "collection"))
+        self.db_failures = self.counter(
+            "mongodb_command_failures_total", "Failed MongoDB commands", ("command", "collection"))
+        self.span_duration = self.histogram(
+            "app_span_duration_seconds", "Latency of instrumented code blocks", ("span",))
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.span_duration.observe(time.perf_counter() - start, name)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    # Per-route latency, status counts and in-flight requests. Routes are
+    # labelled by their path template so label cardinality stays bounded.
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        metrics = self.metrics
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.http_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            metrics.http_duration.observe(elapsed, method, path)
+            metrics.http_requests.inc(method, path, str(status))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    # Times every command the driver sends (find, getMore, insert, aggregate...)
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._started = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str) or event.command_name == "getMore":
+            collection = event.command.get("collection", "")
+        self._started[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        collection = self._started.pop((event.connection_id, event.request_id), "")
+        self.metrics.db_duration.observe(event.duration_micros / 1e6, event.command_name, collection)
+
+    def failed(self, event):
+        collection = self._started.pop((event.connection_id, event.request_id), "")
+        self.metrics.db_duration.observe(event.duration_micros / 1e6, event.command_name, collection)
+        self.metrics.db_failures.inc(event.command_name, collection)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    # Connection pool usage per server address; sampled through collect()
+
+    def __init__(self, max_pool_size=100):
+        self.max_pool_size = max_pool_size
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _update(self, address, **changes):
+        key = "%s:%s" % address
+        with self._lock:
+            pool = self._pools.setdefault(key, {
+                "open": 0, "checked_out": 0, "waiting": 0, "checkout_failures": 0, "cleared": 0,
+            })
+            for name, delta in changes.items():
+                pool[name] += delta
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop("%s:%s" % event.address, None)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._update(event.address, waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, checked_out=-1)
+
+    def stats(self):
+        with self._lock:
+            return {"max_pool_size": self.max_pool_size, "pools": {k: dict(v) for k, v in self._pools.items()}}
+
+    def collect(self):
+        pools = self.stats()["pools"]
+
+        def samples(field):
+            return [({"address": address}, pool[field]) for address, pool in sorted(pools.items())]
+
+        return [
+            ("mongodb_pool_max_size", "gauge", "Configured maxPoolSize per server", [({}, self.max_pool_size)]),
+            ("mongodb_pool_connections", "gauge", "Open pooled connections", samples("open")),
+            ("mongodb_pool_checked_out", "gauge", "Connections in use", samples("checked_out")),
+            ("mongodb_pool_waiting", "gauge", "Operations waiting for a connection", samples("waiting")),
+            ("mongodb_pool_checkout_failures_total", "counter", "Failed connection checkouts",
+             samples("checkout_failures")),
+            ("mongodb_pool_cleared_total", "counter", "Times a pool was cleared", samples("cleared")),
+        ]
@@ -0,0 +1,200 @@
+# Pydantic models for the API's requests, responses and stored documents.
+# Shared by server.py and catalog_import.py, which validates imported
+# documents against the same models the API serves.
+
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+# Sightseeing minutes available per trip day
+DAY_MINUTES = 480
+
+
+class Region(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    slug: str
+    description: str
+    banner_image: str
+    short_description: str
+
+class Site(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    region_id: str
+    name: str
+    slug: str
+    type: str
+    short_description: str
+    full_description: str
+    latitude: float
+    longitude: float
+    entry_fee: int
+    avg_visit_time_mins: int
+    image: str
+
+class Guide(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    certification: str
+    fee_per_day: int
+    languages: List[str]
+    bio: str
+    image: str
+
+class Feedback(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    email: str
+    rating: Optional[int] = None
+    message: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class FeedbackCreate(BaseModel):
+    name: str
+    email: str
+    rating: Optional[int] = None
+    message: str
+
+class PresetPackage(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    description: str
+    site_ids: List[str]
+    days: int
+    estimated_cost: int
+    features: List[str]
+
+class NearbySite(Site):
+    distance_km: float
+
+class SearchHit(BaseModel):
+    kind: Literal["site", "region"]
+    id: str
+    slug: str
+    name: str
+    type: Optional[str] = None
+    short_description: str
+    image: Optional[str] = None
+    score: float
+
+class SiteContentSection(BaseModel):
+    section: str
+    size: int
+
+class SiteContentIndex(BaseModel):
+    slug: str
+    sections: List[SiteContentSection]
+
+class TripEstimateRequest(BaseModel):
+    site_ids: List[str]
+    budget: int
+    days: int
+    guide_id: Optional[str] = None
+    # Optional fixed starting point (e.g. the traveller's hotel)
+    start_latitude: Optional[float] = None
+    start_longitude: Optional[float] = None
+    group_size: int = Field(1, ge=1)
+    travel_date: Optional[date] = None
+
+class CostBreakdown(BaseModel):
+    site_name: str
+    entry_fee: int
+    food_cost: int
+    transport_cost: int
+    activity_cost: int
+    total: int
+
+class TripEstimateResponse(BaseModel):
+    total_cost: int
+    total_time_mins: int
+    cost_breakdown: List[CostBreakdown]
+    route_coordinates: List[List[float]]
+    guide_cost: int
+    suggestions: List[str]
+    route_site_ids: List[str] = []
+    route_legs_km: List[float] = []
+    total_distance_km: float = 0.0
+
+class TripRecommendRequest(BaseModel):
+    budget: int
+    days: int = Field(ge=1)
+    guide_id: Optional[str] = None
+    must_include: List[str] = []
+    region_id: Optional[str] = None
+    group_size: int = Field(1, ge=1)
+    travel_date: Optional[date] = None
+    start_latitude: Optional[float] = None
+    start_longitude: Optional[float] = None
+
+class TripRecommendation(BaseModel):
+    site_ids: List[str]
+    score: float
+    optimal: bool
+    explored_nodes: int
+    estimate: TripEstimateResponse
+
+class TripScheduleRequest(BaseModel):
+    site_ids: List[str]
+    days: Optional[int] = Field(None, ge=1)
+    day_start: str = Field("09:00", pattern=r"^([01][0-9]|2[0-3]):[0-5][0-9]$")
+    day_minutes: int = Field(DAY_MINUTES, ge=60, le=1440)
+    start_latitude: Optional[float] = None
+    start_longitude: Optional[float] = None
+
+class ScheduleStop(BaseModel):
+    site_id: str
+    site_name: str
+    arrive: str
+    depart: str
+    travel_mins: int
+    travel_km: float
+    visit_mins: int
+
+class DaySchedule(BaseModel):
+    day: int
+    stops: List[ScheduleStop]
+    travel_mins: int
+    visit_mins: int
+    total_mins: int
+
+class TripScheduleResponse(BaseModel):
+    days: List[DaySchedule]
+    fits: bool
+    total_travel_mins: int
+    total_travel_km: float
+
+class TripEstimateBatchRequest(BaseModel):
+    # Items are validated individually so one bad item does not reject the batch
+    requests: List[Dict[str, Any]] = Field(max_length=200)
+
+class TripEstimateBatchItem(BaseModel):
+    status_code: int
+    estimate: Optional[TripEstimateResponse] = None
+    error: Optional[str] = None
+
+class TripEstimateBatchResponse(BaseModel):
+    results: List[TripEstimateBatchItem]
+
+class Trip(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    site_ids: List[str]
+    total_cost: int
+    total_time_mins: int
+    guide_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class TripCreate(BaseModel):
+    name: str
+    site_ids: List[str]
+    total_cost: int
+    total_time_mins: int
+    guide_id: Optional[str] = None
@@ -0,0 +1,74 @@
+# Motor client construction from environment settings
+#
+# Every uvicorn worker owns one client and so one pool per server it talks to;
+# size MONGO_MAX_POOL_SIZE so that workers x pool size stays within what the
+# cluster accepts. Unset options keep the driver defaults.
+
+import logging
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+
+logger = logging.getLogger(__name__)
+
+# env var -> (client option, type)
+CLIENT_OPTIONS = {
+    'MONGO_MAX_POOL_SIZE': ('maxPoolSize', int),
+    'MONGO_MIN_POOL_SIZE': ('minPoolSize', int),
+    'MONGO_MAX_IDLE_TIME_MS': ('maxIdleTimeMS', int),
+    'MONGO_MAX_CONNECTING': ('maxConnecting', int),
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': ('waitQueueTimeoutMS', int),
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': ('serverSelectionTimeoutMS', int),
+    'MONGO_CONNECT_TIMEOUT_MS': ('connectTimeoutMS', int),
+    'MONGO_SOCKET_TIMEOUT_MS': ('socketTimeoutMS', int),
+    'MONGO_APP_NAME': ('appname', str),
+}
+
+# Wire compressors and the module each one needs
+COMPRESSOR_MODULES = {'zstd': 'zstandard', 'snappy': 'snappy', 'zlib': 'zlib'}
+
+
+def available_compressors(requested):
+    # Requested compressors (in preference order) whose library is installed
+    available = []
+    for name in (c.strip() for c in requested.split(',') if c.strip()):
+        module = COMPRESSOR_MODULES.get(name)
+        if module is None:
+            logger.warning(f"Unknown MongoDB compressor {name!r} ignored")
+            continue
+        try:
+            __import__(module)
+        except ImportError:
+            logger.warning(f"MongoDB compressor {name!r} needs the {module!r} package; skipped")
+            continue
+        available.append(name)
+    return available
+
+
+def client_options(environ=os.environ):
+    # Timestamps are stored as native BSON dates and read back as aware UTC datetimes
+    options = {'tz_aware': True}
+    for env_name, (option, cast) in CLIENT_OPTIONS.items():
+        value = environ.get(env_name)
+        if value:
+            options[option] = cast(value)
+    compressors = available_compressors(environ.get('MONGO_COMPRESSORS', ''))
+    if compressors:
+        options['compressors'] = ','.join(compressors)
+        if 'zlib' in compressors and environ.get('MONGO_ZLIB_LEVEL'):
+            options['zlibCompressionLevel'] = int(environ['MONGO_ZLIB_LEVEL'])
+    return options
+
+
+def create_client(url, options, event_listeners=()):
+    return AsyncIOMotorClient(url, event_listeners=list(event_listeners), **options)
+
+
+def catalog_database(db, read_preference='primary', max_staleness_seconds=-1):
+    # The same database routed by read preference, for catalog reads that can
+    # tolerate replication lag. Writes keep using db (always the primary).
+    if read_preference == 'primary':
+        return db
+    mode = read_pref_mode_from_name(read_preference)
+    return db.with_options(read_preference=make_read_preference(mode, None, max_staleness=max_staleness_seconds))
@@ -0,0 +1,144 @@
+# Data-driven pricing rules for trip estimates
+#
+# Rules are plain JSON (file or the pricing_rules collection) and are compiled
+# into small lookup tables indexed by (region, site type), so pricing N sites is
+# a gather plus a few array operations. A compiled snapshot is immutable; a
+# reload builds a new one and swaps the reference, so in-flight estimates keep
+# pricing against the snapshot they started with.
+
+import copy
+import math
+
+import numpy as np
+
+RATE_FIELDS = ("food_cost", "activity_cost", "transport_base", "transport_per_km")
+
+# Reproduces the original flat estimate: ₹300 food, ₹200 transport, ₹150 activities per site
+DEFAULT_PRICING_RULES = {
+    "defaults": {
+        "food_cost": 300,
+        "activity_cost": 150,
+        "transport_base": 200,
+        "transport_per_km": 0,
+    },
+    # region id or slug -> partial rates
+    "regions": {},
+    # site type (e.g. "Temple") -> partial rates, applied over the region rates
+    "site_types": {},
+    # site id or slug -> partial rates, applied last
+    "sites": {},
+    # [{"months": [11, 12, 1, 2], "multiplier": 1.2}]; applied to food, activity and transport
+    "seasons": [],
+    "group": {
+        # travellers sharing one vehicle; transport is charged per vehicle
+        "vehicle_capacity": 4,
+        # [{"min_size": 10, "multiplier": 0.9}]; applied to per-person costs
+        "discounts": [],
+    },
+}
+
+
+def merge_rules(rules):
+    merged = copy.deepcopy(DEFAULT_PRICING_RULES)
+    for key, value in (rules or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class CompiledPricing:
+    def __init__(self, rules, regions=()):
+        self.rules = merge_rules(rules)
+        slug_to_id = {region['slug']: region['id'] for region in regions}
+
+        def region_key(key):
+            return slug_to_id.get(key, key)
+
+        region_rules = {region_key(k): v for k, v in self.rules["regions"].items()}
+        type_rules = self.rules["site_types"]
+        # Index 0 is "no specific rule" for both axes
+        self.region_index = {key: i + 1 for i, key in enumerate(region_rules)}
+        self.type_index = {key: i + 1 for i, key in enumerate(type_rules)}
+        shape = (len(region_rules) + 1, len(type_rules) + 1, len(RATE_FIELDS))
+
+        table = np.empty(shape, dtype=np.float64)
+        table[:, :] = [float(self.rules["defaults"][f]) for f in RATE_FIELDS]
+        for key, r in self.region_index.items():
+            for f, field in enumerate(RATE_FIELDS):
+                if field in region_rules[key]:
+                    table[r, :, f] = region_rules[key][field]
+        for key, t in self.type_index.items():
+            for f, field in enumerate(RATE_FIELDS):
+                if field in type_rules[key]:
+                    table[:, t, f] = type_rules[key][field]
+        self.table = table
+        self.site_rules = self.rules["sites"]
+
+        months = np.ones(13, dtype=np.float64)
+        for season in self.rules["seasons"]:
+            for month in season["months"]:
+                months[month] = season["multiplier"]
+        self.month_multiplier = months
+
+        group = self.rules["group"]
+        self.vehicle_capacity = max(1, int(group.get("vehicle_capacity", 4)))
+        self.group_discounts = sorted(group.get("discounts", []), key=lambda d: d["min_size"])
+
+    def group_multiplier(self, group_size):
+        multiplier = 1.0
+        for tier in self.group_discounts:
+            if group_size >= tier["min_size"]:
+                multiplier = tier["multiplier"]
+        return multiplier
+
+    def rates(self, sites):
+        # (N, len(RATE_FIELDS)) rate matrix for a list of site dicts
+        r = [self.region_index.get(site.get('region_id'), 0) for site in sites]
+        t = [self.type_index.get(site.get('type'), 0) for site in sites]
+        rates = self.table[r, t]
+        if self.site_rules:
+            for i, site in enumerate(sites):
+                override = self.site_rules.get(site.get('id')) or self.site_rules.get(site.get('slug'))
+                if override:
+                    for f, field in enumerate(RATE_FIELDS):
+                        if field in override:
+                            rates[i, f] = override[field]
+        return rates
+
+    def quote(self, sites, legs_km, group_size=1, month=None):
+        # Per-site integer costs for sites visited in order; legs_km[i] is the
+        # distance travelled to reach sites[i]
+        n = len(sites)
+        rates = self.rates(sites)
+        season = self.month_multiplier[month] if month else 1.0
+        per_person = self.group_multiplier(group_size) * group_size
+        vehicles = math.ceil(group_size / self.vehicle_capacity)
+        legs = np.asarray(legs_km, dtype=np.float64).reshape(n)
+
+        entry = np.array([site.get('entry_fee', 0) for site in sites], dtype=np.float64) * group_size
+        food = np.rint(rates[:, 0] * season * per_person)
+        activity = np.rint(rates[:, 1] * season * per_person)
+        transport = np.rint((rates[:, 2] + rates[:, 3] * legs) * season * vehicles)
+        total = entry + food + activity + transport
+        return {
+            "entry_fee": entry.astype(np.int64).tolist(),
+            "food_cost": food.astype(np.int64).tolist(),
+            "activity_cost": activity.astype(np.int64).tolist(),
+            "transport_cost": transport.astype(np.int64).tolist(),
+            "total": total.astype(np.int64).tolist(),
+        }
+
+
+class PricingEngine:
+    def __init__(self):
+        self.current = CompiledPricing(None)
+        self.source = "defaults"
+
+    def load(self, rules, regions=(), source="defaults"):
+        # Compile first, then swap, so a bad rule set leaves the old one active
+        compiled = CompiledPricing(rules, regions)
+        self.current = compiled
+        self.source = source
+        return compiled
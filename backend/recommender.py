@@ -0,0 +1,146 @@
+# Budget-constrained itinerary search
+#
+# Picks the subset of candidate sites that maximises
+#   site_weight * sites + type_weight * distinct types + rating_weight * sum(rating)
+# subject to a cost budget and a visiting-time budget. Depth-first
+# branch-and-bound with a fractional-knapsack bound on cost; the search stops at
+# a deadline and returns the best itinerary found so far.
+
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+SITE_WEIGHT = 10.0
+TYPE_WEIGHT = 6.0
+RATING_WEIGHT = 2.0
+
+
+@dataclass
+class Candidate:
+    key: str
+    cost: float
+    minutes: float
+    type: str
+    rating: float = 0.0
+
+    @property
+    def value(self):
+        return SITE_WEIGHT + RATING_WEIGHT * self.rating
+
+
+@dataclass
+class SearchResult:
+    chosen: List[int] = field(default_factory=list)
+    score: float = 0.0
+    optimal: bool = True
+    nodes: int = 0
+
+
+def itinerary_score(candidates: Sequence[Candidate], chosen: Sequence[int]) -> float:
+    return (sum(candidates[i].value for i in chosen)
+            + TYPE_WEIGHT * len({candidates[i].type for i in chosen}))
+
+
+def search(candidates: Sequence[Candidate], budget: float, max_minutes: float,
+           must_include: Sequence[int] = (), time_budget_ms: float = 50.0) -> Optional[SearchResult]:
+    # Returns None when the must-include sites alone do not fit
+    must = list(dict.fromkeys(must_include))
+    base_cost = sum(candidates[i].cost for i in must)
+    base_minutes = sum(candidates[i].minutes for i in must)
+    if base_cost > budget or base_minutes > max_minutes:
+        return None
+
+    # Optional sites in decreasing optimistic value per rupee; every site is
+    # assumed to add a new type, which keeps the bound admissible
+    must_set = set(must)
+    optional = [i for i in range(len(candidates)) if i not in must_set]
+    optimistic = {i: candidates[i].value + TYPE_WEIGHT for i in optional}
+    optional.sort(key=lambda i: optimistic[i] / candidates[i].cost if candidates[i].cost > 0 else float('inf'),
+                  reverse=True)
+    costs = [candidates[i].cost for i in optional]
+    cum_cost = [0.0]
+    cum_value = [0.0]
+    for i in optional:
+        cum_cost.append(cum_cost[-1] + candidates[i].cost)
+        cum_value.append(cum_value[-1] + optimistic[i])
+
+    # Time-side bound: at most `fit` more sites fit in the remaining minutes, each
+    # worth at most the best remaining base value, adding at most one new type
+    cum_minutes = [0.0]
+    for m in sorted(candidates[i].minutes for i in optional):
+        cum_minutes.append(cum_minutes[-1] + m)
+    suffix_max_value = [0.0] * (len(optional) + 1)
+    suffix_types = [0] * (len(optional) + 1)
+    seen = set()
+    for k in range(len(optional) - 1, -1, -1):
+        c = candidates[optional[k]]
+        suffix_max_value[k] = max(suffix_max_value[k + 1], c.value)
+        seen.add(c.type)
+        suffix_types[k] = len(seen)
+
+    def bound(k, remaining_cost, remaining_minutes):
+        # Fractional knapsack over optional[k:] with the remaining budget
+        j = bisect_right(cum_cost, cum_cost[k] + remaining_cost, lo=k) - 1
+        value = cum_value[j] - cum_value[k]
+        if j < len(optional):
+            spare = cum_cost[k] + remaining_cost - cum_cost[j]
+            if costs[j] > 0:
+                value += optimistic[optional[j]] * min(1.0, spare / costs[j])
+        fit = min(bisect_right(cum_minutes, remaining_minutes) - 1, len(optional) - k)
+        by_time = fit * suffix_max_value[k] + TYPE_WEIGHT * min(fit, suffix_types[k])
+        return min(value, by_time)
+
+    best = SearchResult(chosen=list(must), score=itinerary_score(candidates, must))
+    deadline = time.perf_counter() + time_budget_ms / 1000.0
+    chosen = list(must)
+    type_counts = {}
+    for t in (candidates[i].type for i in must):
+        type_counts[t] = type_counts.get(t, 0) + 1
+
+    # Greedy incumbent so a deadline hit still returns something sensible
+    cost, minutes = base_cost, base_minutes
+    greedy = list(must)
+    for i in optional:
+        c = candidates[i]
+        if cost + c.cost <= budget and minutes + c.minutes <= max_minutes:
+            greedy.append(i)
+            cost += c.cost
+            minutes += c.minutes
+    greedy_score = itinerary_score(candidates, greedy)
+    if greedy_score > best.score:
+        best.chosen, best.score = greedy, greedy_score
+
+    # Iterative DFS, include-branch first; "undo" entries restore the shared
+    # chosen/type_counts state once an include subtree is finished
+    n = len(optional)
+    stack = [(False, 0, base_cost, base_minutes, sum(candidates[i].value for i in must))]
+    while stack:
+        entry = stack.pop()
+        if entry[0]:
+            c = candidates[entry[1]]
+            chosen.pop()
+            type_counts[c.type] -= 1
+            if not type_counts[c.type]:
+                del type_counts[c.type]
+            continue
+        _, k, cost, minutes, value = entry
+        best.nodes += 1
+        if best.nodes & 255 == 0 and time.perf_counter() > deadline:
+            best.optimal = False
+            break
+        score = value + TYPE_WEIGHT * len(type_counts)
+        if score > best.score:
+            best.score = score
+            best.chosen = list(chosen)
+        if k == n or score + bound(k, budget - cost, max_minutes - minutes) <= best.score + 1e-9:
+            continue
+        i = optional[k]
+        c = candidates[i]
+        stack.append((False, k + 1, cost, minutes, value))
+        if cost + c.cost <= budget and minutes + c.minutes <= max_minutes:
+            chosen.append(i)
+            type_counts[c.type] = type_counts.get(c.type, 0) + 1
+            stack.append((True, i))
+            stack.append((False, k + 1, cost + c.cost, minutes + c.minutes, value + c.value))
+    return best
@@ -0,0 +1,147 @@
+# Visiting-order optimisation for trip routes
+#
+# Routes are open paths (the trip does not return to its first stop). Small
+# selections are solved exactly with Held-Karp; larger ones use nearest
+# neighbour followed by 2-opt.
+
+import math
+from typing import List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Held-Karp is O(2^n * n^2); above this many stops the heuristic is used
+EXACT_MAX_STOPS = 8
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def pairwise_km(points: Sequence[Tuple[float, float]]) -> List[List[float]]:
+    n = len(points)
+    dist = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        lat1, lon1 = points[i]
+        for j in range(i + 1, n):
+            d = haversine_km(lat1, lon1, points[j][0], points[j][1])
+            dist[i][j] = dist[j][i] = d
+    return dist
+
+
+def path_length(dist, order: Sequence[int]) -> float:
+    return sum(dist[a][b] for a, b in zip(order, order[1:]))
+
+
+def held_karp(dist, start: Optional[int] = None) -> List[int]:
+    # Exact shortest open path visiting every node, optionally from a fixed start
+    n = len(dist)
+    if n <= 2:
+        order = list(range(n))
+        if start is not None and n == 2 and start == 1:
+            order.reverse()
+        return order
+
+    # best[(mask, last)] = (cost, previous node)
+    best = {}
+    starts = range(n) if start is None else [start]
+    for s in starts:
+        best[(1 << s, s)] = (0.0, -1)
+
+    full = (1 << n) - 1
+    for mask in range(1, full + 1):
+        for last in range(n):
+            entry = best.get((mask, last))
+            if entry is None:
+                continue
+            cost = entry[0]
+            row = dist[last]
+            for nxt in range(n):
+                bit = 1 << nxt
+                if mask & bit:
+                    continue
+                key = (mask | bit, nxt)
+                new_cost = cost + row[nxt]
+                current = best.get(key)
+                if current is None or new_cost < current[0]:
+                    best[key] = (new_cost, last)
+
+    last = min(range(n), key=lambda k: best.get((full, k), (math.inf,))[0])
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last)
+        prev = best[(mask, last)][1]
+        mask &= ~(1 << last)
+        last = prev
+    order.reverse()
+    return order
+
+
+def nearest_neighbour(dist, start: int) -> List[int]:
+    n = len(dist)
+    order = [start]
+    remaining = set(range(n)) - {start}
+    current = start
+    while remaining:
+        row = dist[current]
+        current = min(remaining, key=row.__getitem__)
+        remaining.remove(current)
+        order.append(current)
+    return order
+
+
+def two_opt(dist, order: List[int], fixed_start: bool = False) -> List[int]:
+    # Reverse segments while that shortens the open path
+    order = list(order)
+    n = len(order)
+    first = 1 if fixed_start else 0
+    improved = True
+    while improved:
+        improved = False
+        for i in range(first, n - 1):
+            a = order[i - 1] if i > 0 else None
+            b = order[i]
+            for j in range(i + 1, n):
+                c = order[j]
+                d = order[j + 1] if j + 1 < n else None
+                before = (dist[a][b] if a is not None else 0.0) + (dist[c][d] if d is not None else 0.0)
+                after = (dist[a][c] if a is not None else 0.0) + (dist[b][d] if d is not None else 0.0)
+                if after < before - 1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    b = order[i]
+                    improved = True
+    return order
+
+
+def optimize_order(dist, start: Optional[int] = None) -> List[int]:
+    n = len(dist)
+    if n <= EXACT_MAX_STOPS:
+        return held_karp(dist, start)
+    if start is not None:
+        return two_opt(dist, nearest_neighbour(dist, start), fixed_start=True)
+    # Free start: seed from the stop farthest from all others, a natural endpoint
+    seed = max(range(n), key=lambda k: sum(dist[k]))
+    return two_opt(dist, nearest_neighbour(dist, seed))
+
+
+def plan_route(points: Sequence[Tuple[float, float]],
+               start_point: Optional[Tuple[float, float]] = None,
+               dist=None):
+    # Order points into a short visiting route.
+    # Returns (order of indices into points, per-leg km, total km). When a start
+    # point is given the first leg runs from it to the first stop.
+    if dist is None:
+        dist = pairwise_km(list(points) + ([start_point] if start_point is not None else []))
+    if start_point is None:
+        path = optimize_order(dist)
+        order = path
+    else:
+        path = optimize_order(dist, start=len(points))
+        order = path[1:]
+    legs = [dist[a][b] for a, b in zip(path, path[1:])]
+    return order, legs, sum(legs)
@@ -0,0 +1,72 @@
+# Multi-day itinerary packing
+#
+# Splits an ordered route into consecutive days that each fit a daily time
+# window. Keeping the route order means every day is a geographically
+# contiguous stretch and total travel stays at the optimised route length. The
+# plan uses as few days as the daily window allows, and dynamic programming
+# places the boundaries between them to balance the daily load.
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+
+@dataclass
+class Stop:
+    key: str
+    visit_mins: float
+    # travel minutes from the previous stop (or the trip's start point)
+    travel_mins: float = 0.0
+
+
+def pack_days(stops: Sequence[Stop], day_mins: float,
+              max_days: Optional[int] = None) -> Tuple[List[Tuple[int, int]], bool]:
+    # Partition stops (already in route order) into contiguous days.
+    # Returns ([(start, end), ...] index ranges, fits). A day holds at most
+    # day_mins of travel + visiting, except a single stop longer than a day,
+    # which gets a day to itself. The plan uses the fewest days possible and,
+    # among those plans, minimises the sum of squared daily loads; max_days never
+    # spreads it further. fits is False if the fewest days exceed max_days or some
+    # single stop overruns the day window.
+    n = len(stops)
+    if n == 0:
+        return [], True
+    prefix = [0.0]
+    for s in stops:
+        prefix.append(prefix[-1] + s.visit_mins + s.travel_mins)
+
+    inf = float('inf')
+    # cost[k][j]: min sum of squared loads for stops[:j] in exactly k days
+    cost = [[inf] * (n + 1) for _ in range(n + 1)]
+    cut = [[0] * (n + 1) for _ in range(n + 1)]
+    cost[0][0] = 0.0
+    fewest = None
+    k = 0
+    while fewest is None:
+        k += 1
+        prev, row, cuts = cost[k - 1], cost[k], cut[k]
+        for j in range(k, n + 1):
+            for i in range(j - 1, k - 2, -1):
+                load = prefix[j] - prefix[i]
+                if load > day_mins and i < j - 1:
+                    break
+                if prev[i] == inf:
+                    continue
+                value = prev[i] + load * load
+                if value < row[j]:
+                    row[j] = value
+                    cuts[j] = i
+        if fewest is None and row[n] < inf:
+            fewest = k
+
+    fits = max_days is None or fewest <= max_days
+
+    bounds = []
+    j = n
+    for d in range(fewest, 0, -1):
+        i = cut[d][j]
+        bounds.append((i, j))
+        j = i
+    bounds.reverse()
+    if any(prefix[j] - prefix[i] > day_mins for i, j in bounds):
+        fits = False
+    return bounds, fits
@@ -0,0 +1,299 @@
+# In-process full-text search over sites and regions
+#
+# A weighted-field inverted index scored with BM25. Every query term also
+# matches vocabulary terms within one typo (symmetric-delete lookup), and the
+# last term matches as a prefix so the index can drive autocomplete. Documents
+# can be added, replaced or removed one at a time.
+#
+# Queries read postings in impact order (highest BM25 term-frequency part
+# first) and stop once no unread document can reach the current top results,
+# the threshold algorithm; common terms are rarely read to the end.
+
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+K1 = 1.2
+B = 0.75
+# Score multipliers for terms that only matched approximately
+PREFIX_WEIGHT = 0.8
+TYPO_WEIGHT = 0.6
+# Cap on vocabulary terms a single query term may expand to
+MAX_EXPANSIONS = 40
+# Shortest query term that gets typo matching
+MIN_TYPO_LENGTH = 4
+# Postings read from one expansion between threshold checks
+SCAN_BLOCK = 64
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it its of on or that the this to was were with".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return [t for t in _TOKEN.findall(text) if t not in STOPWORDS]
+
+
+def _deletes(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a, b):
+    # Damerau-Levenshtein distance <= 1 (one insert, delete, substitute or swap)
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:] or (
+            i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        )
+    return a[i:] == b[i + 1:]
+
+
+# Extended content sections that are searched, see site_content.py
+SEARCHED_SECTIONS = ("history", "folklore", "engineering")
+
+
+def site_fields(site, sections=None):
+    # (text, weight) pairs for a site and its extended content sections
+    fields = [
+        (site.get("name"), 4.0),
+        (site.get("type"), 2.0),
+        (site.get("headline"), 2.0),
+        (site.get("short_description"), 1.5),
+        (site.get("full_description"), 1.0),
+    ]
+    sections = sections or {}
+    history = sections.get("history") or {}
+    fields.append((history.get("full_text"), 0.5))
+    fields.extend((entry.get("event"), 0.5) for entry in history.get("timeline", []))
+    for story in sections.get("folklore") or []:
+        fields.append((story.get("title"), 1.5))
+        fields.append((story.get("story"), 0.5))
+    engineering = sections.get("engineering") or {}
+    fields.append((engineering.get("summary"), 0.5))
+    fields.extend((point, 0.5) for point in engineering.get("technical_points", []))
+    return fields
+
+
+def region_fields(region):
+    return [
+        (region.get("name"), 4.0),
+        (region.get("short_description"), 1.5),
+        (region.get("description"), 1.0),
+    ]
+
+
+class SearchIndex:
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_len: Dict[int, float] = {}
+        self._total_len = 0.0
+        self._keys: Dict[str, int] = {}
+        self._meta: Dict[int, dict] = {}
+        self._next_doc = 0
+        # term deletes -> terms, for one-typo lookups
+        self._delete_map: Dict[str, set] = {}
+        # sorted vocabulary for prefix lookups, rebuilt lazily after changes
+        self._sorted_terms: List[str] = []
+        self._sorted_dirty = False
+        # term -> (docs, impacts, average length) in impact order, built per term
+        # on first query and dropped when one of the term's documents changes
+        self._impacts: Dict[str, Tuple[List[int], List[float], float]] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        self.__init__()
+
+    def upsert(self, key: str, fields: List[Tuple[str, float]], meta: dict):
+        # fields: [(text, weight)]; meta is returned with every hit for this key
+        self.remove(key)
+        terms: Dict[str, float] = {}
+        for text, weight in fields:
+            for term in tokenize(text):
+                terms[term] = terms.get(term, 0.0) + weight
+        doc = self._next_doc
+        self._next_doc += 1
+        self._keys[key] = doc
+        self._meta[doc] = meta
+        self._doc_terms[doc] = terms
+        length = sum(terms.values())
+        self._doc_len[doc] = length
+        self._total_len += length
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._add_vocabulary(term)
+            postings[doc] = tf
+            self._impacts.pop(term, None)
+
+    def remove(self, key: str):
+        doc = self._keys.pop(key, None)
+        if doc is None:
+            return
+        del self._meta[doc]
+        self._total_len -= self._doc_len.pop(doc)
+        for term in self._doc_terms.pop(doc):
+            self._impacts.pop(term, None)
+            postings = self._postings[term]
+            del postings[doc]
+            if not postings:
+                del self._postings[term]
+                self._remove_vocabulary(term)
+
+    def _add_vocabulary(self, term):
+        self._sorted_dirty = True
+        for variant in _deletes(term) | {term}:
+            self._delete_map.setdefault(variant, set()).add(term)
+
+    def _remove_vocabulary(self, term):
+        self._sorted_dirty = True
+        for variant in _deletes(term) | {term}:
+            terms = self._delete_map.get(variant)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._delete_map[variant]
+
+    def _prefix_terms(self, prefix):
+        if self._sorted_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._sorted_dirty = False
+        terms = self._sorted_terms
+        matches = []
+        i = bisect_left(terms, prefix)
+        while i < len(terms) and terms[i].startswith(prefix):
+            if terms[i] != prefix:
+                matches.append(terms[i])
+            i += 1
+        return matches
+
+    def _typo_terms(self, term):
+        candidates = set()
+        for variant in _deletes(term) | {term}:
+            candidates |= self._delete_map.get(variant, set())
+        candidates.discard(term)
+        return [c for c in candidates if _within_one_edit(term, c)]
+
+    def expand(self, term: str, prefix: bool = False) -> Dict[str, float]:
+        # Vocabulary terms a query term matches, with their score multipliers
+        matches = {}
+        if term in self._postings:
+            matches[term] = 1.0
+        extra = []
+        if prefix:
+            extra.extend((t, PREFIX_WEIGHT) for t in self._prefix_terms(term))
+        if len(term) >= MIN_TYPO_LENGTH:
+            extra.extend((t, TYPO_WEIGHT) for t in self._typo_terms(term))
+        # Keep the most common expansions when a short prefix matches a lot
+        extra.sort(key=lambda item: len(self._postings[item[0]]), reverse=True)
+        for t, weight in extra[:MAX_EXPANSIONS]:
+            if matches.get(t, 0.0) < weight:
+                matches[t] = weight
+        return matches
+
+    def _norm(self, doc, avg_len):
+        return K1 * (1.0 - B + B * self._doc_len[doc] / avg_len)
+
+    def _impact_order(self, term, avg_len):
+        ordered = self._impacts.get(term)
+        if ordered is None:
+            impacts = {}
+            for doc, tf in self._postings[term].items():
+                impacts[doc] = tf * (K1 + 1.0) / (tf + self._norm(doc, avg_len))
+            docs = sorted(impacts, key=impacts.__getitem__, reverse=True)
+            ordered = self._impacts[term] = (docs, [impacts[doc] for doc in docs], avg_len)
+        return ordered
+
+    def _score(self, doc, by_term, avg_len):
+        # Full score of one document: per query term, its best matching expansion
+        norm = self._norm(doc, avg_len)
+        score = 0.0
+        for matches in by_term:
+            best = 0.0
+            for multiplier, postings in matches:
+                tf = postings.get(doc)
+                if tf is not None:
+                    term_score = multiplier * (tf * (K1 + 1.0) / (tf + norm))
+                    if term_score > best:
+                        best = term_score
+            score += best
+        return score
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None,
+               prefix: bool = True) -> List[Tuple[dict, float]]:
+        # Ranked (meta, score) hits; the last query term also matches as a prefix
+        terms = list(dict.fromkeys(tokenize(query)))
+        n = len(self._keys)
+        if not terms or not n or limit <= 0:
+            return []
+        avg_len = self._total_len / n or 1.0
+        # One scan per expansion: (query term position, bound per unit impact, docs, impacts)
+        scans = []
+        by_term: List[List[Tuple[float, Dict[int, float]]]] = [[] for _ in terms]
+        for position, term in enumerate(terms):
+            for match, weight in self.expand(term, prefix and position == len(terms) - 1).items():
+                postings = self._postings[match]
+                idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                docs, impacts, built_avg_len = self._impact_order(match, avg_len)
+                # Impacts were computed at built_avg_len; a larger average length
+                # since then raises them by at most the same ratio
+                slack = max(1.0, avg_len / built_avg_len)
+                scans.append((position, weight * idf * slack, docs, impacts))
+                by_term[position].append((weight * idf, postings))
+
+        offsets = [0] * len(scans)
+        seen = set()
+        top: List[Tuple[float, int]] = []  # min-heap of (score, -doc)
+        while True:
+            # An unread document scores at most the sum, over query terms, of
+            # the best impact still unread among that term's expansions
+            bounds = [0.0] * len(terms)
+            next_scan, next_bound = None, 0.0
+            for i, (position, multiplier, docs, impacts) in enumerate(scans):
+                if offsets[i] < len(docs):
+                    bound = multiplier * impacts[offsets[i]]
+                    bounds[position] = max(bounds[position], bound)
+                    if next_scan is None or bound > next_bound:
+                        next_scan, next_bound = i, bound
+            if next_scan is None or (len(top) == limit and top[0][0] >= sum(bounds)):
+                break
+            docs = scans[next_scan][2]
+            start = offsets[next_scan]
+            offsets[next_scan] = start + SCAN_BLOCK
+            for doc in docs[start:start + SCAN_BLOCK]:
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                if kind is not None and self._meta[doc]["kind"] != kind:
+                    continue
+                entry = (self._score(doc, by_term, avg_len), -doc)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+
+        # Equal scores rank the earlier indexed document first
+        return [(self._meta[-doc], score) for score, doc in sorted(top, reverse=True)]
+
+    def stats(self):
+        return {"documents": len(self._keys), "terms": len(self._postings)}
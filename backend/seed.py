@@ -0,0 +1,21 @@
+# Seed the database and run the startup catalog import without serving the API,
+# e.g. as a release step when the server runs with SEED_ON_STARTUP=false
+#
+#   python seed.py
+
+import asyncio
+
+import server
+
+
+async def main():
+    await server.connect_mongo()
+    try:
+        await server.seed_database()
+        await server.import_catalog_files()
+    finally:
+        await server.shutdown_db_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,128 +1,453 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+import time
+# Import time is reported in startup_report
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Request, Response, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager, suppress
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from bson import ObjectId
+from bson.errors import InvalidId
 import os
+import hashlib
 import logging
+import secrets
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from pydantic import TypeAdapter, ValidationError
+from typing import Dict, List, Literal, Optional
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+import asyncio
+import csv
+import io
+import json
+from catalog_cache import CatalogCache
+from single_flight import SingleFlight
+from catalog_sync import CatalogSync, acquire_lease, release_lease
+from shared_cache import SharedCache, make_backend, make_key as shared_key
+from http_cache import conditional_get_route, make_etag
+from fast_json import FastJSONResponse, dumps as dump_json, format_datetime
+from compression import CompressionMiddleware, RenderedBody, negotiate, variant_etag
+from routing import plan_route
+from distance_matrix import SiteDistanceMatrix
+from spatial_index import SiteSpatialIndex
+from pricing import PricingEngine
+from recommender import Candidate, search as search_itinerary
+from scheduler import Stop, pack_days
+from write_behind import WriteBehindQueue, WriteBehindQueueFull
+from indexes import ensure_indexes, find_collscans
+import site_content
+from search_index import SEARCHED_SECTIONS, SearchIndex, region_fields, site_fields
+from metrics import Metrics, MetricsMiddleware, MongoCommandMetrics, MongoPoolMetrics
+from mongo_client import catalog_database, client_options, create_client
+from models import (
+    DAY_MINUTES,
+    Region, Site, Guide, Feedback, FeedbackCreate, PresetPackage, NearbySite, SearchHit,
+    SiteContentIndex, TripEstimateRequest, CostBreakdown,
+    TripEstimateResponse, TripRecommendRequest, TripRecommendation, TripScheduleRequest,
+    ScheduleStop, DaySchedule, TripScheduleResponse, TripEstimateBatchRequest,
+    TripEstimateBatchItem, TripEstimateBatchResponse, Trip, TripCreate,
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Request, MongoDB command and code-span metrics, served on /metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+metrics = Metrics()
+
+# MongoDB connection, opened by the connect_mongo startup hook (MONGO_URL and
+# DB_NAME are read there). db always targets the primary; catalog_db routes
+# uncached per-request catalog lookups (estimates, nearby) by read preference.
+# Reads that fill a cache use the primary: after a version bump a lagging
+# secondary could otherwise be cached, and shared, under the new version.
+MONGO_CLIENT_OPTIONS = client_options()
+CATALOG_READ_PREFERENCE = os.environ.get('MONGO_CATALOG_READ_PREFERENCE', 'secondaryPreferred')
+CATALOG_MAX_STALENESS_SECONDS = int(os.environ.get('MONGO_CATALOG_MAX_STALENESS_SECONDS', '-1'))
+mongo_pool_metrics = MongoPoolMetrics(MONGO_CLIENT_OPTIONS.get('maxPoolSize', 100))
+client = None
+db = None
+catalog_db = None
+
+# Collections served from the catalog caches
+CATALOG_COLLECTIONS = {"regions", "sites", "guides", "preset_packages", site_content.COLLECTION}
+
+# Collections whose changes every worker follows (see catalog_sync); pricing
+# rules are compiled against the regions, so both trigger a pricing reload
+SYNCED_COLLECTIONS = CATALOG_COLLECTIONS | {"pricing_rules"}
+
+# Concurrent identical catalog loads and trip estimates share one in-flight call
+SINGLE_FLIGHT_ENABLED = os.environ.get('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+SINGLE_FLIGHT_MAX_WAIT_SECONDS = float(os.environ.get('SINGLE_FLIGHT_MAX_WAIT_SECONDS', '5'))
+catalog_flights = SingleFlight(SINGLE_FLIGHT_MAX_WAIT_SECONDS, SINGLE_FLIGHT_ENABLED)
+estimate_flights = SingleFlight(SINGLE_FLIGHT_MAX_WAIT_SECONDS, SINGLE_FLIGHT_ENABLED)
+
+# In-process cache for catalog reads (regions, sites, guides, preset packages)
+catalog_cache = CatalogCache(
+    ttl_seconds=float(os.environ.get('CATALOG_CACHE_TTL_SECONDS', '300')),
+    max_entries=int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', '1024')),
+    enabled=os.environ.get('CATALOG_CACHE_ENABLED', 'true').lower() == 'true',
+    single_flight=catalog_flights,
+)
+
+# Rendered catalog responses shared by all workers (redis or shm), behind catalog_cache
+shared_cache = SharedCache(
+    make_backend(
+        os.environ.get('SHARED_CACHE_BACKEND', ''),
+        url=os.environ.get('SHARED_CACHE_URL'),
+        directory=os.environ.get('SHARED_CACHE_DIR'),
+    ),
+    ttl_seconds=float(os.environ.get('SHARED_CACHE_TTL_SECONDS', '300')),
+    max_bytes=int(os.environ.get('SHARED_CACHE_MAX_BYTES', str(16 * 2**20))),
+)
+
+# Catalog versions kept in MongoDB; every worker drops its caches and rebuilds
+# its indexes when a collection changes (change streams, else polling)
+catalog_sync = CatalogSync(
+    lambda: db, SYNCED_COLLECTIONS, lambda collections: catalog_changed(collections),
+    mode=os.environ.get('CATALOG_SYNC', 'auto'),
+    interval=float(os.environ.get('CATALOG_SYNC_INTERVAL_SECONDS', '2')),
+)
+
+# Pairwise site distances for route planning, kept in step with the sites catalog
+TRAVEL_MATRIX_OPTIONS = dict(
+    avg_speed_kmh=float(os.environ.get('TRAVEL_AVG_SPEED_KMH', '40')),
+    road_factor=float(os.environ.get('TRAVEL_ROAD_FACTOR', '1.3')),
+    max_precomputed=int(os.environ.get('TRAVEL_MATRIX_MAX_SITES', '4000')),
+)
+site_distances = SiteDistanceMatrix(**TRAVEL_MATRIX_OPTIONS)
+# Up to this many new, moved or deleted sites are patched into the matrix in
+# place; more than that rebuilds it in a worker thread
+GEO_INCREMENTAL_MAX_CHANGES = 64
+geo_refresh_lock = asyncio.Lock()
+
+# Nearest-site lookups: "memory" uses the in-process k-d tree, "mongo" uses $geoNear
+# on the sites.location 2dsphere index
+site_spatial_index = SiteSpatialIndex()
+NEARBY_BACKEND = os.environ.get('NEARBY_BACKEND', 'memory')
+
+# Trip pricing rules, loaded from PRICING_RULES_PATH if set, else the pricing_rules collection
+pricing_engine = PricingEngine()
+PRICING_RULES_PATH = os.environ.get('PRICING_RULES_PATH')
+
+# Wall-clock budget for the itinerary recommender search
+RECOMMENDER_TIME_BUDGET_MS = float(os.environ.get('RECOMMENDER_TIME_BUDGET_MS', '50'))
+
+# Documents fetched per MongoDB round-trip while streaming exports
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+
+# Optional write-behind batching for POST /api/feedback and POST /api/trips
+WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND_ENABLED', 'false').lower() == 'true'
+write_behind = WriteBehindQueue(
+    lambda name: db[name],
+    max_batch=int(os.environ.get('WRITE_BEHIND_MAX_BATCH', '200')),
+    max_delay=float(os.environ.get('WRITE_BEHIND_MAX_DELAY_SECONDS', '0.05')),
+    max_queue=int(os.environ.get('WRITE_BEHIND_MAX_QUEUE', '10000')),
+)
+
+# Index bootstrap runs in the background after startup; its last report is kept here
+INDEX_BOOTSTRAP_ENABLED = os.environ.get('INDEX_BOOTSTRAP_ENABLED', 'true').lower() == 'true'
+index_report = {"status": "pending"}
+
+# Full-text search over sites and regions. Full rebuilds fill a new index and
+# swap it in; a sites-only change re-indexes just the sites whose document
+# changed (indexed_sites: slug -> digest of the document last indexed).
+search_index = SearchIndex()
+indexed_sites: Dict[str, str] = {}
+SEARCH_INCREMENTAL_MAX_CHANGES = 64
+search_refresh_lock = asyncio.Lock()
 
-# Create the main app without a prefix
-app = FastAPI()
+# Optional catalog import at startup: a directory of regions/sites/guides
+# .json or .ndjson files, and/or the ENHANCED_SITES_DATA sites
+CATALOG_IMPORT_DIR = os.environ.get('CATALOG_IMPORT_DIR', '')
+CATALOG_IMPORT_ENHANCED = os.environ.get('CATALOG_IMPORT_ENHANCED', 'false').lower() == 'true'
+catalog_import_report = {"status": "disabled"}
+
+# gzip/brotli responses; cached catalog bodies keep their compressed variants
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+
+# Serve catalog GETs from pre-rendered JSON bytes instead of re-validating per request
+PREBUILT_CATALOG_RESPONSES = os.environ.get('CATALOG_PREBUILT_RESPONSES', 'true').lower() == 'true'
+
+# Cache-Control max-age per GET route; every other GET route is sent with no-cache
+# and still revalidates through its ETag
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE_SECONDS', '300'))
+ROUTE_MAX_AGE = {
+    "/api/regions": CATALOG_MAX_AGE,
+    "/api/regions/{slug}": CATALOG_MAX_AGE,
+    "/api/sites": CATALOG_MAX_AGE,
+    "/api/sites/{slug}": CATALOG_MAX_AGE,
+    "/api/sites/{slug}/content": CATALOG_MAX_AGE,
+    "/api/sites/{slug}/content/{section}": CATALOG_MAX_AGE,
+    "/api/guides": CATALOG_MAX_AGE,
+    "/api/preset-packages": CATALOG_MAX_AGE,
+    "/api/nearby": CATALOG_MAX_AGE,
+}
+
+# Token for the mutating /api/admin endpoints, sent as X-Admin-Token. Unset
+# (the default) disables them; the read-only admin GETs stay open.
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin actions are disabled (ADMIN_TOKEN is not set)")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
 
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
-
-# ==================== MODELS ====================
-
-class Region(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    name: str
-    slug: str
-    description: str
-    banner_image: str
-    short_description: str
-
-class Site(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    region_id: str
-    name: str
-    slug: str
-    type: str
-    short_description: str
-    full_description: str
-    latitude: float
-    longitude: float
-    entry_fee: int
-    avg_visit_time_mins: int
-    image: str
-
-class Guide(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    name: str
-    certification: str
-    fee_per_day: int
-    languages: List[str]
-    bio: str
-    image: str
-
-class Feedback(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    name: str
-    email: str
-    rating: Optional[int] = None
-    message: str
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class FeedbackCreate(BaseModel):
-    name: str
-    email: str
-    rating: Optional[int] = None
-    message: str
-
-class PresetPackage(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    name: str
-    description: str
-    site_ids: List[str]
-    days: int
-    estimated_cost: int
-    features: List[str]
-
-class TripEstimateRequest(BaseModel):
-    site_ids: List[str]
-    budget: int
-    days: int
-    guide_id: Optional[str] = None
-
-class CostBreakdown(BaseModel):
-    site_name: str
-    entry_fee: int
-    food_cost: int
-    transport_cost: int
-    activity_cost: int
-    total: int
-
-class TripEstimateResponse(BaseModel):
-    total_cost: int
-    total_time_mins: int
-    cost_breakdown: List[CostBreakdown]
-    route_coordinates: List[List[float]]
-    guide_cost: int
-    suggestions: List[str]
-
-class Trip(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    name: str
-    site_ids: List[str]
-    total_cost: int
-    total_time_mins: int
-    guide_id: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-
-class TripCreate(BaseModel):
-    name: str
-    site_ids: List[str]
-    total_cost: int
-    total_time_mins: int
-    guide_id: Optional[str] = None
+api_router = APIRouter(
+    prefix="/api",
+    route_class=conditional_get_route(ROUTE_MAX_AGE),
+    default_response_class=FastJSONResponse,
+)
+
+# ==================== CATALOG READS ====================
+
+async def find_catalog(collection: str, query: dict, length: Optional[int] = None):
+    # Every match unless length is given; bounded listings go through find_page
+    return await catalog_cache.get_or_load(
+        collection, "find", query,
+        lambda: db[collection].find(query, {"_id": 0}).to_list(length)
+    )
+
+async def find_catalog_one(collection: str, query: dict):
+    return await catalog_cache.get_or_load(
+        collection, "find_one", query,
+        lambda: db[collection].find_one(query, {"_id": 0})
+    )
+
+_json_adapters = {}
+
+def json_adapter(response_type):
+    adapter = _json_adapters.get(response_type)
+    if adapter is None:
+        adapter = _json_adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+async def rendered_response(request: Request, rendered: RenderedBody, headers: Optional[dict] = None):
+    # Serve a cached body, or its precompressed variant when the client accepts one
+    headers = dict(headers or {})
+    if not COMPRESSION_ENABLED:
+        headers["ETag"] = rendered.etag
+        return Response(content=rendered.body, media_type="application/json", headers=headers)
+    encoding = None
+    if len(rendered.body) >= COMPRESSION_MIN_SIZE:
+        encoding = negotiate(request.headers.get("accept-encoding"))
+    headers["Vary"] = "Accept-Encoding"
+    if encoding is None:
+        headers["ETag"] = rendered.etag
+        return Response(content=rendered.body, media_type="application/json", headers=headers)
+    headers.update({"ETag": variant_etag(rendered.etag, encoding), "Content-Encoding": encoding})
+    return Response(content=await rendered.variant(encoding), media_type="application/json", headers=headers)
+
+async def load_shared(collection: str, kind: str, query: dict, render):
+    # Another worker may already have rendered this; the key carries the
+    # collection version, read before rendering so a body is never older than it.
+    # Until this worker has read the versions there is no key to trust.
+    if not catalog_sync.synced:
+        return await render()
+    key = shared_key(collection, catalog_sync.version(collection), kind, query)
+    cached = await shared_cache.get(key)
+    if cached is not None:
+        etag, body = cached
+        return RenderedBody(body, etag)
+    rendered = await render()
+    if rendered is not None:
+        await shared_cache.set(key, rendered.etag, rendered.body)
+    return rendered
+
+async def catalog_json_response(request: Request, collection: str, query: dict, response_type, one: bool = False):
+    # Render once per cached catalog entry; returns None when a find_one misses
+    async def render():
+        if one:
+            data = await find_catalog_one(collection, query)
+        else:
+            data = await find_catalog(collection, query)
+        if data is None:
+            return None
+        adapter = json_adapter(response_type)
+        body = adapter.dump_json(adapter.validate_python(data))
+        return RenderedBody(body, make_etag(body))
+
+    kind = "json:find_one" if one else "json:find"
+    rendered = await catalog_cache.get_or_load(collection, kind, query, lambda: load_shared(collection, kind, query, render))
+    if rendered is None:
+        return None
+    return await rendered_response(request, rendered)
+
+async def find_sites_by_id():
+    async def load():
+        sites = await db.sites.find({}, {"_id": 0}).to_list(None)
+        return {site['id']: site for site in sites}
+    return await catalog_cache.get_or_load("sites", "by_id", {}, load)
+
+def build_site_distances(sites):
+    distances = SiteDistanceMatrix(**TRAVEL_MATRIX_OPTIONS)
+    distances.build(sites)
+    return distances
+
+def build_spatial_index(sites):
+    index = SiteSpatialIndex()
+    index.build(sites)
+    return index
+
+# Index rebuilds run right after catalog writes, so they read the primary
+async def refresh_site_geo_indexes():
+    # Full builds run off the event loop and are swapped in whole, so requests
+    # never see a half-built index
+    global site_distances, site_spatial_index
+    async with geo_refresh_lock:
+        sites = await db.sites.find({}, {"_id": 0, "id": 1, "latitude": 1, "longitude": 1}).to_list(None)
+        changed, removed = site_distances.changes(sites)
+        if not changed and not removed and len(site_spatial_index) == len(sites):
+            return
+        if len(changed) + len(removed) <= GEO_INCREMENTAL_MAX_CHANGES:
+            for site_id in removed:
+                site_distances.remove(site_id)
+            for site in changed:
+                site_distances.upsert(site)
+        else:
+            site_distances = await asyncio.to_thread(build_site_distances, sites)
+        site_spatial_index = await asyncio.to_thread(build_spatial_index, sites)
+
+def site_digest(site: dict) -> str:
+    return hashlib.blake2b(dump_json(site), digest_size=16).hexdigest()
+
+async def index_sites(sites: List[dict], index: SearchIndex, digests: Dict[str, str]):
+    # Add or replace the given sites in index, with their extended content
+    sections_by_slug = {}
+    async for doc in db[site_content.COLLECTION].find(
+        {"slug": {"$in": [site['slug'] for site in sites]}, "section": {"$in": list(SEARCHED_SECTIONS)}},
+        {"_id": 0, "slug": 1, "section": 1, "data": 1},
+    ):
+        sections_by_slug.setdefault(doc['slug'], {})[doc['section']] = json.loads(site_content.decode_section(doc))
+    for site in sites:
+        index.upsert(f"site:{site['slug']}", site_fields(site, sections_by_slug.get(site['slug'])), {
+            "kind": "site", "id": site['id'], "slug": site['slug'], "name": site['name'],
+            "type": site.get('type'), "short_description": site.get('short_description', ''), "image": site.get('image'),
+        })
+        digests[site['slug']] = site_digest(site)
+
+def unindex_site(slug: str):
+    search_index.remove(f"site:{slug}")
+    indexed_sites.pop(slug, None)
+
+async def rebuild_search_index():
+    # Searches keep using the current index until the new one is complete
+    global search_index, indexed_sites
+    index, digests = SearchIndex(), {}
+    for region in await db.regions.find({}, {"_id": 0}).to_list(None):
+        index.upsert(f"region:{region['slug']}", region_fields(region), {
+            "kind": "region", "id": region['id'], "slug": region['slug'], "name": region['name'],
+            "type": None, "short_description": region.get('short_description', ''), "image": region.get('banner_image'),
+        })
+    await index_sites(await db.sites.find({}, {"_id": 0}).to_list(None), index, digests)
+    search_index, indexed_sites = index, digests
+
+async def refresh_search_index(slug: Optional[str] = None):
+    # Re-index one site, or rebuild everything when slug is None
+    async with search_refresh_lock:
+        if slug is None:
+            await rebuild_search_index()
+            return
+        sites = await db.sites.find({"slug": slug}, {"_id": 0}).to_list(None)
+        if sites:
+            await index_sites(sites, search_index, indexed_sites)
+        else:
+            unindex_site(slug)
+
+async def refresh_changed_sites():
+    # After a sites-only change: re-index the sites whose document changed and
+    # drop the deleted ones, or rebuild when too many changed
+    async with search_refresh_lock:
+        sites = await db.sites.find({}, {"_id": 0}).to_list(None)
+        changed = [site for site in sites if indexed_sites.get(site['slug']) != site_digest(site)]
+        current = {site['slug'] for site in sites}
+        removed = [slug for slug in indexed_sites if slug not in current]
+        if len(changed) + len(removed) > SEARCH_INCREMENTAL_MAX_CHANGES:
+            await rebuild_search_index()
+            return
+        for slug in removed:
+            unindex_site(slug)
+        if changed:
+            await index_sites(changed, search_index, indexed_sites)
+
+async def find_nearby_mongo(latitude: float, longitude: float, k: int,
+                            radius_km: Optional[float], exclude_id: Optional[str]):
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [longitude, latitude]},
+        "distanceField": "distance_m",
+        "key": "location",
+        "spherical": True,
+    }
+    if radius_km is not None:
+        geo_near["maxDistance"] = radius_km * 1000
+    if exclude_id:
+        geo_near["query"] = {"id": {"$ne": exclude_id}}
+    pipeline = [{"$geoNear": geo_near}, {"$project": {"_id": 0}}]
+    if radius_km is None:
+        pipeline.append({"$limit": k})
+    sites = await catalog_db.sites.aggregate(pipeline).to_list(None)
+    for site in sites:
+        site['distance_km'] = site.pop('distance_m') / 1000
+    return sites
+
+async def insert_document(collection: str, doc: dict):
+    # Insert now, or hand off to the write-behind queue when it is enabled
+    if not WRITE_BEHIND_ENABLED:
+        await db[collection].insert_one(doc)
+        return
+    try:
+        write_behind.submit(collection, doc)
+    except WriteBehindQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many pending writes, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+# ==================== PAGINATION ====================
+
+def parse_fields(fields: Optional[str], model) -> Optional[List[str]]:
+    # "name,slug,image" -> projected field names; id is always kept for cursors
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [name for name in names if name != "id"]
+
+async def find_page(collection: str, query: dict, limit: int,
+                    cursor: Optional[str] = None, fields: Optional[List[str]] = None):
+    # Keyset page in _id order; returns (docs, cursor for the next page or None)
+    if cursor:
+        try:
+            query = {**query, "_id": {"$gt": ObjectId(cursor)}}
+        except InvalidId:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    projection = {name: 1 for name in fields} if fields else None
+    docs = await db[collection].find(query, projection).sort("_id", 1).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = str(docs[-1]['_id'])
+    for doc in docs:
+        doc.pop('_id', None)
+    return docs, next_cursor
+
+def page_body(docs: List[dict], model, projected: bool) -> bytes:
+    if projected:
+        return dump_json(docs)
+    adapter = json_adapter(List[model])
+    return adapter.dump_json(adapter.validate_python(docs))
+
+def page_response(docs: List[dict], next_cursor: Optional[str], model, projected: bool) -> Response:
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return Response(content=page_body(docs, model, projected), media_type="application/json", headers=headers)
 
 # ==================== ROUTES ====================
 
@@ -132,35 +457,151 @@ async def root():
 
 # Regions
 @api_router.get("/regions", response_model=List[Region])
-async def get_regions():
-    regions = await db.regions.find({}, {"_id": 0}).to_list(100)
+async def get_regions(request: Request):
+    if PREBUILT_CATALOG_RESPONSES:
+        return await catalog_json_response(request, "regions", {}, List[Region])
+    regions = await find_catalog("regions", {})
     return regions
 
 @api_router.get("/regions/{slug}", response_model=Region)
-async def get_region(slug: str):
-    region = await db.regions.find_one({"slug": slug}, {"_id": 0})
+async def get_region(request: Request, slug: str):
+    if PREBUILT_CATALOG_RESPONSES:
+        response = await catalog_json_response(request, "regions", {"slug": slug}, Region, one=True)
+        if response is None:
+            raise HTTPException(status_code=404, detail="Region not found")
+        return response
+    region = await find_catalog_one("regions", {"slug": slug})
     if not region:
         raise HTTPException(status_code=404, detail="Region not found")
     return region
 
 # Sites
 @api_router.get("/sites", response_model=List[Site])
-async def get_sites(region_id: Optional[str] = None):
+async def get_sites(
+    request: Request,
+    region_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     query = {"region_id": region_id} if region_id else {}
-    sites = await db.sites.find(query, {"_id": 0}).to_list(100)
+    if limit is not None or cursor is not None or fields is not None:
+        field_names = parse_fields(fields, Site)
+        page_key = {
+            "region_id": region_id, "limit": limit, "cursor": cursor,
+            "fields": ",".join(field_names) if field_names else None,
+        }
+        projected = field_names is not None
+
+        async def render_page():
+            docs, next_cursor = await find_page("sites", query, limit or 100, cursor, field_names)
+            body = page_body(docs, Site, projected)
+            return RenderedBody(body, make_etag(body)), next_cursor
+
+        # The rendered page is cached with its cursor, so a repeat is served
+        # without validating, serializing or hashing it again
+        rendered, next_cursor = await catalog_cache.get_or_load("sites", "page", page_key, render_page)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return await rendered_response(request, rendered, headers)
+    if PREBUILT_CATALOG_RESPONSES:
+        return await catalog_json_response(request, "sites", query, List[Site])
+    sites = await find_catalog("sites", query)
     return sites
 
 @api_router.get("/sites/{slug}", response_model=Site)
-async def get_site(slug: str):
-    site = await db.sites.find_one({"slug": slug}, {"_id": 0})
+async def get_site(request: Request, slug: str):
+    if PREBUILT_CATALOG_RESPONSES:
+        response = await catalog_json_response(request, "sites", {"slug": slug}, Site, one=True)
+        if response is None:
+            raise HTTPException(status_code=404, detail="Site not found")
+        return response
+    site = await find_catalog_one("sites", {"slug": slug})
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
     return site
 
+# Extended site content, one section at a time
+@api_router.get("/sites/{slug}/content", response_model=SiteContentIndex)
+async def get_site_content_index(slug: str):
+    async def load():
+        return await db[site_content.COLLECTION].find(
+            {"slug": slug}, {"_id": 0, "section": 1, "size": 1}
+        ).sort("order", 1).to_list(None)
+    sections = await catalog_cache.get_or_load(site_content.COLLECTION, "index", {"slug": slug}, load)
+    if not sections:
+        raise HTTPException(status_code=404, detail="Site content not found")
+    return {"slug": slug, "sections": sections}
+
+@api_router.get("/sites/{slug}/content/{section}")
+async def get_site_content_section(request: Request, slug: str, section: str):
+    # Cached decompressed, so hot sections are served straight from memory
+    async def load():
+        doc = await db[site_content.COLLECTION].find_one({"slug": slug, "section": section}, {"_id": 0, "data": 1})
+        if doc is None:
+            return None
+        body = site_content.decode_section(doc)
+        return RenderedBody(body, make_etag(body))
+
+    query = {"slug": slug, "section": section}
+    rendered = await catalog_cache.get_or_load(
+        site_content.COLLECTION, "section", query, lambda: load_shared(site_content.COLLECTION, "section", query, load)
+    )
+    if rendered is None:
+        raise HTTPException(status_code=404, detail="Site content section not found")
+    return await rendered_response(request, rendered)
+
+# Full-text search
+@api_router.get("/search", response_model=List[SearchHit])
+async def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    kind: Optional[Literal["site", "region"]] = None,
+):
+    return [{**meta, "score": round(score, 4)} for meta, score in search_index.search(q, limit, kind)]
+
+# Nearby sites
+@api_router.get("/nearby", response_model=List[NearbySite])
+async def get_nearby_sites(
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    slug: Optional[str] = None,
+    k: int = Query(5, ge=1, le=100),
+    radius_km: Optional[float] = Query(None, gt=0),
+):
+    # k nearest sites, or every site within radius_km, of a point or of another site
+    exclude_id = None
+    if slug:
+        site = await find_catalog_one("sites", {"slug": slug})
+        if not site:
+            raise HTTPException(status_code=404, detail="Site not found")
+        latitude, longitude, exclude_id = site['latitude'], site['longitude'], site['id']
+    elif latitude is None or longitude is None:
+        raise HTTPException(status_code=400, detail="Provide latitude and longitude, or a site slug")
+
+    if NEARBY_BACKEND == "mongo":
+        return await find_nearby_mongo(latitude, longitude, k, radius_km, exclude_id)
+
+    exclude = {exclude_id} if exclude_id else ()
+    if radius_km is not None:
+        matches = site_spatial_index.within(latitude, longitude, radius_km, exclude=exclude)
+    else:
+        matches = site_spatial_index.nearest(latitude, longitude, k=k, exclude=exclude)
+    if not matches:
+        return []
+    found = await catalog_db.sites.find({"id": {"$in": [site_id for site_id, _ in matches]}}, {"_id": 0}).to_list(None)
+    sites_by_id = {site['id']: site for site in found}
+    return [
+        {**sites_by_id[site_id], "distance_km": round(distance_km, 2)}
+        for site_id, distance_km in matches
+        if site_id in sites_by_id
+    ]
+
 # Guides
 @api_router.get("/guides", response_model=List[Guide])
-async def get_guides():
-    guides = await db.guides.find({}, {"_id": 0}).to_list(100)
+async def get_guides(request: Request):
+    if PREBUILT_CATALOG_RESPONSES:
+        return await catalog_json_response(request, "guides", {}, List[Guide])
+    guides = await find_catalog("guides", {})
     return guides
 
 # Feedback
@@ -170,70 +611,99 @@ async def create_feedback(input: FeedbackCreate):
     feedback_obj = Feedback(**feedback_dict)
     
     doc = feedback_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    
-    await db.feedbacks.insert_one(doc)
+    await insert_document("feedbacks", doc)
     return feedback_obj
 
 @api_router.get("/feedbacks", response_model=List[Feedback])
-async def get_feedbacks():
-    feedbacks = await db.feedbacks.find({}, {"_id": 0}).to_list(1000)
-    for feedback in feedbacks:
-        if isinstance(feedback['created_at'], str):
-            feedback['created_at'] = datetime.fromisoformat(feedback['created_at'])
-    return feedbacks
+async def get_feedbacks(
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    field_names = parse_fields(fields, Feedback)
+    feedbacks, next_cursor = await find_page("feedbacks", {}, limit, cursor, field_names)
+    return page_response(feedbacks, next_cursor, Feedback, projected=field_names is not None)
 
 # Trip estimation
-@api_router.post("/trip/estimate", response_model=TripEstimateResponse)
-async def estimate_trip(request: TripEstimateRequest):
-    # Fetch selected sites
-    sites = await db.sites.find({"id": {"$in": request.site_ids}}, {"_id": 0}).to_list(100)
-    
+# Site fields read by routing, pricing and scheduling
+PRICED_SITE_FIELDS = {
+    "_id": 0, "id": 1, "slug": 1, "name": 1, "region_id": 1, "type": 1,
+    "latitude": 1, "longitude": 1, "entry_fee": 1, "avg_visit_time_mins": 1,
+}
+
+async def find_priced_sites(site_ids) -> List[dict]:
+    # Just the requested sites, not the whole catalog
+    if not site_ids:
+        return []
+    return await catalog_db.sites.find({"id": {"$in": list(site_ids)}}, PRICED_SITE_FIELDS).to_list(None)
+
+async def find_site_names(site_ids) -> Dict[str, str]:
+    site_ids = [site_id for site_id in site_ids if site_id]
+    if not site_ids:
+        return {}
+    docs = await catalog_db.sites.find({"id": {"$in": site_ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(None)
+    return {doc['id']: doc['name'] for doc in docs}
+
+def nearest_other_site(sites: List[dict]) -> Optional[str]:
+    # For a single-site trip, the closest other site to suggest adding
+    if len(sites) != 1:
+        return None
+    nearest = site_spatial_index.nearest(sites[0]['latitude'], sites[0]['longitude'], k=1, exclude={sites[0]['id']})
+    return nearest[0][0] if nearest else None
+
+def compute_trip_estimate(request: TripEstimateRequest, sites: List[dict],
+                          guide: Optional[dict], nearby_name: Optional[str] = None) -> TripEstimateResponse:
     if not sites:
         raise HTTPException(status_code=404, detail="Sites not found")
     
-    # Calculate costs
-    total_cost = 0
-    total_time_mins = 0
-    cost_breakdown = []
-    route_coordinates = []
+    # Order sites into a short visiting route
+    start_point = None
+    if request.start_latitude is not None and request.start_longitude is not None:
+        start_point = (request.start_latitude, request.start_longitude)
+    with metrics.span("trip_estimate.route"):
+        dist = site_distances.submatrix([site['id'] for site in sites], start_point)
+        order, legs_km, total_distance_km = plan_route(
+            [(site['latitude'], site['longitude']) for site in sites], start_point,
+            dist=dist.tolist() if dist is not None else None
+        )
+    sites = [sites[i] for i in order]
     
-    for site in sites:
-        entry_fee = site.get('entry_fee', 0)
-        food_cost = 300  # ₹300 per meal
-        transport_cost = 200  # ₹200 per site
-        activity_cost = 150  # ₹150 for activities
-        
-        site_total = entry_fee + food_cost + transport_cost + activity_cost
-        total_cost += site_total
-        total_time_mins += site.get('avg_visit_time_mins', 120)
-        
-        cost_breakdown.append(CostBreakdown(
-            site_name=site['name'],
-            entry_fee=entry_fee,
-            food_cost=food_cost,
-            transport_cost=transport_cost,
-            activity_cost=activity_cost,
-            total=site_total
-        ))
-        
-        route_coordinates.append([site['latitude'], site['longitude']])
+    # Calculate costs against one pricing snapshot; legs_into[i] is the distance to reach site i
+    pricing = pricing_engine.current
+    legs_into = legs_km if start_point else [0.0] + legs_km
+    month = request.travel_date.month if request.travel_date else None
+    with metrics.span("trip_estimate.pricing"):
+        quote = pricing.quote(sites, legs_into, group_size=request.group_size, month=month)
+    
+    total_cost = sum(quote['total'])
+    total_time_mins = sum(site.get('avg_visit_time_mins', 120) for site in sites)
+    with metrics.span("trip_estimate.cost_breakdown"):
+        cost_breakdown = [
+            CostBreakdown(
+                site_name=site['name'],
+                entry_fee=quote['entry_fee'][i],
+                food_cost=quote['food_cost'][i],
+                transport_cost=quote['transport_cost'][i],
+                activity_cost=quote['activity_cost'][i],
+                total=quote['total'][i]
+            )
+            for i, site in enumerate(sites)
+        ]
+    route_coordinates = [[site['latitude'], site['longitude']] for site in sites]
     
     # Add guide cost if selected
     guide_cost = 0
-    if request.guide_id:
-        guide = await db.guides.find_one({"id": request.guide_id}, {"_id": 0})
-        if guide:
-            guide_cost = guide['fee_per_day'] * request.days
-            total_cost += guide_cost
+    if guide:
+        guide_cost = guide['fee_per_day'] * request.days
+        total_cost += guide_cost
     
     # Generate suggestions
     suggestions = []
-    if len(request.site_ids) == 1:
-        suggestions.append("Consider adding Bateshwar Temples nearby for a complete heritage experience!")
+    if len(sites) == 1 and nearby_name:
+        suggestions.append(f"Consider adding {nearby_name} nearby for a complete heritage experience!")
     if request.budget < total_cost:
         suggestions.append(f"Your budget is ₹{request.budget}, but estimated cost is ₹{total_cost}. Consider reducing days or sites.")
-    if request.days < (total_time_mins / 480):  # 8 hours per day
+    if request.days < (total_time_mins / DAY_MINUTES):  # 8 hours per day
         suggestions.append("Consider adding more days for a relaxed itinerary.")
     
     return TripEstimateResponse(
@@ -242,7 +712,219 @@ async def estimate_trip(request: TripEstimateRequest):
         cost_breakdown=cost_breakdown,
         route_coordinates=route_coordinates,
         guide_cost=guide_cost,
-        suggestions=suggestions
+        suggestions=suggestions,
+        route_site_ids=[site['id'] for site in sites],
+        route_legs_km=[round(leg, 2) for leg in legs_km],
+        total_distance_km=round(total_distance_km, 2)
+    )
+
+@api_router.post("/trip/estimate", response_model=TripEstimateResponse)
+async def estimate_trip(request: TripEstimateRequest):
+    # Identical concurrent requests (preset packages on a spike) share one estimate
+    return await estimate_flights.do(request.model_dump_json(), lambda: estimate_one(request))
+
+async def estimate_one(request: TripEstimateRequest):
+    # Fetch selected sites
+    with metrics.span("trip_estimate.find_sites"):
+        sites = await find_priced_sites(request.site_ids)
+    
+    if not sites:
+        raise HTTPException(status_code=404, detail="Sites not found")
+    
+    guide = None
+    if request.guide_id:
+        with metrics.span("trip_estimate.find_guide"):
+            guide = await catalog_db.guides.find_one({"id": request.guide_id}, {"_id": 0})
+    
+    nearby_id = nearest_other_site(sites)
+    nearby_name = (await find_site_names([nearby_id])).get(nearby_id)
+    with metrics.span("trip_estimate.compute"):
+        return compute_trip_estimate(request, sites, guide, nearby_name)
+
+@api_router.post("/trip/estimate/batch", response_model=TripEstimateBatchResponse)
+async def estimate_trips_batch(batch: TripEstimateBatchRequest):
+    # Validate items one by one so a bad item is reported instead of failing the batch
+    requests = []
+    results = []
+    for item in batch.requests:
+        try:
+            requests.append(TripEstimateRequest.model_validate(item))
+            results.append(None)
+        except ValidationError as e:
+            requests.append(None)
+            results.append(TripEstimateBatchItem(status_code=422, error=str(e)))
+    
+    # One query per collection for the union of every item's ids
+    site_ids = {site_id for r in requests if r for site_id in r.site_ids}
+    guide_ids = {r.guide_id for r in requests if r and r.guide_id}
+    sites = await find_priced_sites(site_ids)
+    guides = await catalog_db.guides.find({"id": {"$in": list(guide_ids)}}, {"_id": 0}).to_list(None) if guide_ids else []
+    sites_found = {site['id']: site for site in sites}
+    guides_found = {guide['id']: guide for guide in guides}
+    item_sites = [
+        [sites_found[site_id] for site_id in dict.fromkeys(request.site_ids) if site_id in sites_found] if request else None
+        for request in requests
+    ]
+    nearby_ids = [nearest_other_site(found) if found else None for found in item_sites]
+    names = await find_site_names(set(nearby_ids))
+    
+    for i, request in enumerate(requests):
+        if request is None:
+            continue
+        try:
+            estimate = compute_trip_estimate(
+                request, item_sites[i], guides_found.get(request.guide_id), names.get(nearby_ids[i])
+            )
+            results[i] = TripEstimateBatchItem(status_code=200, estimate=estimate)
+        except HTTPException as e:
+            results[i] = TripEstimateBatchItem(status_code=e.status_code, error=e.detail)
+    
+    return TripEstimateBatchResponse(results=results)
+
+# Itinerary recommendation
+@api_router.post("/trip/recommend", response_model=TripRecommendation)
+async def recommend_trip(request: TripRecommendRequest):
+    # Best-scoring set of sites that fits the budget and days
+    sites_by_id = await find_sites_by_id()
+    sites = [site for site in sites_by_id.values()
+             if not request.region_id or site['region_id'] == request.region_id]
+    missing = [site_id for site_id in request.must_include if site_id not in sites_by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Sites not found: {', '.join(missing)}")
+    for site_id in request.must_include:
+        if sites_by_id[site_id] not in sites:
+            sites.append(sites_by_id[site_id])
+    
+    guide = None
+    if request.guide_id:
+        guide = await find_catalog_one("guides", {"id": request.guide_id})
+        if not guide:
+            raise HTTPException(status_code=404, detail="Guide not found")
+    guide_cost = guide['fee_per_day'] * request.days if guide else 0
+    
+    # Search on standalone per-site costs; route-dependent transport is checked below
+    month = request.travel_date.month if request.travel_date else None
+    quote = pricing_engine.current.quote(sites, [0.0] * len(sites), group_size=request.group_size, month=month)
+    candidates = [
+        Candidate(key=site['id'], cost=quote['total'][i], minutes=site.get('avg_visit_time_mins', 120),
+                  type=site.get('type', ''), rating=site.get('rating', 0.0))
+        for i, site in enumerate(sites)
+    ]
+    position = {site['id']: i for i, site in enumerate(sites)}
+    result = search_itinerary(
+        candidates, request.budget - guide_cost, request.days * DAY_MINUTES,
+        must_include=[position[site_id] for site_id in request.must_include],
+        time_budget_ms=RECOMMENDER_TIME_BUDGET_MS
+    )
+    if result is None:
+        raise HTTPException(status_code=422, detail="Must-include sites do not fit the budget and days")
+    
+    # Price and schedule the real route; drop the least valuable optional site
+    # until it fits the budget and the days (the search only counted visit time)
+    has_start = request.start_latitude is not None and request.start_longitude is not None
+    chosen = list(result.chosen)
+    must = set(position[site_id] for site_id in request.must_include)
+    estimate_request = TripEstimateRequest(
+        site_ids=[], budget=request.budget, days=request.days, guide_id=request.guide_id,
+        start_latitude=request.start_latitude, start_longitude=request.start_longitude,
+        group_size=request.group_size, travel_date=request.travel_date
+    )
+    while chosen:
+        estimate_request.site_ids = [sites[i]['id'] for i in chosen]
+        chosen_sites = [sites[i] for i in chosen]
+        nearby = sites_by_id.get(nearest_other_site(chosen_sites))
+        estimate = compute_trip_estimate(estimate_request, chosen_sites, guide, nearby and nearby['name'])
+        if estimate.total_cost > request.budget:
+            least_valuable = lambda i: candidates[i].value / max(candidates[i].cost, 1)
+        elif not route_fits_days(estimate, chosen_sites, has_start, request.days):
+            least_valuable = lambda i: candidates[i].value / max(candidates[i].minutes, 1)
+        else:
+            break
+        optional = [i for i in chosen if i not in must]
+        if not optional:
+            break
+        chosen.remove(min(optional, key=least_valuable))
+    if not chosen:
+        raise HTTPException(status_code=422, detail="No sites fit the budget and days")
+    
+    return TripRecommendation(
+        site_ids=estimate.route_site_ids,
+        score=round(result.score, 2),
+        optimal=result.optimal and chosen == result.chosen,
+        explored_nodes=result.nodes,
+        estimate=estimate
+    )
+
+# Day-by-day schedule
+def route_stops(sites: List[dict], legs_into: List[float]) -> List[Stop]:
+    # Sites in route order; legs_into[i] is the km driven to reach sites[i]
+    return [
+        Stop(key=site['id'], visit_mins=site.get('avg_visit_time_mins', 120),
+             travel_mins=legs_into[i] * site_distances.minutes_per_km)
+        for i, site in enumerate(sites)
+    ]
+
+def route_fits_days(estimate: TripEstimateResponse, sites: List[dict], has_start: bool, days: int) -> bool:
+    by_id = {site['id']: site for site in sites}
+    legs_into = estimate.route_legs_km if has_start else [0.0] + estimate.route_legs_km
+    stops = route_stops([by_id[site_id] for site_id in estimate.route_site_ids], legs_into)
+    return pack_days(stops, DAY_MINUTES, days)[1]
+
+def format_clock(minutes: float) -> str:
+    minutes = int(round(minutes))
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+@api_router.post("/trip/schedule", response_model=TripScheduleResponse)
+async def schedule_trip(request: TripScheduleRequest):
+    found = {site['id']: site for site in await find_priced_sites(set(request.site_ids))}
+    sites = [found[site_id] for site_id in dict.fromkeys(request.site_ids) if site_id in found]
+    if not sites:
+        raise HTTPException(status_code=404, detail="Sites not found")
+    
+    # Shortest visiting order first, then cut it into days
+    start_point = None
+    if request.start_latitude is not None and request.start_longitude is not None:
+        start_point = (request.start_latitude, request.start_longitude)
+    dist = site_distances.submatrix([site['id'] for site in sites], start_point)
+    order, legs_km, _ = plan_route(
+        [(site['latitude'], site['longitude']) for site in sites], start_point,
+        dist=dist.tolist() if dist is not None else None
+    )
+    sites = [sites[i] for i in order]
+    legs_into = legs_km if start_point else [0.0] + legs_km
+    stops = route_stops(sites, legs_into)
+    bounds, fits = pack_days(stops, request.day_minutes, request.days)
+    
+    hours, mins = map(int, request.day_start.split(":"))
+    days = []
+    for day, (first, last) in enumerate(bounds, start=1):
+        clock = hours * 60 + mins
+        day_stops = []
+        for i in range(first, last):
+            clock += stops[i].travel_mins
+            arrive = clock
+            clock += stops[i].visit_mins
+            day_stops.append(ScheduleStop(
+                site_id=sites[i]['id'],
+                site_name=sites[i]['name'],
+                arrive=format_clock(arrive),
+                depart=format_clock(clock),
+                travel_mins=round(stops[i].travel_mins),
+                travel_km=round(legs_into[i], 2),
+                visit_mins=stops[i].visit_mins
+            ))
+        travel_mins = round(sum(s.travel_mins for s in stops[first:last]))
+        visit_mins = sum(s.visit_mins for s in stops[first:last])
+        days.append(DaySchedule(
+            day=day, stops=day_stops, travel_mins=travel_mins,
+            visit_mins=visit_mins, total_mins=travel_mins + visit_mins
+        ))
+    
+    return TripScheduleResponse(
+        days=days,
+        fits=fits,
+        total_travel_mins=round(sum(s.travel_mins for s in stops)),
+        total_travel_km=round(sum(legs_into), 2)
     )
 
 # Save trip
@@ -252,27 +934,184 @@ async def create_trip(input: TripCreate):
     trip_obj = Trip(**trip_dict)
     
     doc = trip_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    
-    await db.trips.insert_one(doc)
+    await insert_document("trips", doc)
     return trip_obj
 
+@api_router.get("/trips", response_model=List[Trip])
+async def get_trips(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    field_names = parse_fields(fields, Trip)
+    trips, next_cursor = await find_page("trips", {}, limit, cursor, field_names)
+    return page_response(trips, next_cursor, Trip, projected=field_names is not None)
+
+# Streaming exports
+async def stream_export(collection: str, columns: List[str], fmt: str):
+    # Iterate the cursor batch by batch so memory stays flat regardless of size
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+    cursor = db[collection].find({}, {"_id": 0}).sort("_id", 1).batch_size(EXPORT_BATCH_SIZE)
+    async for doc in cursor:
+        if fmt == "ndjson":
+            yield dump_json(doc) + b"\n"
+            continue
+        buffer.seek(0)
+        buffer.truncate()
+        row = []
+        for column in columns:
+            value = doc.get(column)
+            if isinstance(value, (list, dict)):
+                value = dump_json(value).decode("utf-8")
+            elif isinstance(value, datetime):
+                value = format_datetime(value)
+            elif isinstance(value, date):
+                value = value.isoformat()
+            row.append("" if value is None else value)
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+EXPORT_MODELS = {"feedbacks": Feedback, "trips": Trip}
+
+@api_router.get("/export/{collection}")
+async def export_collection(collection: Literal["feedbacks", "trips"],
+                            format: Literal["ndjson", "csv"] = "ndjson"):
+    columns = list(EXPORT_MODELS[collection].model_fields)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_export(collection, columns, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{collection}.{format}"'}
+    )
+
 # Preset packages
 @api_router.get("/preset-packages", response_model=List[PresetPackage])
-async def get_preset_packages():
-    packages = await db.preset_packages.find({}, {"_id": 0}).to_list(100)
+async def get_preset_packages(request: Request):
+    if PREBUILT_CATALOG_RESPONSES:
+        return await catalog_json_response(request, "preset_packages", {}, List[PresetPackage])
+    packages = await find_catalog("preset_packages", {})
     return packages
 
-# Include the router in the main app
-app.include_router(api_router)
+# Catalog cache admin
+@api_router.get("/admin/cache")
+async def get_cache_stats():
+    return {**catalog_cache.stats(), "shared": shared_cache.stats(), "sync": catalog_sync.stats()}
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+async def catalog_changed(collections):
+    # Drop what this worker derived from the changed catalog collections
+    for collection in collections:
+        catalog_cache.invalidate(collection)
+    if "sites" in collections:
+        await refresh_site_geo_indexes()
+    if collections & {"regions", site_content.COLLECTION}:
+        await refresh_search_index()
+    elif "sites" in collections:
+        await refresh_changed_sites()
+    if collections & {"regions", "pricing_rules"}:
+        try:
+            await load_pricing_rules()
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+            logger.warning(f"Keeping the current pricing rules; reload failed: {e}")
+
+@api_router.get("/admin/single-flight")
+async def get_single_flight_stats():
+    return {"catalog": catalog_flights.stats(), "estimate": estimate_flights.stats()}
+
+@api_router.post("/admin/cache/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_cache(collection: Optional[str] = None):
+    # Bumping the version makes the other workers follow within the sync interval
+    collections = {collection} if collection else set(SYNCED_COLLECTIONS)
+    await catalog_sync.bump(collections)
+    await catalog_changed(collections)
+    return await get_cache_stats()
+
+@api_router.post("/admin/search/reindex", dependencies=[Depends(require_admin)])
+async def reindex_search(slug: Optional[str] = None):
+    # With slug, re-index just that site after it changed
+    await refresh_search_index(slug)
+    return search_index.stats()
+
+@api_router.get("/admin/write-behind")
+async def get_write_behind_stats():
+    return {"enabled": WRITE_BEHIND_ENABLED, **write_behind.stats()}
+
+@api_router.get("/admin/indexes")
+async def get_index_report():
+    return index_report
+
+@api_router.get("/admin/mongo")
+async def get_mongo_stats():
+    options = {k: v for k, v in MONGO_CLIENT_OPTIONS.items() if k != 'tz_aware'}
+    return {
+        "options": options,
+        "catalog_read_preference": CATALOG_READ_PREFERENCE,
+        **mongo_pool_metrics.stats(),
+    }
+
+@api_router.get("/admin/catalog-import")
+async def get_catalog_import_report():
+    return catalog_import_report
+
+# Pricing rules admin
+async def load_pricing_rules():
+    if PRICING_RULES_PATH:
+        path = Path(PRICING_RULES_PATH)
+        rules = json.loads(await asyncio.to_thread(path.read_text))
+        source = str(path)
+    else:
+        doc = await db.pricing_rules.find_one({"id": "active"}, {"_id": 0})
+        rules = doc.get('rules') if doc else None
+        source = "pricing_rules" if doc else "defaults"
+    # Straight from the primary: this also runs right after seeding and imports
+    regions = await db.regions.find({}, {"_id": 0}).to_list(None)
+    pricing_engine.load(rules, regions, source)
+
+@api_router.get("/admin/pricing")
+async def get_pricing_rules():
+    return {"source": pricing_engine.source, "rules": pricing_engine.current.rules}
+
+@api_router.post("/admin/pricing/reload", dependencies=[Depends(require_admin)])
+async def reload_pricing_rules():
+    try:
+        await load_pricing_rules()
+    except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid pricing rules: {e}")
+    # The other workers reload within the sync interval
+    await catalog_sync.bump({"pricing_rules"})
+    return {"source": pricing_engine.source, "rules": pricing_engine.current.rules}
+
+def collect_app_stats():
+    cache = catalog_cache.stats()
+    queue = write_behind.stats()
+    return [
+        ("catalog_cache_hits_total", "counter", "Catalog cache hits", [({}, cache['hits'])]),
+        ("catalog_cache_misses_total", "counter", "Catalog cache misses", [({}, cache['misses'])]),
+        ("catalog_cache_entries", "gauge", "Catalog cache entries", [({}, cache['entries'])]),
+        ("shared_cache_hits_total", "counter", "Shared (cross-worker) cache hits", [({}, shared_cache.hits)]),
+        ("shared_cache_misses_total", "counter", "Shared (cross-worker) cache misses", [({}, shared_cache.misses)]),
+        ("shared_cache_errors_total", "counter", "Shared cache backend errors", [({}, shared_cache.errors)]),
+        ("single_flight_coalesced_total", "counter", "Requests served by another request's in-flight call",
+         [({"scope": "catalog"}, catalog_flights.coalesced), ({"scope": "estimate"}, estimate_flights.coalesced)]),
+        ("single_flight_timeouts_total", "counter", "Coalesced waits that gave up and ran their own call",
+         [({"scope": "catalog"}, catalog_flights.timeouts), ({"scope": "estimate"}, estimate_flights.timeouts)]),
+        ("catalog_sync_changes_total", "counter", "Catalog changes applied from other workers or direct writes",
+         [({}, catalog_sync.changes)]),
+        ("write_behind_queued", "gauge", "Documents waiting in the write-behind queue", [({}, queue['queued'])]),
+        ("write_behind_failed_total", "counter", "Write-behind documents that failed to insert", [({}, queue['failed'])]),
+        ("app_ready", "gauge", "1 once startup warm-up has finished", [({}, int(startup_report['status'] == "ready"))]),
+        ("app_startup_phase_seconds", "gauge", "Duration of each startup phase",
+         [({"phase": name}, seconds) for name, seconds in startup_report['phases'].items()]),
+    ]
+
+metrics.add_collector(collect_app_stats)
+metrics.add_collector(mongo_pool_metrics.collect)
+
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # Configure logging
 logging.basicConfig(
@@ -281,13 +1120,74 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
+async def bootstrap_indexes():
+    try:
+        report = await ensure_indexes(db)
+        report["collscans"] = await find_collscans(db)
+        report["status"] = "done"
+        logger.info(f"Index bootstrap: {len(report['created'])} ensured, {len(report['failed'])} failed, "
+                    f"{len(report['collscans'])} hot queries still scanning")
+    except Exception as e:
+        report = {"status": "error", "error": str(e)}
+        logger.exception("Index bootstrap failed")
+    index_report.clear()
+    index_report.update(report)
+
+_background_tasks = set()
+
+async def connect_mongo():
+    # One client (and pool) per worker process. A client assigned before startup
+    # (tests, benchmarks) is used as is, for catalog reads too.
+    global client, db, catalog_db
+    if client is not None:
+        catalog_db = db
+        return
+    listeners = [MongoCommandMetrics(metrics), mongo_pool_metrics] if METRICS_ENABLED else []
+    client = create_client(os.environ['MONGO_URL'], MONGO_CLIENT_OPTIONS, listeners)
+    db = client[os.environ['DB_NAME']]
+    catalog_db = catalog_database(db, CATALOG_READ_PREFERENCE, CATALOG_MAX_STALENESS_SECONDS)
+
+async def start_index_bootstrap():
+    if INDEX_BOOTSTRAP_ENABLED:
+        task = asyncio.create_task(bootstrap_indexes())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    else:
+        index_report["status"] = "disabled"
+
+async def start_catalog_sync():
+    if catalog_sync.mode == "off" and shared_cache.enabled:
+        # Shared keys carry catalog versions, which nothing advances without sync
+        logger.warning("SHARED_CACHE_BACKEND needs CATALOG_SYNC; shared cache disabled")
+        await shared_cache.close()
+        shared_cache.backend = None
+    await catalog_sync.start()
+
+async def start_write_behind():
+    if WRITE_BEHIND_ENABLED:
+        await write_behind.start()
+
 async def shutdown_db_client():
-    client.close()
+    # Flush queued writes before the client goes away
+    global client
+    await catalog_sync.stop()
+    await write_behind.stop()
+    await shared_cache.close()
+    if client is not None:
+        client.close()
+        client = None
 
-# Seed data on startup
-@app.on_event("startup")
+# Seed data on startup (or with `python seed.py`)
 async def seed_database():
+    # One worker seeds at a time; the others wait, then find the data in place
+    while not await acquire_lease(db, "seed", SEED_LEASE_SECONDS):
+        await asyncio.sleep(0.5)
+    try:
+        await seed_catalog()
+    finally:
+        await release_lease(db, "seed")
+
+async def seed_catalog():
     # Check if data already exists
     existing_regions = await db.regions.count_documents({})
     if existing_regions > 0:
@@ -397,6 +1297,8 @@ async def seed_database():
             "image": "https://images.unsplash.com/photo-1663997943673-9c679560f5a5?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NTY2Njl8MHwxfHNlYXJjaHwyfHxhbmNpZW50JTIwSW5kaWFuJTIwdGVtcGxlfGVufDB8fHx8MTc2MzU4ODA4OHww&ixlib=rb-4.1.0&q=85"
         }
     ]
+    for site in sites:
+        site["location"] = {"type": "Point", "coordinates": [site["longitude"], site["latitude"]]}
     await db.sites.insert_many(sites)
     
     # Seed Guides
@@ -462,5 +1364,171 @@ async def seed_database():
         }
     ]
     await db.preset_packages.insert_many(packages)
+    catalog_cache.invalidate()
+    await catalog_sync.bump(["regions", "sites", "guides", "preset_packages"])
     
     logger.info("Database seeded successfully!")
+
+async def import_catalog_files():
+    # Runs after seeding so placeholders resolve against the seeded regions
+    from catalog_import import catalog_dir_sources, changed_collections, import_catalog, rejected_documents
+    sources = catalog_dir_sources(CATALOG_IMPORT_DIR) if CATALOG_IMPORT_DIR else {}
+    if CATALOG_IMPORT_ENHANCED and "sites" not in sources:
+        from enhanced_seed_data import ENHANCED_SITES_DATA
+        sources["sites"] = ENHANCED_SITES_DATA
+    if not sources:
+        return
+    report = await import_catalog(db, sources)
+    catalog_import_report.clear()
+    catalog_import_report.update(status="done", **report)
+    catalog_cache.invalidate()
+    await catalog_sync.bump(changed_collections(report))
+    logger.info(f"Catalog import finished: {report}")
+    if rejected_documents(report):
+        logger.warning(f"Catalog import skipped {rejected_documents(report)} invalid documents")
+
+async def build_site_geo_indexes():
+    if NEARBY_BACKEND == "mongo":
+        # Backfill GeoJSON points on sites seeded before the location field existed
+        await db.sites.update_many(
+            {"location": {"$exists": False}},
+            [{"$set": {"location": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}]
+        )
+        await db.sites.create_index([("location", "2dsphere")])
+    await refresh_site_geo_indexes()
+    logger.info(f"Distance matrix and spatial index built for {len(site_distances)} sites")
+
+async def build_search_index():
+    await refresh_search_index()
+    logger.info(f"Search index built: {search_index.stats()}")
+
+async def load_pricing():
+    await load_pricing_rules()
+    logger.info(f"Pricing rules loaded from {pricing_engine.source}")
+
+async def migrate_string_timestamps():
+    # Older rows stored created_at as an ISO string; convert them to BSON dates.
+    # Unparseable values are left as they are and counted, they never stop startup.
+    report = {}
+    for collection in ("feedbacks", "trips"):
+        counts = report[collection] = {"converted": 0, "skipped": 0}
+        operations = []
+        async for doc in db[collection].find({"created_at": {"$type": "string"}}, {"_id": 1, "created_at": 1}):
+            try:
+                created_at = datetime.fromisoformat(doc['created_at'])
+            except ValueError:
+                counts["skipped"] += 1
+                logger.warning(f"Leaving unparseable created_at {doc['created_at']!r} on {collection} {doc['_id']}")
+                continue
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            operations.append(UpdateOne({"_id": doc['_id']}, {"$set": {"created_at": created_at}}))
+            counts["converted"] += 1
+            if len(operations) >= EXPORT_BATCH_SIZE:
+                await db[collection].bulk_write(operations, ordered=False)
+                operations = []
+        if operations:
+            await db[collection].bulk_write(operations, ordered=False)
+    startup_report["timestamp_migration"] = report
+    if any(counts["skipped"] for counts in report.values()):
+        logger.warning(f"Timestamp migration skipped rows: {report}")
+
+# Startup. connect_mongo, write-behind and the index bootstrap run before the
+# first request; seeding, the catalog import and the in-memory index builds
+# run in a background warm-up that /ready reports on.
+WARMUP_IN_BACKGROUND = os.environ.get('WARMUP_IN_BACKGROUND', 'true').lower() == 'true'
+SEED_ON_STARTUP = os.environ.get('SEED_ON_STARTUP', 'true').lower() == 'true'
+SEED_LEASE_SECONDS = float(os.environ.get('SEED_LEASE_SECONDS', '300'))
+READY_PING_TIMEOUT_SECONDS = float(os.environ.get('READY_PING_TIMEOUT_SECONDS', '1'))
+IMPORT_SECONDS = round(time.perf_counter() - _IMPORT_STARTED, 3)
+startup_report = {"status": "starting", "import_seconds": IMPORT_SECONDS, "phases": {}}
+warmup_task = None
+
+async def run_phase(phase):
+    start = time.perf_counter()
+    await phase()
+    startup_report["phases"][phase.__name__] = round(time.perf_counter() - start, 4)
+
+async def warm_up(started):
+    phases = [seed_database] if SEED_ON_STARTUP else []
+    phases += [import_catalog_files, build_site_geo_indexes, build_search_index, load_pricing,
+               migrate_string_timestamps]
+    try:
+        for phase in phases:
+            await run_phase(phase)
+    except Exception as e:
+        startup_report.update(status="error", error=str(e))
+        logger.exception("Startup warm-up failed")
+        return
+    # Catalog reads served while seeding (or while waiting on another worker's
+    # seed lease) may have cached a partial catalog; without catalog sync
+    # nothing else would drop it before the TTL
+    catalog_cache.invalidate()
+    startup_report.update(status="ready", ready_seconds=round(time.perf_counter() - started, 3))
+    logger.info(f"Ready in {startup_report['ready_seconds']}s (import {IMPORT_SECONDS}s)")
+
+@asynccontextmanager
+async def lifespan(app):
+    global warmup_task
+    started = time.perf_counter()
+    startup_report.clear()
+    startup_report.update(status="starting", import_seconds=IMPORT_SECONDS, phases={})
+    for phase in (connect_mongo, start_catalog_sync, start_write_behind, start_index_bootstrap):
+        await run_phase(phase)
+    startup_report.update(status="warming", live_seconds=round(time.perf_counter() - started, 3))
+    if WARMUP_IN_BACKGROUND:
+        warmup_task = asyncio.create_task(warm_up(started))
+    else:
+        await warm_up(started)
+    try:
+        yield
+    finally:
+        if warmup_task is not None:
+            warmup_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await warmup_task
+            warmup_task = None
+        await shutdown_db_client()
+
+async def get_live():
+    return {"status": "live"}
+
+async def get_ready():
+    # 503 until the warm-up has finished and the catalog versions have been
+    # read, or while MongoDB does not answer
+    if startup_report["status"] != "ready":
+        return FastJSONResponse(startup_report, status_code=503)
+    if catalog_sync.mode != "off" and not catalog_sync.synced:
+        return FastJSONResponse({**startup_report, "status": "syncing"}, status_code=503)
+    try:
+        await asyncio.wait_for(db.command("ping"), READY_PING_TIMEOUT_SECONDS)
+    except Exception as e:
+        return FastJSONResponse({**startup_report, "status": "unavailable", "error": str(e)}, status_code=503)
+    return FastJSONResponse(startup_report)
+
+def create_app():
+    # The ASGI app around this module's shared state (caches, indexes, client)
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(api_router)
+    app.add_api_route("/metrics", get_metrics, include_in_schema=False)
+    app.add_api_route("/live", get_live, include_in_schema=False)
+    app.add_api_route("/ready", get_ready, include_in_schema=False)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor"],
+    )
+
+    if COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware, min_size=COMPRESSION_MIN_SIZE)
+
+    # Outermost, so request latency includes compression
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+    return app
+
+app = create_app()
@@ -0,0 +1,185 @@
+# Cross-worker tier for rendered catalog responses
+#
+# Every uvicorn worker keeps its own CatalogCache; this tier sits behind it so a
+# response rendered by one worker is reused by the others instead of each one
+# querying and serializing it again. Keys carry the collection's version (see
+# catalog_sync), so a catalog change makes the old entries unreachable and they
+# simply expire. Values are the response body and its ETag.
+#
+# Backends: "redis" (any Redis-compatible server; needs the `redis` package) or
+# "shm", one file per entry in a tmpfs directory such as /dev/shm, for workers
+# on the same host.
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional; the redis backend is unavailable without it
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "hh:catalog:"
+
+
+def make_key(collection, version, kind, query):
+    digest = hashlib.sha1(json.dumps(query, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{KEY_PREFIX}{collection}:{version}:{kind}:{digest}"
+
+
+def encode_value(etag, body):
+    return etag.encode() + b"\n" + body
+
+
+def decode_value(value):
+    etag, _, body = value.partition(b"\n")
+    return etag.decode(), body
+
+
+class RedisBackend:
+    name = "redis"
+
+    def __init__(self, url):
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, key):
+        return await self._redis.get(key)
+
+    async def set(self, key, value, ttl_seconds):
+        await self._redis.set(key, value, ex=max(1, int(ttl_seconds)))
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class SharedMemoryBackend:
+    # Files in a tmpfs directory: reads and writes are memory copies, and
+    # os.replace makes each write atomic for concurrent readers
+    name = "shm"
+    SWEEP_EVERY = 256
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._writes = 0
+
+    def _path(self, key):
+        return self.directory / hashlib.sha1(key.encode()).hexdigest()
+
+    async def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                expires_at = float(f.readline())
+                if expires_at < time.time():
+                    return None
+                return f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    async def set(self, key, value, ttl_seconds):
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(b"%f\n" % (time.time() + ttl_seconds))
+            f.write(value)
+        os.replace(tmp, path)
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            self.sweep()
+
+    def sweep(self):
+        # Drop expired entries (and versions nobody reads any more)
+        now = time.time()
+        for path in self.directory.iterdir():
+            try:
+                with open(path, "rb") as f:
+                    if float(f.readline()) < now:
+                        path.unlink()
+            except (OSError, ValueError):
+                continue
+
+    async def close(self):
+        pass
+
+
+def make_backend(kind, url=None, directory=None):
+    # None (shared tier disabled) when kind is empty or its requirements are missing
+    if not kind:
+        return None
+    if kind == "redis":
+        if aioredis is None:
+            logger.warning("SHARED_CACHE_BACKEND=redis needs the 'redis' package; shared cache disabled")
+            return None
+        return RedisBackend(url or "redis://localhost:6379/0")
+    if kind == "shm":
+        return SharedMemoryBackend(directory or "/dev/shm/hidden-heritage-cache")
+    logger.warning(f"Unknown SHARED_CACHE_BACKEND {kind!r}; shared cache disabled")
+    return None
+
+
+class SharedCache:
+    def __init__(self, backend=None, ttl_seconds=300.0, max_bytes=16 * 2**20):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.too_large = 0
+        self.errors = 0
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    async def get(self, key):
+        # (etag, body) or None. Backend errors count as misses: the shared tier
+        # must never fail a request.
+        if self.backend is None:
+            return None
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared cache read failed: {e}")
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return decode_value(value)
+
+    async def set(self, key, etag, body):
+        if self.backend is None:
+            return
+        if len(body) > self.max_bytes:
+            self.too_large += 1
+            return
+        try:
+            await self.backend.set(key, encode_value(etag, body), self.ttl_seconds)
+            self.stores += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared cache write failed: {e}")
+
+    async def close(self):
+        if self.backend is not None:
+            await self.backend.close()
+
+    def stats(self):
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "ttl_seconds": self.ttl_seconds,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "too_large": self.too_large,
+            "errors": self.errors,
+        }
@@ -0,0 +1,72 @@
+# Request coalescing ("single-flight") for identical concurrent loads
+#
+# The first caller for a key runs the load; callers arriving while it is in
+# flight wait for its result, or its exception, instead of issuing the same
+# query again. Waiting is bounded: after max_wait seconds a waiter stops
+# waiting on the shared call and runs the load itself, as it does when the
+# caller running the load is cancelled.
+
+import asyncio
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self, max_wait=5.0, enabled=True):
+        self.max_wait = max_wait
+        self.enabled = enabled
+        # key -> future of the call in flight
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    async def do(self, key, load):
+        if not self.enabled:
+            return await load()
+        call = self._calls.get(key)
+        if call is not None:
+            self.coalesced += 1
+            done, _ = await asyncio.wait({call}, timeout=self.max_wait)
+            if not done:
+                self.timeouts += 1
+                return await load()
+            try:
+                return call.result()
+            except _LeaderCancelled:
+                return await load()
+
+        call = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            call.set_exception(_LeaderCancelled())
+            raise
+        except Exception as e:
+            self.errors += 1
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(value)
+            return value
+        finally:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            if call.done() and not call.cancelled():
+                # Mark the exception retrieved when nobody was waiting for it
+                call.exception()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "max_wait_seconds": self.max_wait,
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
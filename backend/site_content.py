@@ -0,0 +1,44 @@
+# Extended site content, stored apart from site documents
+#
+# Each top-level section of a site's extended_content (history, folklore,
+# gallery, ...) is one document in site_content, keyed on (slug, section), with
+# the section's JSON zlib-compressed. Catalog queries on sites never read it.
+
+import json
+import zlib
+
+from bson import Binary
+from pymongo import DeleteMany, UpdateOne
+
+COLLECTION = "site_content"
+COMPRESSION_LEVEL = 6
+
+
+def encode_section(data):
+    # Compact JSON bytes for a section, and their compressed form
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return raw, zlib.compress(raw, COMPRESSION_LEVEL)
+
+
+def decode_section(doc):
+    # JSON bytes of a stored section, ready to send as a response body
+    return zlib.decompress(bytes(doc["data"]))
+
+
+def section_operations(slug, extended_content):
+    # One upsert per section, plus dropping sections the site no longer has;
+    # re-importing unchanged content is a no-op
+    operations = [DeleteMany({"slug": slug, "section": {"$nin": list(extended_content)}})]
+    for order, (section, data) in enumerate(extended_content.items()):
+        raw, compressed = encode_section(data)
+        operations.append(UpdateOne(
+            {"slug": slug, "section": section},
+            {"$set": {
+                "order": order,
+                "data": Binary(compressed),
+                "size": len(raw),
+                "stored_size": len(compressed),
+            }},
+            upsert=True,
+        ))
+    return operations
@@ -0,0 +1,134 @@
+# In-memory k-d tree over site coordinates for nearest / within-radius queries
+#
+# Points are stored as unit vectors on the sphere, so straight-line (chord)
+# distance orders exactly like great-circle distance and the tree can use plain
+# Euclidean pruning.
+
+import heapq
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Ranges at or below this size are scanned directly
+LEAF_SIZE = 8
+
+
+def _unit_vector(latitude, longitude):
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def _chord_to_km(chord_sq):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_sq) / 2))
+
+
+def _km_to_chord_sq(km):
+    if km >= math.pi * EARTH_RADIUS_KM:
+        return 4.0
+    return (2 * math.sin(km / (2 * EARTH_RADIUS_KM))) ** 2
+
+
+class SiteSpatialIndex:
+    def __init__(self):
+        self.ids = []
+        self._points = []
+        self._axes = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def build(self, sites):
+        # Rebuild from site dicts carrying id, latitude and longitude
+        n = len(sites)
+        lat = np.radians([site['latitude'] for site in sites])
+        lon = np.radians([site['longitude'] for site in sites])
+        xyz = np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat))).reshape(n, 3)
+        order = np.arange(n)
+        axes = np.zeros(n, dtype=np.int8)
+
+        # Median split on the widest axis, iteratively to avoid deep recursion
+        stack = [(0, n)]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+            block = xyz[order[lo:hi]]
+            axis = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+            mid = (lo + hi) // 2
+            part = np.argpartition(block[:, axis], mid - lo)
+            order[lo:hi] = order[lo:hi][part]
+            axes[mid] = axis
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+        self.ids = [sites[i]['id'] for i in order]
+        self._points = [tuple(p) for p in xyz[order].tolist()]
+        self._axes = axes.tolist()
+
+    def nearest(self, latitude, longitude, k=5, max_km=None, exclude=()):
+        # Up to k (site_id, km) pairs ordered by distance
+        if k <= 0 or not self.ids:
+            return []
+        target = _unit_vector(latitude, longitude)
+        limit = _km_to_chord_sq(max_km) if max_km is not None else math.inf
+        heap = []  # max-heap of (-chord_sq, index)
+        points, axes, ids = self._points, self._axes, self.ids
+
+        def visit(lo, hi):
+            worst = -heap[0][0] if len(heap) == k else limit
+            if hi - lo <= LEAF_SIZE:
+                for i in range(lo, hi):
+                    p = points[i]
+                    d = (p[0] - target[0]) ** 2 + (p[1] - target[1]) ** 2 + (p[2] - target[2]) ** 2
+                    if d <= worst and ids[i] not in exclude:
+                        if len(heap) < k:
+                            heapq.heappush(heap, (-d, i))
+                        else:
+                            heapq.heapreplace(heap, (-d, i))
+                        worst = -heap[0][0] if len(heap) == k else limit
+                return
+            mid = (lo + hi) // 2
+            axis = axes[mid]
+            diff = target[axis] - points[mid][axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            visit(*near)
+            visit(mid, mid + 1)
+            worst = -heap[0][0] if len(heap) == k else limit
+            if diff * diff <= worst:
+                visit(*far)
+
+        visit(0, len(ids))
+        return [(ids[i], _chord_to_km(-neg)) for neg, i in sorted(heap, reverse=True)]
+
+    def within(self, latitude, longitude, radius_km, exclude=()):
+        # All (site_id, km) pairs within radius_km, ordered by distance
+        if not self.ids:
+            return []
+        target = _unit_vector(latitude, longitude)
+        limit = _km_to_chord_sq(radius_km)
+        points, axes, ids = self._points, self._axes, self.ids
+        found = []
+        stack = [(0, len(ids))]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                candidates = range(lo, hi)
+            else:
+                mid = (lo + hi) // 2
+                axis = axes[mid]
+                diff = target[axis] - points[mid][axis]
+                candidates = (mid,)
+                if diff < 0 or diff * diff <= limit:
+                    stack.append((lo, mid))
+                if diff >= 0 or diff * diff <= limit:
+                    stack.append((mid + 1, hi))
+            for i in candidates:
+                p = points[i]
+                d = (p[0] - target[0]) ** 2 + (p[1] - target[1]) ** 2 + (p[2] - target[2]) ** 2
+                if d <= limit and ids[i] not in exclude:
+                    found.append((d, i))
+        found.sort()
+        return [(ids[i], _chord_to_km(d)) for d, i in found]
@@ -0,0 +1,120 @@
+# Write-behind batching for insert-only collections (feedbacks, trips)
+#
+# Request handlers enqueue documents and return; a single background task
+# drains the queue into insert_many batches, flushing when a batch is full or
+# the oldest queued document has waited max_delay seconds.
+
+import asyncio
+import logging
+from collections import deque
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueueFull(Exception):
+    pass
+
+
+class WriteBehindQueue:
+    def __init__(self, get_collection, max_batch=200, max_delay=0.05, max_queue=10000):
+        # get_collection(name) returns the Motor collection to write to
+        self.get_collection = get_collection
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self._buffer = deque()
+        self._pending = None
+        self._batch_ready = None
+        self._closing = False
+        self._task = None
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        self._pending = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, collection, doc):
+        # Raises WriteBehindQueueFull when the queue is at capacity
+        if len(self._buffer) >= self.max_queue:
+            self.rejected += 1
+            raise WriteBehindQueueFull()
+        self._buffer.append((collection, doc))
+        self.accepted += 1
+        self._pending.set()
+        if len(self._buffer) >= self.max_batch:
+            self._batch_ready.set()
+
+    async def stop(self):
+        # Flush everything still queued, then let the background task exit
+        if self._task is None:
+            return
+        self._closing = True
+        self._pending.set()
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        # Documents stay in the buffer until taken for a flush, so nothing is
+        # lost while waiting
+        while True:
+            await self._pending.wait()
+            if not self._buffer:
+                if self._closing:
+                    return
+                self._pending.clear()
+                continue
+            if not self._closing:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            batch = [self._buffer.popleft() for _ in range(min(self.max_batch, len(self._buffer)))]
+            if len(self._buffer) < self.max_batch and not self._closing:
+                self._batch_ready.clear()
+            await self._flush(batch)
+
+    async def _flush(self, items):
+        by_collection = {}
+        for collection, doc in items:
+            by_collection.setdefault(collection, []).append(doc)
+        for collection, docs in by_collection.items():
+            self.batches += 1
+            try:
+                await self.get_collection(collection).insert_many(docs, ordered=False)
+                self.flushed += len(docs)
+            except BulkWriteError as e:
+                inserted = e.details.get('nInserted', 0)
+                self.flushed += inserted
+                self.failed += len(docs) - inserted
+                logger.error(f"Write-behind batch to {collection} partially failed: {e.details.get('writeErrors', [])[:3]}")
+            except Exception:
+                # Keep the flusher alive; the batch is counted as failed
+                self.failed += len(docs)
+                logger.exception(f"Write-behind batch of {len(docs)} to {collection} failed")
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queued": len(self._buffer),
+            "max_queue": self.max_queue,
+            "max_batch": self.max_batch,
+            "max_delay_seconds": self.max_delay,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
@@ -0,0 +1,94 @@
+# Deterministic synthetic catalogs (regions, sites, guides, preset packages)
+
+import random
+import uuid
+
+SITE_TYPES = ["Temple", "Fort", "Palace", "Stepwell", "Natural Wonder", "Archaeological Site", "Monastery"]
+
+WORDS = (
+    "ancient ravine temple fort palace stepwell sandstone carved shikhara river valley dynasty "
+    "pratihara rajput mughal gurjara chambal yamuna gwalior dholpur morena bhind heritage pilgrimage "
+    "folklore legend restoration excavation monument sanctuary gharial sunset sunrise courtyard "
+    "pavilion lattice jali frescoes inscription citadel rampart bastion gateway tank reservoir "
+    "sculpture deity shiva vishnu devi monsoon plateau gorge wildlife crocodile dolphin village "
+    "market craft artisan weaving pottery festival fair lamp bell shrine cave hermitage garden"
+).split()
+
+IMAGE = "https://images.unsplash.com/photo-1583043550616-ac6e0a1b9574?crop=entropy&cs=srgb&fm=jpg&q=85"
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_catalog(n_sites, seed=0):
+    # Sites carry region placeholders ("REGION_3_REGION_ID") that the catalog
+    # importer resolves to the matching region's id
+    rng = random.Random(seed)
+    n_regions = max(1, n_sites // 1000)
+    regions = [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"Region {r}",
+            "slug": f"region-{r}",
+            "description": _text(rng, 60),
+            "banner_image": IMAGE,
+            "short_description": _text(rng, 10),
+        }
+        for r in range(n_regions)
+    ]
+    sites = []
+    for i in range(n_sites):
+        latitude = round(rng.uniform(8.0, 34.0), 5)
+        longitude = round(rng.uniform(69.0, 92.0), 5)
+        sites.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "region_id": f"REGION_{i % n_regions}_REGION_ID",
+            "name": f"{rng.choice(WORDS).capitalize()} {rng.choice(SITE_TYPES)} {i}",
+            "slug": f"site-{i}",
+            "type": rng.choice(SITE_TYPES),
+            "short_description": _text(rng, 15),
+            "full_description": _text(rng, 120),
+            "latitude": latitude,
+            "longitude": longitude,
+            "entry_fee": rng.choice([0, 25, 50, 100, 250]),
+            "avg_visit_time_mins": rng.choice([60, 90, 120, 180, 240]),
+            "image": IMAGE,
+        })
+    guides = [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"Guide {g}",
+            "certification": "Government Certified Tourist Guide",
+            "fee_per_day": rng.choice([1500, 2000, 2500]),
+            "languages": ["Hindi", "English"],
+            "bio": _text(rng, 30),
+            "image": IMAGE,
+        }
+        for g in range(10)
+    ]
+    preset_packages = [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"Package {p}",
+            "description": _text(rng, 20),
+            "site_ids": [site["id"] for site in rng.sample(sites, min(len(sites), 4))],
+            "days": 2 + p,
+            "estimated_cost": 5000 * (p + 1),
+            "features": ["Guide", "Transport"],
+        }
+        for p in range(3)
+    ]
+    return {"regions": regions, "sites": sites, "guides": guides, "preset_packages": preset_packages}
+
+
+def resolved_sites(catalog):
+    # Site documents as stored, with region placeholders replaced and GeoJSON added;
+    # for bulk-loading large catalogs without going through upserts
+    region_ids = {f"REGION_{r}_REGION_ID": region["id"] for r, region in enumerate(catalog["regions"])}
+    for site in catalog["sites"]:
+        yield {
+            **site,
+            "region_id": region_ids[site["region_id"]],
+            "location": {"type": "Point", "coordinates": [site["longitude"], site["latitude"]]},
+        }
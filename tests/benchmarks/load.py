@@ -0,0 +1,54 @@
+# Concurrent load driver: a fixed number of requests spread over N client tasks
+
+import asyncio
+import random
+import time
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = [value * 1000.0 for value in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+    }
+
+
+async def drive(client, make_request, requests, concurrency, seed=0):
+    # make_request(rng) -> (method, url, json body or None). Every task draws the
+    # next request number until `requests` have been sent.
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker(worker_id):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + worker_id)
+        for _ in counter:
+            method, url, body = make_request(rng)
+            start = time.perf_counter()
+            # Raw bytes, so client-side decompression is not counted as server latency
+            async with client.stream(method, url, json=body) as response:
+                async for _ in response.aiter_raw():
+                    pass
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
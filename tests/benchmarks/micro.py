@@ -0,0 +1,105 @@
+# Micro-benchmarks for estimation, serialization, search and seeding hot paths
+
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+# Slowest acceptable best-of time for one search, at any catalog size; run.py
+# reports the queries that exceed it and exits non-zero
+SEARCH_BUDGET_US = 10_000
+SEARCH_QUERIES = {"two terms": "ancient temple", "prefix": "sto", "typo": "ancent tempel"}
+
+
+def measure(fn, number=None, repeat=5, target_seconds=0.05):
+    # Best-of-repeat time per call; number is calibrated to ~target_seconds per repeat
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            if time.perf_counter() - start >= target_seconds or number >= 1_000_000:
+                break
+            number *= 2
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - start) / number)
+    return {"best_us": round(min(runs) * 1e6, 3), "mean_us": round(sum(runs) / len(runs) * 1e6, 3), "calls": number}
+
+
+async def measure_async(coro_fn, repeat=3):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_fn()
+        runs.append(time.perf_counter() - start)
+    return {"best_us": round(min(runs) * 1e6, 3), "mean_us": round(sum(runs) / len(runs) * 1e6, 3), "calls": 1}
+
+
+def feedback_docs(n):
+    now = datetime.now(timezone.utc)
+    return [
+        {"id": str(uuid.uuid4()), "name": f"Visitor {i}", "email": f"v{i}@example.com",
+         "rating": i % 5 + 1, "message": "Loved the ravines and the temples. " * 3, "created_at": now}
+        for i in range(n)
+    ]
+
+
+async def run_micro(server, sites, seed=0):
+    # sites: documents currently loaded in server.db, as returned by the API
+    from fast_json import dumps as fast_dumps
+    from routing import plan_route
+
+    rng = random.Random(seed)
+    results = {}
+
+    sample = rng.sample(sites, min(5, len(sites)))
+    request = server.TripEstimateRequest(site_ids=[s["id"] for s in sample], budget=20000, days=3)
+    results["estimate.compute_trip_estimate[k=%d]" % len(sample)] = measure(
+        lambda: server.compute_trip_estimate(request, sample, None))
+
+    for k in (8, 20):
+        points = [(s["latitude"], s["longitude"]) for s in rng.sample(sites, min(k, len(sites)))]
+        results[f"route.plan_route[n={len(points)}]"] = measure(lambda: plan_route(points))
+
+    page = sites[:100]
+    adapter = server.json_adapter(List[server.Site])
+    results[f"serialize.sites_pydantic[{len(page)}]"] = measure(lambda: adapter.dump_json(adapter.validate_python(page)))
+    results[f"serialize.sites_fast_json[{len(page)}]"] = measure(lambda: fast_dumps(page))
+    results[f"serialize.sites_stdlib_json[{len(page)}]"] = measure(lambda: json.dumps(page))
+
+    # Feedback rows as read back from MongoDB (native datetimes) vs legacy ISO strings
+    rows = feedback_docs(1000)
+    legacy = [{**row, "created_at": row["created_at"].isoformat()} for row in rows]
+    results["serialize.feedbacks_page[1000]"] = measure(lambda: server.page_response(rows, None, server.Feedback, False))
+    results["serialize.feedbacks_page_legacy_iso[1000]"] = measure(
+        lambda: server.page_response(legacy, None, server.Feedback, False))
+    results["serialize.feedbacks_projected[1000]"] = measure(lambda: server.page_response(rows, None, server.Feedback, True))
+
+    for name, query in SEARCH_QUERIES.items():
+        results[f"search.query[{name}]"] = {
+            **measure(lambda: server.search_index.search(query)), "budget_us": SEARCH_BUDGET_US,
+        }
+
+    return results
+
+
+async def run_seed_micro(make_db, catalog):
+    # Catalog import of a synthetic catalog into a fresh database, then a
+    # re-import of the same catalog (the incremental, all-unchanged path)
+    from catalog_import import import_catalog
+
+    results = {}
+    db = await make_db()
+    sources = {key: catalog[key] for key in ("regions", "sites", "guides")}
+    start = time.perf_counter()
+    await import_catalog(db, sources)
+    results[f"seed.import_catalog[{len(catalog['sites'])}]"] = {"best_us": round((time.perf_counter() - start) * 1e6, 3), "calls": 1}
+    results[f"seed.reimport_unchanged[{len(catalog['sites'])}]"] = await measure_async(lambda: import_catalog(db, sources), repeat=1)
+    return results
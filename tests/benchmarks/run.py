@@ -0,0 +1,275 @@
+# Backend load tests and micro-benchmarks
+#
+# Runs the FastAPI app in-process against mongomock-motor (default) or a local
+# mongod, for synthetic catalogs of several sizes, and writes the results as JSON
+# so runs can be compared:
+#
+#   python -m tests.benchmarks.run --sizes 6,1000,10000 --output before.json
+#   python -m tests.benchmarks.run --sizes 6,1000,10000 --compare before.json
+#   python -m tests.benchmarks.run --sizes 100000 --mongo-url mongodb://localhost:27017
+#   python -m tests.benchmarks.run --base-url http://localhost:8001   # a running server
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_DIR = REPO_ROOT / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+# server.py reads these at startup; each run injects its own client first
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "hidden_heritage_bench")
+
+import httpx  # noqa: E402
+
+from tests.benchmarks.catalog import resolved_sites, synthetic_catalog  # noqa: E402
+from tests.benchmarks.load import drive  # noqa: E402
+from tests.benchmarks.micro import run_micro, run_seed_micro  # noqa: E402
+
+
+def rss_mb():
+    # Current resident set size; peak RSS where /proc is unavailable
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cold_import_seconds():
+    # Fresh interpreter importing server.py, as a new worker would
+    code = "import time; t = time.perf_counter(); import server; print(time.perf_counter() - t)"
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    try:
+        out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        return round(float(out.split()[-1]), 3)
+    except (OSError, subprocess.CalledProcessError, ValueError, IndexError):
+        return None
+
+
+def scenarios(sites, guide_ids):
+    # name -> make_request(rng); ids are drawn from the loaded catalog
+    site_ids = [site["id"] for site in sites]
+    slugs = [site["slug"] for site in sites]
+
+    def estimate(rng):
+        body = {"site_ids": rng.sample(site_ids, min(len(site_ids), rng.randint(3, 6))),
+                "budget": 15000, "days": 3}
+        if guide_ids and rng.random() < 0.5:
+            body["guide_id"] = rng.choice(guide_ids)
+        return "POST", "/api/trip/estimate", body
+
+    def feedback(rng):
+        return "POST", "/api/feedback", {"name": "Bench", "email": "bench@example.com",
+                                         "message": "Wonderful heritage walk", "rating": rng.randint(1, 5)}
+
+    return {
+        "get_sites": lambda rng: ("GET", "/api/sites", None),
+        "get_sites_page": lambda rng: ("GET", "/api/sites?limit=100", None),
+        "get_site": lambda rng: ("GET", f"/api/sites/{rng.choice(slugs)}", None),
+        "estimate_trip": estimate,
+        # Everyone asking for the same itinerary, as with a preset package
+        "estimate_same": lambda rng: ("POST", "/api/trip/estimate",
+                                      {"site_ids": site_ids[:6], "budget": 15000, "days": 3}),
+        "create_feedback": feedback,
+        "get_feedbacks": lambda rng: ("GET", "/api/feedbacks?limit=100", None),
+        "search": lambda rng: ("GET", "/api/search?q=ancient+tem", None),
+    }
+
+
+async def run_load(client, args, seed):
+    sites = (await client.get("/api/sites")).json()
+    guide_ids = [guide["id"] for guide in (await client.get("/api/guides")).json()]
+    results = {}
+    for name, make_request in scenarios(sites, guide_ids).items():
+        if args.only and name not in args.only:
+            continue
+        # Warm caches so the run measures steady state
+        await drive(client, make_request, min(20, args.requests), 1, seed)
+        results[name] = await drive(client, make_request, args.requests, args.concurrency, seed)
+        print(f"  {name:16s} {results[name]['rps']:9.1f} rps  p50 {results[name]['p50_ms']:8.2f} ms"
+              f"  p95 {results[name]['p95_ms']:8.2f} ms  p99 {results[name]['p99_ms']:8.2f} ms"
+              f"  errors {results[name]['errors']}")
+    return results, sites
+
+
+def make_database_factory(args):
+    # Returns an async factory for a fresh, empty database handle and its client
+    counter = iter(range(1_000_000))
+
+    async def make():
+        name = f"{os.environ['DB_NAME']}_{next(counter)}"
+        if args.mongo_url:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            client = AsyncIOMotorClient(args.mongo_url, tz_aware=True)
+            await client.drop_database(name)
+        else:
+            from mongomock_motor import AsyncMongoMockClient
+            client = AsyncMongoMockClient()
+        return client, client[name]
+
+    return make
+
+
+async def load_catalog(db, catalog):
+    # Bulk insert; the importer's upsert path is measured separately in the micro runs
+    await db.regions.insert_many([dict(region) for region in catalog["regions"]])
+    sites = list(resolved_sites(catalog))
+    for start in range(0, len(sites), 5000):
+        await db.sites.insert_many(sites[start:start + 5000])
+    await db.guides.insert_many([dict(guide) for guide in catalog["guides"]])
+    await db.preset_packages.insert_many([dict(package) for package in catalog["preset_packages"]])
+
+
+async def run_size(server, size, args, make_database):
+    print(f"catalog size {size}")
+    client, db = await make_database()
+    # The default catalog (6 sites) comes from the app's own startup seeding
+    if size != 6:
+        catalog = synthetic_catalog(size, seed=args.seed)
+        start = time.perf_counter()
+        await load_catalog(db, catalog)
+        print(f"  loaded in {time.perf_counter() - start:.1f}s")
+    server.client, server.db = client, db
+    server.catalog_cache.invalidate()
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    async with server.app.router.lifespan_context(server.app):
+        live_seconds = time.perf_counter() - start
+        if server.warmup_task is not None:
+            await server.warmup_task
+        startup_seconds = time.perf_counter() - start
+        print(f"  live after {live_seconds:.2f}s, ready after {startup_seconds:.2f}s")
+        transport = httpx.ASGITransport(app=server.app)
+        headers = {"Accept-Encoding": args.accept_encoding}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as http:
+            load, sites = await run_load(http, args, args.seed)
+        micro = {} if args.skip_micro else await run_micro(server, sites, args.seed)
+    return {
+        "live_seconds": round(live_seconds, 3),
+        "startup_seconds": round(startup_seconds, 3),
+        "startup_phases": dict(server.startup_report["phases"]),
+        "rss_mb": {"before_startup": rss_before, "after": rss_mb()},
+        "load": load,
+        "micro": micro,
+    }
+
+
+def over_budget(result):
+    # (size, micro-benchmark) pairs slower than the budget they carry
+    return [
+        (size, name)
+        for size, sized in result["sizes"].items()
+        for name, stats in sized.get("micro", {}).items()
+        if "budget_us" in stats and stats["best_us"] > stats["budget_us"]
+    ]
+
+
+def compare(old, new):
+    # Print rps / p95 / micro time changes between two result files
+    def change(before, after):
+        return f"{(after - before) / before * 100:+6.1f}%" if before else "   n/a"
+
+    if old.get("cold_import_seconds") and new.get("cold_import_seconds"):
+        print(f"cold import {change(old['cold_import_seconds'], new['cold_import_seconds'])}")
+    for size, result in new["sizes"].items():
+        previous = old.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        print(f"catalog size {size} vs {old['meta'].get('commit')}")
+        if "startup_seconds" in previous and "startup_seconds" in result:
+            print(f"  {'startup':16s} {change(previous['startup_seconds'], result['startup_seconds'])}")
+        for name, stats in result["load"].items():
+            if name in previous["load"]:
+                before = previous["load"][name]
+                print(f"  {name:16s} rps {change(before['rps'], stats['rps'])}"
+                      f"  p95 {change(before['p95_ms'], stats['p95_ms'])}")
+        for name, stats in result["micro"].items():
+            if name in previous.get("micro", {}):
+                print(f"  {name:44s} {change(previous['micro'][name]['best_us'], stats['best_us'])}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Hidden Heritage backend")
+    parser.add_argument("--sizes", default="6,1000,10000", help="Comma-separated synthetic catalog sizes")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client tasks")
+    parser.add_argument("--only", type=lambda v: set(v.split(",")), help="Comma-separated scenario names")
+    parser.add_argument("--accept-encoding", default="gzip", help="Accept-Encoding sent with every request")
+    parser.add_argument("--mongo-url", help="Use this mongod instead of mongomock-motor")
+    parser.add_argument("--base-url", help="Drive an already running server instead of the in-process app")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--seed-size", type=int, default=1000, help="Catalog size for the seeding micro-benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Result file (default benchmarks/results-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    result = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.base_url or args.mongo_url or "mongomock-motor",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "accept_encoding": args.accept_encoding,
+        },
+        "sizes": {},
+    }
+
+    if args.base_url:
+        headers = {"Accept-Encoding": args.accept_encoding}
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0, headers=headers) as http:
+            load, _ = await run_load(http, args, args.seed)
+        result["sizes"]["remote"] = {"load": load, "micro": {}}
+    else:
+        result["cold_import_seconds"] = cold_import_seconds()
+        print(f"cold import of server.py {result['cold_import_seconds']}s")
+        import server
+        make_database = make_database_factory(args)
+        for size in (int(value) for value in args.sizes.split(",")):
+            result["sizes"][str(size)] = await run_size(server, size, args, make_database)
+        if not args.skip_micro:
+            async def make_db():
+                return (await make_database())[1]
+            result["seeding"] = await run_seed_micro(make_db, synthetic_catalog(args.seed_size, seed=args.seed))
+            for name, stats in result["seeding"].items():
+                print(f"  {name:44s} {stats['best_us'] / 1000:10.1f} ms")
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).parent / "results" / f"results-{datetime.now():%Y%m%d-%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"results written to {output}")
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), result)
+    slow = over_budget(result)
+    for size, name in slow:
+        stats = result["sizes"][size]["micro"][name]
+        print(f"over budget at catalog size {size}: {name} {stats['best_us']:.0f} us > {stats['budget_us']} us")
+    if slow:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "hidden_heritage_test")
+
+
+@pytest.fixture
+def api(monkeypatch):
+    # The app on a fresh in-memory database, seeded and warmed up before the first request
+    import mongomock_motor
+    from fastapi.testclient import TestClient
+
+    import server
+
+    async def to_list(cursor, length=None):
+        # Motor stops after length documents; the stand-in ignores length
+        docs = []
+        async for doc in cursor:
+            if length is not None and len(docs) >= length:
+                break
+            docs.append(doc)
+        return docs
+
+    monkeypatch.setattr(mongomock_motor.AsyncCursor, "to_list", to_list)
+    mock = mongomock_motor.AsyncMongoMockClient()
+    monkeypatch.setattr(server, "client", mock)
+    monkeypatch.setattr(server, "db", mock["hidden_heritage_test"])
+    monkeypatch.setattr(server, "WARMUP_IN_BACKGROUND", False)
+    monkeypatch.setattr(server, "INDEX_BOOTSTRAP_ENABLED", False)
+    monkeypatch.setattr(server.catalog_sync, "mode", "off")
+    server.catalog_cache.invalidate()
+    with TestClient(server.app) as client:
+        yield client
@@ -0,0 +1,41 @@
+import server
+
+
+def test_admin_posts_disabled_without_token(api, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", "")
+    assert api.post("/api/admin/cache/invalidate").status_code == 403
+    assert api.post("/api/admin/search/reindex", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_admin_posts_need_matching_token(api, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", "s3cret")
+    assert api.post("/api/admin/cache/invalidate").status_code == 401
+    assert api.post("/api/admin/cache/invalidate", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert api.post("/api/admin/cache/invalidate", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+    assert api.post("/api/admin/search/reindex", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+
+def test_admin_reads_stay_open(api):
+    assert api.get("/api/admin/cache").status_code == 200
+
+
+def test_pricing_reload_needs_token(api, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", "s3cret")
+    assert api.post("/api/admin/pricing/reload").status_code == 401
+    assert api.post("/api/admin/pricing/reload", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+
+def test_region_and_pricing_changes_recompile_pricing(api, monkeypatch):
+    import asyncio
+
+    loads = []
+
+    async def load_pricing_rules():
+        loads.append(True)
+
+    monkeypatch.setattr(server, "load_pricing_rules", load_pricing_rules)
+    asyncio.run(server.catalog_changed({"guides"}))
+    assert loads == []
+    asyncio.run(server.catalog_changed({"regions"}))
+    asyncio.run(server.catalog_changed({"pricing_rules"}))
+    assert len(loads) == 2
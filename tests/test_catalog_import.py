@@ -0,0 +1,78 @@
+import asyncio
+import json
+import sys
+
+import mongomock_motor
+import pytest
+
+import catalog_import
+from catalog_import import changed_collections, import_catalog, rejected_documents
+
+REGION = {"name": "Chambal", "slug": "chambal", "description": "d", "banner_image": "b", "short_description": "s"}
+SITE = {
+    "region_id": "CHAMBAL_REGION_ID", "name": "Bateshwar", "slug": "bateshwar", "type": "temple",
+    "short_description": "Temple complex", "latitude": 26.4, "longitude": 78.2,
+    "entry_fee": 0, "avg_visit_time_mins": 90, "image": "i",
+}
+
+
+def run_import(sources):
+    db = mongomock_motor.AsyncMongoMockClient()["import_test"]
+
+    async def run():
+        report = await import_catalog(db, sources)
+        sites = await db.sites.find({}, {"_id": 0}).to_list(None)
+        return report, sites
+
+    return asyncio.run(run())
+
+
+def test_invalid_documents_are_skipped_and_counted():
+    bad_type = {**SITE, "slug": "bad-fee", "entry_fee": "free"}
+    missing = {key: value for key, value in SITE.items() if key != "latitude"} | {"slug": "no-lat"}
+    report, sites = run_import({"regions": [REGION], "sites": [SITE, bad_type, missing]})
+
+    assert report["sites"]["read"] == 3
+    assert report["sites"]["upserted"] == 1
+    assert report["sites"]["invalid"] == 2
+    assert rejected_documents(report) == 2
+    assert [site["slug"] for site in sites] == ["bateshwar"]
+    assert sites[0]["full_description"] == SITE["short_description"]
+    assert changed_collections(report) == {"regions", "sites"}
+
+
+def test_reimport_is_unchanged():
+    db = mongomock_motor.AsyncMongoMockClient()["import_test"]
+
+    async def run():
+        await import_catalog(db, {"regions": [REGION], "sites": [SITE]})
+        return await import_catalog(db, {"regions": [REGION], "sites": [SITE]})
+
+    report = asyncio.run(run())
+    assert report["sites"]["unchanged"] == 1
+    assert changed_collections(report) == set()
+
+
+def test_cli_exits_non_zero_on_rejected_rows(tmp_path, monkeypatch, capsys):
+    (tmp_path / "regions.json").write_text(json.dumps([REGION]))
+    (tmp_path / "sites.ndjson").write_text("\n".join(json.dumps(doc) for doc in (SITE, {**SITE, "slug": "x", "name": None})))
+    mock = mongomock_motor.AsyncMongoMockClient()
+    monkeypatch.setattr(sys, "argv", ["catalog_import.py", "--dir", str(tmp_path)])
+    monkeypatch.setenv("MONGO_URL", "mongodb://localhost:27017")
+    monkeypatch.setenv("DB_NAME", "import_cli_test")
+    monkeypatch.setattr("motor.motor_asyncio.AsyncIOMotorClient", lambda url: mock)
+
+    with pytest.raises(SystemExit) as exit_info:
+        asyncio.run(catalog_import.main())
+    assert exit_info.value.code == 1
+    assert json.loads(capsys.readouterr().out)["sites"]["invalid"] == 1
+
+
+def test_cli_module_does_not_load_the_app():
+    import subprocess
+    from pathlib import Path
+
+    backend = Path(__file__).resolve().parents[1] / "backend"
+    code = "import sys, catalog_import; print('server' in sys.modules, 'fastapi' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=backend, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False"]
@@ -0,0 +1,143 @@
+import asyncio
+
+import mongomock_motor
+import pytest
+
+import catalog_sync
+from catalog_sync import CatalogSync, bump_versions
+
+
+def test_start_does_not_wait_for_mongo_and_retries_the_first_read(monkeypatch):
+    monkeypatch.setattr(catalog_sync, "FIRST_READ_RETRY_SECONDS", 0.01)
+    db = mongomock_motor.AsyncMongoMockClient()["sync_test"]
+    failures = [ConnectionError("down")] * 3
+    changes = []
+
+    def get_db():
+        if failures:
+            raise failures.pop()
+        return db
+
+    async def on_change(collections):
+        changes.append(collections)
+
+    sync = CatalogSync(get_db, {"sites", "regions"}, on_change, mode="poll", interval=60)
+
+    async def run():
+        await asyncio.wait_for(sync.start(), 0.1)
+        assert sync.running and not sync.synced
+        for _ in range(100):
+            if sync.synced:
+                break
+            await asyncio.sleep(0.01)
+        await sync.stop()
+
+    asyncio.run(run())
+    assert sync.synced
+    assert sync.errors == 3
+    # Whatever changed while MongoDB was unreachable is treated as changed
+    assert changes == [{"sites", "regions"}]
+
+
+def test_poll_reports_collections_bumped_elsewhere():
+    db = mongomock_motor.AsyncMongoMockClient()["sync_test"]
+    sync = CatalogSync(lambda: db, {"sites", "regions"}, None, mode="poll")
+
+    async def run():
+        await sync._first_read()
+        await bump_versions(db, ["sites"])
+        return await sync.poll()
+
+    assert asyncio.run(run()) == {"sites"}
+
+
+def test_ready_waits_for_the_first_version_read(api, monkeypatch):
+    import server
+
+    assert api.get("/ready").status_code == 200
+    monkeypatch.setattr(server.catalog_sync, "mode", "poll")
+    monkeypatch.setattr(server.catalog_sync, "synced", False)
+    response = api.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "syncing"
+    monkeypatch.setattr(server.catalog_sync, "synced", True)
+    assert api.get("/ready").status_code == 200
+    assert api.get("/live").status_code == 200
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl_seconds):
+        self.data[key] = value
+
+    async def close(self):
+        pass
+
+
+def test_shared_tier_is_skipped_until_versions_are_read(api, monkeypatch):
+    import server
+
+    backend = MemoryBackend()
+    monkeypatch.setattr(server.shared_cache, "backend", backend)
+    monkeypatch.setattr(server.catalog_sync, "synced", False)
+    server.catalog_cache.invalidate()
+    assert api.get("/api/regions").status_code == 200
+    assert backend.data == {}
+
+    monkeypatch.setattr(server.catalog_sync, "synced", True)
+    server.catalog_cache.invalidate()
+    assert api.get("/api/regions").status_code == 200
+    assert len(backend.data) == 1
+
+
+def test_shared_tier_is_disabled_when_sync_is_off(monkeypatch):
+    import server
+
+    monkeypatch.setattr(server.shared_cache, "backend", MemoryBackend())
+    monkeypatch.setattr(server.catalog_sync, "mode", "off")
+    asyncio.run(server.start_catalog_sync())
+    assert not server.shared_cache.enabled
+
+
+def test_cache_fills_read_the_primary(api, monkeypatch):
+    import server
+
+    class NoSecondaryReads:
+        def __getattr__(self, name):
+            raise AssertionError("cache fills must not read through catalog_db")
+
+        __getitem__ = __getattr__
+
+    monkeypatch.setattr(server, "catalog_db", NoSecondaryReads())
+    server.catalog_cache.invalidate()
+    slug = api.get("/api/sites").json()[0]["slug"]
+    for path in ("/api/regions", "/api/guides", "/api/preset-packages", f"/api/sites/{slug}",
+                 "/api/sites?limit=2"):
+        assert api.get(path).status_code == 200, path
+    assert api.get(f"/api/sites/{slug}/content").status_code in (200, 404)
+
+
+def test_warm_up_drops_reads_cached_while_another_worker_seeds(api):
+    import time
+
+    import server
+
+    async def take_regions():
+        regions = await server.db.regions.find({}, {"_id": 0}).to_list(None)
+        await server.db.regions.delete_many({})
+        return regions
+
+    regions = asyncio.run(take_regions())
+    server.catalog_cache.invalidate()
+    assert api.get("/api/regions").json() == []
+    # The other worker finishes seeding; this one's seed phase then finds the data in place
+    asyncio.run(server.db.regions.insert_many(regions))
+    asyncio.run(server.warm_up(time.perf_counter()))
+    assert len(api.get("/api/regions").json()) == len(regions)
@@ -0,0 +1,122 @@
+import asyncio
+import gzip
+import zlib
+
+import compression
+from compression import CompressionMiddleware, RenderedBody, negotiate, static_level
+
+
+def test_variant_is_built_once_for_concurrent_requests(monkeypatch):
+    calls = []
+    original = compression.compress
+
+    def counting_compress(body, encoding, level=None):
+        calls.append(level)
+        return original(body, encoding, level)
+
+    monkeypatch.setattr(compression, "compress", counting_compress)
+    rendered = RenderedBody(b'{"a": 1}' * 1000, '"etag"')
+
+    async def run():
+        return await asyncio.gather(*(rendered.variant("gzip") for _ in range(5)))
+
+    variants = asyncio.run(run())
+    assert calls == [compression.STATIC_LEVELS["gzip"]]
+    assert len(set(variants)) == 1
+    assert gzip.decompress(variants[0]) == rendered.body
+
+
+def test_large_bodies_use_faster_levels():
+    assert static_level("gzip", 1000) == compression.STATIC_LEVELS["gzip"]
+    assert static_level("gzip", compression.LARGE_BODY_BYTES) == compression.LARGE_BODY_LEVELS["gzip"]
+    assert static_level("br", compression.LARGE_BODY_BYTES) < compression.STATIC_LEVELS["br"]
+
+
+def run_app(app, accept_encoding="gzip"):
+    # Drive an ASGI app through the middleware and return every message it sends
+    sent = []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CompressionMiddleware(app, min_size=100)(scope, receive, send))
+    return sent[0], sent[1:]
+
+
+def make_app(chunks, headers=((b"content-type", b"application/json"),)):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": list(headers)})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return app
+
+
+def header(start, name):
+    return dict(start["headers"]).get(name)
+
+
+def test_small_bodies_pass_through_with_vary():
+    start, bodies = run_app(make_app([b'{"a": 1}']))
+    assert header(start, b"content-encoding") is None
+    assert header(start, b"vary") == b"Accept-Encoding"
+    assert bodies[0]["body"] == b'{"a": 1}'
+
+
+def test_streamed_bodies_are_compressed_chunk_by_chunk():
+    chunks = [b'{"id": %d}\n' % i * 20 for i in range(3)]
+    start, bodies = run_app(make_app(chunks, [(b"content-type", b"application/x-ndjson")]))
+    assert header(start, b"content-encoding") == b"gzip"
+    assert header(start, b"content-length") is None
+    assert [b["more_body"] for b in bodies] == [True, True, False]
+    # Every chunk is flushed, so what has arrived so far already decodes
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk, body in zip(chunks, bodies):
+        assert decoder.decompress(body["body"]) == chunk
+
+
+def test_already_encoded_responses_pass_through():
+    body = gzip.compress(b"x" * 1000)
+    headers = [(b"content-type", b"application/json"), (b"content-encoding", b"gzip"), (b"etag", b'"v-gzip"')]
+    start, bodies = run_app(make_app([body], headers))
+    assert start["headers"] == headers
+    assert bodies[0]["body"] == body
+
+
+def test_dynamic_compressed_bodies_get_weak_etags():
+    headers = [(b"content-type", b"application/json"), (b"etag", b'"abc"'), (b"content-length", b"1000")]
+    start, bodies = run_app(make_app([b"x" * 1000], headers))
+    assert header(start, b"etag") == b'W/"abc"'
+    assert header(start, b"content-length") == str(len(bodies[0]["body"])).encode()
+    assert gzip.decompress(bodies[0]["body"]) == b"x" * 1000
+
+
+def test_identity_when_gzip_is_not_accepted():
+    start, bodies = run_app(make_app([b"x" * 1000]), accept_encoding="gzip;q=0, identity")
+    assert header(start, b"content-encoding") is None
+    assert bodies[0]["body"] == b"x" * 1000
+
+
+def test_negotiate_by_q_value_then_preference():
+    both = ("br", "gzip")
+    assert negotiate(None, both) is None
+    assert negotiate("gzip, br", both) == "br"
+    assert negotiate("br;q=0.5, gzip", both) == "gzip"
+    assert negotiate("br;q=0, gzip;q=0", both) is None
+    assert negotiate("*", both) == "br"
+    assert negotiate("*;q=0.1, gzip;q=0.5", both) == "gzip"
+    assert negotiate("GZIP;q=bad, deflate", both) is None
+    assert negotiate("br", ("gzip",)) is None
+
+
+def test_exports_are_streamed_compressed(api):
+    for i in range(30):
+        api.post("/api/feedback", json={"name": f"n{i}", "email": "a@example.com", "rating": 5, "message": "m" * 50})
+    response = api.get("/api/export/feedbacks", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert len(response.text.splitlines()) == 30
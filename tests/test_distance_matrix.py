@@ -0,0 +1,90 @@
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from distance_matrix import SiteDistanceMatrix
+
+
+def random_sites(rng, n, prefix="s"):
+    return [{"id": f"{prefix}{i}", "latitude": rng.uniform(8.0, 30.0), "longitude": rng.uniform(70.0, 90.0)}
+            for i in range(n)]
+
+
+def assert_same_distances(matrix, sites):
+    ids = [site["id"] for site in sites]
+    expected = SiteDistanceMatrix(max_precomputed=matrix.max_precomputed)
+    expected.build(sites)
+    np.testing.assert_allclose(matrix.submatrix(ids), expected.submatrix(ids), rtol=1e-5, atol=1e-3)
+
+
+@pytest.mark.parametrize("max_precomputed", [1000, 10])
+def test_upsert_and_remove_match_full_build(max_precomputed):
+    rng = random.Random(max_precomputed)
+    sites = random_sites(rng, 8)
+    matrix = SiteDistanceMatrix(max_precomputed=max_precomputed)
+    matrix.build(sites)
+
+    moved = {**sites[2], "latitude": 12.5}
+    sites[2] = moved
+    matrix.upsert(moved)
+    for site in random_sites(rng, 20, prefix="new"):
+        sites.append(site)
+        matrix.upsert(site)
+    for site_id in ("s0", "new3", "new19"):
+        matrix.remove(site_id)
+    sites = [site for site in sites if site["id"] not in ("s0", "new3", "new19")]
+
+    assert sorted(matrix.ids) == sorted(site["id"] for site in sites)
+    assert_same_distances(matrix, sites)
+
+
+def test_changes_reports_new_moved_and_removed_sites():
+    sites = random_sites(random.Random(1), 5)
+    matrix = SiteDistanceMatrix()
+    matrix.build(sites)
+    assert matrix.changes(sites) == ([], [])
+
+    current = sites[1:] + [{"id": "extra", "latitude": 20.0, "longitude": 80.0}]
+    current[0] = {**current[0], "longitude": 71.0}
+    changed, removed = matrix.changes(current)
+    assert [site["id"] for site in changed] == ["s1", "extra"]
+    assert removed == ["s0"]
+
+
+def test_refresh_patches_small_changes_and_swaps_in_rebuilds(api, monkeypatch):
+    import server
+
+    async def move_then_delete():
+        before = server.site_distances
+        site = await server.db.sites.find_one({}, {"_id": 0})
+        await server.db.sites.update_one({"id": site["id"]}, {"$set": {"latitude": site["latitude"] + 1}})
+        await server.refresh_site_geo_indexes()
+        assert server.site_distances is before
+
+        monkeypatch.setattr(server, "GEO_INCREMENTAL_MAX_CHANGES", 0)
+        await server.db.sites.delete_one({"id": site["id"]})
+        await server.refresh_site_geo_indexes()
+        assert server.site_distances is not before
+        assert site["id"] not in server.site_distances
+        assert len(server.site_spatial_index) == len(server.site_distances)
+
+    asyncio.run(move_then_delete())
+
+
+def test_growth_never_exceeds_max_precomputed():
+    rng = random.Random(2)
+    sites = random_sites(rng, 240)
+    matrix = SiteDistanceMatrix(max_precomputed=300)
+    matrix.build(sites)
+    for site in random_sites(rng, 60, prefix="new"):
+        sites.append(site)
+        matrix.upsert(site)
+        assert matrix._km.shape[0] <= matrix.max_precomputed
+    assert matrix.precomputed
+    assert_same_distances(matrix, sites)
+
+    matrix.upsert({"id": "one-too-many", "latitude": 10.0, "longitude": 75.0})
+    assert not matrix.precomputed
+    assert matrix._km.size == 0
@@ -0,0 +1,62 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+
+import server
+
+
+def add_trips(n):
+    async def insert():
+        await server.db.trips.insert_many([
+            {"id": f"trip-{i}", "name": f"Trip, {i}", "site_ids": [f"s{i}", "s-common"], "total_cost": 100 * i,
+             "total_time_mins": 60, "guide_id": None, "created_at": datetime(2024, 5, 1, 9, 30, i)}
+            for i in range(n)
+        ])
+    asyncio.run(insert())
+
+
+def test_ndjson_export_has_one_document_per_line(api):
+    add_trips(3)
+    response = api.get("/api/export/trips")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="trips.ndjson"' in response.headers["content-disposition"]
+    trips = [json.loads(line) for line in response.text.splitlines()]
+    assert [trip["id"] for trip in trips] == ["trip-0", "trip-1", "trip-2"]
+    assert trips[1]["site_ids"] == ["s1", "s-common"]
+    assert trips[1]["created_at"] == "2024-05-01T09:30:01Z"
+
+
+def test_csv_export_writes_the_header_and_flattens_values(api):
+    add_trips(2)
+    response = api.get("/api/export/trips", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == list(server.Trip.model_fields)
+    assert len(rows) == 3
+    row = dict(zip(rows[0], rows[2]))
+    assert row["name"] == "Trip, 1"
+    assert json.loads(row["site_ids"]) == ["s1", "s-common"]
+    assert row["created_at"] == "2024-05-01T09:30:01Z"
+    assert row["guide_id"] == ""
+    assert row["total_cost"] == "100"
+
+
+def test_csv_export_of_an_empty_collection_is_just_the_header(api):
+    rows = list(csv.reader(io.StringIO(api.get("/api/export/feedbacks", params={"format": "csv"}).text)))
+    assert rows == [list(server.Feedback.model_fields)]
+
+
+def test_export_reads_past_the_first_batch(api, monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_BATCH_SIZE", 2)
+    add_trips(7)
+    ndjson = api.get("/api/export/trips").text.splitlines()
+    assert [json.loads(line)["id"] for line in ndjson] == [f"trip-{i}" for i in range(7)]
+    rows = list(csv.reader(io.StringIO(api.get("/api/export/trips", params={"format": "csv"}).text)))
+    assert len(rows) == 8
+
+
+def test_export_rejects_other_collections_and_formats(api):
+    assert api.get("/api/export/sites").status_code == 422
+    assert api.get("/api/export/trips", params={"format": "xml"}).status_code == 422
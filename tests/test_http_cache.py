@@ -0,0 +1,28 @@
+from http_cache import etag_matches
+
+
+def test_etag_matches_weak_and_lists():
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+
+
+def test_not_modified_repeats_validators_and_vary(api):
+    first = api.get("/api/sites", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = api.get("/api/sites", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+    assert again.headers["cache-control"] == first.headers["cache-control"]
+    assert "accept-encoding" in again.headers["vary"].lower()
+
+
+def test_not_modified_on_dynamic_route_keeps_vary(api):
+    first = api.get("/api/feedbacks", headers={"Accept-Encoding": "gzip"})
+    again = api.get("/api/feedbacks", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert "accept-encoding" in again.headers["vary"].lower()
@@ -0,0 +1,19 @@
+import asyncio
+from datetime import datetime
+
+import server
+
+
+def test_unparseable_timestamps_are_skipped_and_counted(api):
+    async def run():
+        await server.db.feedbacks.insert_many([
+            {"id": "ok", "created_at": "2024-03-01T10:00:00"},
+            {"id": "bad", "created_at": "yesterday"},
+        ])
+        await server.migrate_string_timestamps()
+        return {doc["id"]: doc["created_at"] async for doc in server.db.feedbacks.find({"id": {"$in": ["ok", "bad"]}})}
+
+    stored = asyncio.run(run())
+    assert isinstance(stored["ok"], datetime)
+    assert stored["bad"] == "yesterday"
+    assert server.startup_report["timestamp_migration"]["feedbacks"] == {"converted": 1, "skipped": 1}
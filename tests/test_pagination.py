@@ -0,0 +1,72 @@
+import asyncio
+
+import server
+
+
+def add_sites(n):
+    async def insert():
+        await server.db.sites.insert_many([
+            {"id": f"extra-{i}", "region_id": "r", "name": f"Extra {i}", "slug": f"extra-{i}", "type": "fort",
+             "short_description": "", "full_description": "", "latitude": 20.0, "longitude": 78.0 + i / 1000,
+             "entry_fee": 0, "avg_visit_time_mins": 60, "image": ""}
+            for i in range(n)
+        ])
+    asyncio.run(insert())
+    server.catalog_cache.invalidate()
+
+
+def walk(api, path, limit, **params):
+    seen, cursor = [], None
+    while True:
+        query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        response = api.get(path, params=query)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        seen.extend(page)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return seen
+
+
+def test_unpaged_sites_are_not_truncated(api):
+    add_sites(150)
+    sites = api.get("/api/sites").json()
+    assert "x-next-cursor" not in api.get("/api/sites").headers
+    assert len({site["id"] for site in sites}) == len(sites) > 150
+
+
+def test_cursor_round_trip_covers_every_site_once(api):
+    add_sites(20)
+    everything = api.get("/api/sites").json()
+    paged = walk(api, "/api/sites", 7)
+    assert [site["id"] for site in paged] == [site["id"] for site in everything]
+
+    names = walk(api, "/api/sites", 9, fields="name,slug")
+    assert [site["slug"] for site in names] == [site["slug"] for site in everything]
+    assert set(names[0]) == {"id", "name", "slug"}
+
+
+def test_cursor_round_trip_on_feedbacks(api):
+    for i in range(5):
+        api.post("/api/feedback", json={"name": f"n{i}", "email": "a@example.com", "rating": 5, "message": "m"})
+    paged = walk(api, "/api/feedbacks", 2)
+    assert [f["name"] for f in paged] == [f"n{i}" for i in range(5)]
+
+
+def test_invalid_cursor_is_rejected(api):
+    assert api.get("/api/sites", params={"cursor": "not-an-id"}).status_code == 400
+
+
+def test_repeated_page_is_served_from_the_rendered_cache(api, monkeypatch):
+    add_sites(20)
+    first = api.get("/api/sites", params={"limit": 5})
+    calls = []
+    monkeypatch.setattr(server, "find_page", lambda *args: calls.append(args))
+    again = api.get("/api/sites", params={"limit": 5})
+    assert not calls
+    assert again.content == first.content
+    assert again.headers["etag"] == first.headers["etag"]
+    assert again.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+    not_modified = api.get("/api/sites", params={"limit": 5}, headers={"If-None-Match": first.headers["etag"]})
+    assert not_modified.status_code == 304
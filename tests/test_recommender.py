@@ -0,0 +1,68 @@
+import itertools
+import random
+
+import pytest
+
+from recommender import Candidate, itinerary_score, search
+
+TYPES = ("fort", "temple", "cave", "palace", "stepwell")
+
+
+def random_candidates(rng, n):
+    return [
+        Candidate(key=f"s{i}", cost=rng.randint(0, 4000), minutes=rng.choice((60, 90, 120, 180, 240)),
+                  type=rng.choice(TYPES), rating=round(rng.uniform(3.0, 5.0), 1))
+        for i in range(n)
+    ]
+
+
+def brute_force(candidates, budget, max_minutes, must_include=()):
+    best = None
+    for r in range(len(candidates) + 1):
+        for chosen in itertools.combinations(range(len(candidates)), r):
+            if not set(must_include) <= set(chosen):
+                continue
+            if sum(candidates[i].cost for i in chosen) > budget:
+                continue
+            if sum(candidates[i].minutes for i in chosen) > max_minutes:
+                continue
+            score = itinerary_score(candidates, chosen)
+            if best is None or score > best:
+                best = score
+    return best
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_search_matches_brute_force(seed):
+    rng = random.Random(seed)
+    candidates = random_candidates(rng, rng.randint(1, 11))
+    budget = rng.randint(0, 12000)
+    max_minutes = rng.choice((240, 480, 960))
+    must = [0] if seed % 3 == 0 else []
+    expected = brute_force(candidates, budget, max_minutes, must)
+
+    result = search(candidates, budget, max_minutes, must_include=must, time_budget_ms=10_000)
+    if expected is None:
+        assert result is None
+        return
+    assert result.optimal
+    assert result.score == pytest.approx(expected)
+    assert result.score == pytest.approx(itinerary_score(candidates, result.chosen))
+    assert set(must) <= set(result.chosen)
+    assert sum(candidates[i].cost for i in result.chosen) <= budget
+    assert sum(candidates[i].minutes for i in result.chosen) <= max_minutes
+
+
+def test_must_include_that_does_not_fit():
+    candidates = [Candidate(key="a", cost=500, minutes=60, type="fort")]
+    assert search(candidates, 100, 480, must_include=[0]) is None
+
+
+@pytest.mark.parametrize("days", [1, 2, 3])
+def test_recommendation_fits_the_schedule(api, days):
+    recommended = api.post("/api/trip/recommend", json={"budget": 5000, "days": days})
+    assert recommended.status_code == 200
+    site_ids = recommended.json()["site_ids"]
+    schedule = api.post("/api/trip/schedule", json={"site_ids": site_ids, "days": days}).json()
+    assert schedule["fits"]
+    assert len(schedule["days"]) <= days
@@ -0,0 +1,58 @@
+import itertools
+import random
+
+import pytest
+
+from routing import EXACT_MAX_STOPS, held_karp, nearest_neighbour, pairwise_km, path_length, plan_route, two_opt
+
+
+def random_points(rng, n):
+    return [(rng.uniform(8.0, 30.0), rng.uniform(70.0, 90.0)) for _ in range(n)]
+
+
+def brute_force(dist, start=None):
+    nodes = range(len(dist))
+    orders = (p for p in itertools.permutations(nodes) if start is None or p[0] == start)
+    return min(path_length(dist, order) for order in orders)
+
+
+@pytest.mark.parametrize("n", range(1, EXACT_MAX_STOPS + 1))
+def test_held_karp_matches_brute_force(n):
+    rng = random.Random(n)
+    for _ in range(3):
+        dist = pairwise_km(random_points(rng, n))
+        order = held_karp(dist)
+        assert sorted(order) == list(range(n))
+        assert path_length(dist, order) == pytest.approx(brute_force(dist))
+
+
+@pytest.mark.parametrize("n", range(2, EXACT_MAX_STOPS + 1))
+def test_held_karp_fixed_start_matches_brute_force(n):
+    rng = random.Random(100 + n)
+    dist = pairwise_km(random_points(rng, n))
+    start = rng.randrange(n)
+    order = held_karp(dist, start)
+    assert order[0] == start
+    assert path_length(dist, order) == pytest.approx(brute_force(dist, start))
+
+
+def test_two_opt_never_worse_than_nearest_neighbour():
+    rng = random.Random(7)
+    for n in (10, 25, 60):
+        dist = pairwise_km(random_points(rng, n))
+        seed = nearest_neighbour(dist, 0)
+        improved = two_opt(dist, seed, fixed_start=True)
+        assert improved[0] == 0
+        assert sorted(improved) == list(range(n))
+        assert path_length(dist, improved) <= path_length(dist, seed) + 1e-9
+
+
+def test_plan_route_from_start_point():
+    rng = random.Random(3)
+    points = random_points(rng, 6)
+    start = (20.0, 80.0)
+    order, legs, total = plan_route(points, start)
+    assert sorted(order) == list(range(len(points)))
+    assert len(legs) == len(points)
+    dist = pairwise_km(points + [start])
+    assert total == pytest.approx(brute_force(dist, start=len(points)))
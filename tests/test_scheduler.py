@@ -0,0 +1,60 @@
+import itertools
+import random
+
+import pytest
+
+from scheduler import Stop, pack_days
+
+
+def loads(stops, bounds):
+    return [sum(s.visit_mins + s.travel_mins for s in stops[i:j]) for i, j in bounds]
+
+
+def brute_force(stops, day_mins):
+    # (fewest days, least sum of squared loads in that many days) over every split
+    n = len(stops)
+    best = None
+    for cuts in range(n):
+        for inner in itertools.combinations(range(1, n), cuts):
+            edges = (0, *inner, n)
+            bounds = list(zip(edges, edges[1:]))
+            day_loads = loads(stops, bounds)
+            if any(load > day_mins and j - i > 1 for load, (i, j) in zip(day_loads, bounds)):
+                continue
+            key = (len(bounds), sum(load * load for load in day_loads))
+            if best is None or key < best:
+                best = key
+    return best
+
+
+def test_short_trip_packs_into_one_day():
+    stops = [Stop("a", 60), Stop("b", 90, travel_mins=20)]
+    bounds, fits = pack_days(stops, 480, max_days=5)
+    assert bounds == [(0, 2)]
+    assert fits
+
+
+def test_too_few_days_does_not_fit():
+    stops = [Stop(str(i), 300) for i in range(3)]
+    bounds, fits = pack_days(stops, 480, max_days=2)
+    assert len(bounds) == 3
+    assert not fits
+
+
+def test_overlong_stop_gets_its_own_day():
+    bounds, fits = pack_days([Stop("a", 60), Stop("b", 600), Stop("c", 60)], 480)
+    assert (1, 2) in bounds
+    assert not fits
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_pack_days_matches_brute_force(seed):
+    rng = random.Random(seed)
+    stops = [Stop(str(i), rng.choice((45, 60, 90, 120, 180)), travel_mins=rng.uniform(0, 90))
+             for i in range(rng.randint(1, 9))]
+    bounds, _ = pack_days(stops, 480, max_days=rng.randint(1, 9))
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(stops)
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    days, squares = brute_force(stops, 480)
+    assert len(bounds) == days
+    assert sum(load * load for load in loads(stops, bounds)) == pytest.approx(squares)
@@ -0,0 +1,97 @@
+import heapq
+import math
+import random
+
+import pytest
+
+import search_index
+from search_index import B, K1, SearchIndex, site_fields, tokenize
+from tests.benchmarks.catalog import synthetic_catalog
+from tests.benchmarks.micro import SEARCH_BUDGET_US, SEARCH_QUERIES, measure
+
+
+def exhaustive(index, query, limit=10, kind=None):
+    # Every posting of every expansion scored, as search did before pruning
+    terms = list(dict.fromkeys(tokenize(query)))
+    n = len(index)
+    avg_len = index._total_len / n
+    scores = {}
+    for position, term in enumerate(terms):
+        term_scores = {}
+        for match, weight in index.expand(term, position == len(terms) - 1).items():
+            postings = index._postings[match]
+            idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings.items():
+                norm = K1 * (1.0 - B + B * index._doc_len[doc] / avg_len)
+                term_scores[doc] = max(term_scores.get(doc, 0.0), weight * idf * tf * (K1 + 1.0) / (tf + norm))
+        for doc, score in term_scores.items():
+            scores[doc] = scores.get(doc, 0.0) + score
+    if kind is not None:
+        scores = {doc: score for doc, score in scores.items() if index._meta[doc]["kind"] == kind}
+    return [score for _, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1])]
+
+
+def assert_same_ranking(index, query, limit=10, kind=None):
+    pruned = [score for _, score in index.search(query, limit, kind)]
+    assert pruned == pytest.approx(exhaustive(index, query, limit, kind), rel=1e-12), query
+
+
+@pytest.fixture(scope="module")
+def catalog_index():
+    index = SearchIndex()
+    for site in synthetic_catalog(10_000)["sites"]:
+        index.upsert(site["slug"], site_fields(site), {"kind": "site", "slug": site["slug"]})
+    return index
+
+
+def test_pruned_search_matches_exhaustive_scoring():
+    rng = random.Random(1)
+    words = "fort temple ravine river palace stepwell gwalior chambal carved ancient".split()
+    index = SearchIndex()
+    for i in range(400):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 30)))
+        index.upsert(f"doc-{i}", [(rng.choice(words), 4.0), (text, 1.0)], {"kind": rng.choice(["site", "region"])})
+    queries = ["fort", "ancient temple", "river pal", "templ", "gwalier fort", "chambal ravine stepwell"]
+    for query in queries:
+        assert_same_ranking(index, query)
+        assert_same_ranking(index, query, limit=3, kind="region")
+
+    # Queried once, then changed: cached impact orders must stay valid bounds
+    for i in range(0, 400, 7):
+        index.remove(f"doc-{i}")
+    for i in range(50):
+        index.upsert(f"long-{i}", [(" ".join(rng.choice(words) for _ in range(80)), 1.0)], {"kind": "site"})
+    for query in queries:
+        assert_same_ranking(index, query)
+
+
+def test_bounds_hold_after_the_average_length_grows(monkeypatch):
+    # Impact orders built before long documents arrive must still bound the
+    # unread postings; one posting per step so pruning starts early
+    monkeypatch.setattr(search_index, "SCAN_BLOCK", 1)
+    for seed in range(20):
+        rng = random.Random(seed)
+        index = SearchIndex()
+        for i in range(40):
+            index.upsert(f"doc-{i}", [("fort " * rng.randint(1, 3) + "wall " * rng.randint(0, 40), 1.0)],
+                         {"kind": "site"})
+        index.search("fort", 3)
+        for i in range(40):
+            index.upsert(f"long-{i}", [("ravine " * 200, 1.0)], {"kind": "site"})
+        assert_same_ranking(index, "fort", limit=3)
+
+
+def test_search_edge_cases():
+    index = SearchIndex()
+    assert index.search("fort") == []
+    index.upsert("a", [("Gwalior Fort", 4.0)], {"kind": "site", "slug": "a"})
+    index.upsert("b", [("Gwalior Fort", 4.0)], {"kind": "site", "slug": "b"})
+    assert index.search("fort", limit=0) == []
+    # Equal scores keep the earlier indexed document first
+    assert [meta["slug"] for meta, _ in index.search("fort")] == ["a", "b"]
+
+
+def test_search_stays_within_the_benchmark_budget(catalog_index):
+    for query in SEARCH_QUERIES.values():
+        assert_same_ranking(catalog_index, query)
+        assert measure(lambda: catalog_index.search(query), repeat=3)["best_us"] < SEARCH_BUDGET_US, query
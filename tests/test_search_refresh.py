@@ -0,0 +1,48 @@
+import asyncio
+
+import server
+
+
+def test_rebuild_keeps_serving_the_old_index_until_swapped(api, monkeypatch):
+    original_index_sites = server.index_sites
+    paused, resume = asyncio.Event(), asyncio.Event()
+
+    async def slow_index_sites(*args):
+        paused.set()
+        await resume.wait()
+        await original_index_sites(*args)
+
+    monkeypatch.setattr(server, "index_sites", slow_index_sites)
+
+    async def run():
+        before = server.search_index
+        size = len(before)
+        rebuild = asyncio.create_task(server.refresh_search_index())
+        await paused.wait()
+        # Mid-rebuild, searches still hit the complete old index
+        assert server.search_index is before
+        assert len(server.search_index) == size
+        resume.set()
+        await rebuild
+        assert server.search_index is not before
+        assert len(server.search_index) == size
+
+    asyncio.run(run())
+
+
+def test_sites_change_reindexes_only_changed_sites(api):
+    async def run():
+        index = server.search_index
+        site = await server.db.sites.find_one({}, {"_id": 0})
+        await server.db.sites.update_one({"id": site["id"]}, {"$set": {"name": "Zanzibarbazaar"}})
+        await server.catalog_changed({"sites"})
+        assert server.search_index is index
+        assert [meta["slug"] for meta, _ in server.search_index.search("zanzibarbazaar", 5, None)] == [site["slug"]]
+
+        await server.db.sites.delete_one({"id": site["id"]})
+        await server.catalog_changed({"sites"})
+        assert server.search_index is index
+        assert server.search_index.search("zanzibarbazaar", 5, None) == []
+        assert site["slug"] not in server.indexed_sites
+
+    asyncio.run(run())
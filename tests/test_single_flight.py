@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_load():
+    flights = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    async def run():
+        return await asyncio.gather(*(flights.do("k", load) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result == {"value": 42} for result in results)
+    assert flights.stats()["leaders"] == 1
+    assert flights.stats()["coalesced"] == 9
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_different_keys_and_later_calls_load_again():
+    flights = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return len(calls)
+
+    async def run():
+        await asyncio.gather(flights.do("a", load), flights.do("b", load))
+        return await flights.do("a", load)
+
+    assert asyncio.run(run()) == 3
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(*(flights.do("k", load) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.stats()["errors"] == 1
+
+
+def test_waiter_runs_its_own_load_after_max_wait():
+    flights = SingleFlight(max_wait=0.01)
+
+    async def slow():
+        await asyncio.sleep(0.2)
+        return "slow"
+
+    async def fast():
+        return "fast"
+
+    async def run():
+        leader = asyncio.create_task(flights.do("k", slow))
+        await asyncio.sleep(0)
+        waited = await flights.do("k", fast)
+        return waited, await leader
+
+    assert asyncio.run(run()) == ("fast", "slow")
+    assert flights.stats()["timeouts"] == 1
+
+
+def test_waiters_survive_a_cancelled_leader():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flights.do("k", load))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do("k", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_disabled_always_loads():
+    flights = SingleFlight(enabled=False)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0)
+
+    async def run():
+        await asyncio.gather(*(flights.do("k", load) for _ in range(4)))
+
+    asyncio.run(run())
+    assert len(calls) == 4
+
+
+def test_identical_estimates_are_coalesced(api, monkeypatch):
+    import server
+
+    original = server.estimate_one
+
+    async def slow_estimate(request):
+        await asyncio.sleep(0.01)
+        return await original(request)
+
+    monkeypatch.setattr(server, "estimate_one", slow_estimate)
+    site_ids = [site["id"] for site in api.get("/api/sites").json()[:2]]
+    request = server.TripEstimateRequest(site_ids=site_ids, budget=20000, days=2)
+    before = server.estimate_flights.stats()["coalesced"]
+
+    async def run():
+        return await asyncio.gather(*(server.estimate_trip(request) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len({result.model_dump_json() for result in results}) == 1
+    assert server.estimate_flights.stats()["coalesced"] - before == 4
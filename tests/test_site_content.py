@@ -0,0 +1,84 @@
+import asyncio
+
+import mongomock_motor
+from bson import Binary
+
+import server
+import site_content
+from catalog_import import import_catalog
+
+SITE = {
+    "region_id": "CHAMBAL_REGION_ID", "name": "Pinahat Fort", "slug": "pinahat-fort", "type": "fort",
+    "short_description": "Ruined fort", "latitude": 26.9, "longitude": 78.4,
+    "entry_fee": 0, "avg_visit_time_mins": 60, "image": "i",
+}
+CONTENT = {
+    "history": {"built": 1600, "text": "Raised above the Chambal ravines"},
+    "folklore": ["The dacoit queen", "A tunnel to the river"],
+    "gallery": [{"url": "a.jpg"}, {"url": "b.jpg"}],
+}
+
+
+def import_content(extended_content):
+    asyncio.run(import_catalog(server.db, {"sites": [{**SITE, "extended_content": extended_content}]}))
+    server.catalog_cache.invalidate()
+
+
+def test_section_round_trips_through_zlib():
+    raw, compressed = site_content.encode_section(CONTENT["history"])
+    assert compressed != raw
+    assert site_content.decode_section({"data": Binary(compressed)}) == raw
+    assert raw == b'{"built":1600,"text":"Raised above the Chambal ravines"}'
+
+
+def test_section_operations_keep_order_and_drop_missing_sections():
+    collection = mongomock_motor.AsyncMongoMockClient()["content_test"][site_content.COLLECTION]
+
+    async def apply(extended_content):
+        await collection.bulk_write(site_content.section_operations("pinahat-fort", extended_content))
+        return await collection.find({}, {"_id": 0}).sort("order", 1).to_list(None)
+
+    docs = asyncio.run(apply(CONTENT))
+    assert [(doc["section"], doc["order"]) for doc in docs] == [("history", 0), ("folklore", 1), ("gallery", 2)]
+    assert all(doc["stored_size"] == len(doc["data"]) for doc in docs)
+
+    docs = asyncio.run(apply({"gallery": CONTENT["gallery"], "history": CONTENT["history"]}))
+    assert [(doc["section"], doc["order"]) for doc in docs] == [("gallery", 0), ("history", 1)]
+
+
+def test_content_index_lists_sections_in_order(api):
+    import_content(CONTENT)
+    response = api.get("/api/sites/pinahat-fort/content")
+    assert response.status_code == 200
+    index = response.json()
+    assert index["slug"] == "pinahat-fort"
+    assert [entry["section"] for entry in index["sections"]] == ["history", "folklore", "gallery"]
+    assert index["sections"][0]["size"] == len(site_content.encode_section(CONTENT["history"])[0])
+    # Site documents stay lean
+    assert "extended_content" not in api.get("/api/sites/pinahat-fort").json()
+
+
+def test_content_section_is_served_decompressed(api):
+    import_content(CONTENT)
+    for section, data in CONTENT.items():
+        response = api.get(f"/api/sites/pinahat-fort/content/{section}")
+        assert response.status_code == 200
+        assert response.json() == data
+        assert response.headers["etag"]
+
+
+def test_missing_content_is_404(api):
+    import_content(CONTENT)
+    assert api.get("/api/sites/pinahat-fort/content/recipes").status_code == 404
+    assert api.get("/api/sites/no-such-site/content").status_code == 404
+    assert api.get("/api/sites/no-such-site/content/history").status_code == 404
+
+
+def test_reimport_drops_a_removed_section(api):
+    import_content(CONTENT)
+    assert api.get("/api/sites/pinahat-fort/content/gallery").status_code == 200
+    import_content({"history": CONTENT["history"], "folklore": ["Only one story"]})
+    sections = api.get("/api/sites/pinahat-fort/content").json()["sections"]
+    assert [entry["section"] for entry in sections] == ["history", "folklore"]
+    assert api.get("/api/sites/pinahat-fort/content/gallery").status_code == 404
+    assert api.get("/api/sites/pinahat-fort/content/folklore").json() == ["Only one story"]
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from routing import haversine_km
+from spatial_index import SiteSpatialIndex
+
+
+@pytest.fixture(scope="module")
+def sites():
+    rng = random.Random(11)
+    return [{"id": f"s{i}", "latitude": rng.uniform(-60.0, 60.0), "longitude": rng.uniform(-180.0, 180.0)}
+            for i in range(500)]
+
+
+@pytest.fixture(scope="module")
+def index(sites):
+    index = SiteSpatialIndex()
+    index.build(sites)
+    return index
+
+
+def by_distance(sites, latitude, longitude):
+    return sorted((haversine_km(latitude, longitude, s["latitude"], s["longitude"]), s["id"]) for s in sites)
+
+
+def test_nearest_matches_brute_force(sites, index):
+    rng = random.Random(5)
+    for _ in range(50):
+        lat, lon = rng.uniform(-70.0, 70.0), rng.uniform(-180.0, 180.0)
+        k = rng.randint(1, 12)
+        found = index.nearest(lat, lon, k=k)
+        expected = by_distance(sites, lat, lon)[:k]
+        assert [km for _, km in found] == pytest.approx([km for km, _ in expected], abs=1e-6)
+
+
+def test_nearest_respects_exclude_and_max_km(sites, index):
+    lat, lon = sites[0]["latitude"], sites[0]["longitude"]
+    found = index.nearest(lat, lon, k=3, exclude={"s0"})
+    assert "s0" not in [site_id for site_id, _ in found]
+    assert index.nearest(lat, lon, k=500, max_km=0.0) == [("s0", pytest.approx(0.0, abs=1e-6))]
+
+
+def test_within_matches_brute_force(sites, index):
+    rng = random.Random(9)
+    for radius_km in (0.0, 250.0, 1000.0, 5000.0):
+        lat, lon = rng.uniform(-60.0, 60.0), rng.uniform(-180.0, 180.0)
+        found = index.within(lat, lon, radius_km)
+        expected = [(km, site_id) for km, site_id in by_distance(sites, lat, lon) if km <= radius_km]
+        assert sorted(site_id for site_id, _ in found) == sorted(site_id for _, site_id in expected)
+        assert [km for _, km in found] == sorted(km for _, km in found)
+
+
+def test_empty_index():
+    index = SiteSpatialIndex()
+    index.build([])
+    assert index.nearest(10.0, 10.0) == []
+    assert index.within(10.0, 10.0, 100.0) == []
@@ -0,0 +1,34 @@
+import server
+
+
+def site_ids(api, n):
+    return [site["id"] for site in api.get("/api/sites").json()[:n]]
+
+
+def test_estimate_reads_only_requested_sites(api, monkeypatch):
+    async def whole_catalog():
+        raise AssertionError("estimates must not load the whole catalog")
+
+    monkeypatch.setattr(server, "find_sites_by_id", whole_catalog)
+    ids = site_ids(api, 3)
+    response = api.post("/api/trip/estimate", json={"site_ids": ids, "budget": 50000, "days": 2})
+    assert response.status_code == 200
+    assert sorted(response.json()["route_site_ids"]) == sorted(ids)
+
+    batch = api.post("/api/trip/estimate/batch", json={"requests": [
+        {"site_ids": ids[:1], "budget": 50000, "days": 1},
+        {"site_ids": ["missing"], "budget": 50000, "days": 1},
+    ]}).json()["results"]
+    assert [item["status_code"] for item in batch] == [200, 404]
+    assert any("nearby" in s for s in batch[0]["estimate"]["suggestions"])
+
+    schedule = api.post("/api/trip/schedule", json={"site_ids": ids, "days": 3})
+    assert schedule.status_code == 200
+
+
+def test_single_site_estimate_suggests_nearest_site(api):
+    sites = api.get("/api/sites").json()
+    response = api.post("/api/trip/estimate", json={"site_ids": [sites[0]["id"]], "budget": 50000, "days": 1})
+    nearest_id = server.nearest_other_site([sites[0]])
+    nearest = next(site for site in sites if site["id"] == nearest_id)
+    assert any(nearest["name"] in s for s in response.json()["suggestions"])
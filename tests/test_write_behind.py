@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from write_behind import WriteBehindQueue, WriteBehindQueueFull
+
+
+class FakeCollection:
+    def __init__(self, fail_with=None):
+        self.batches = []
+        self.fail_with = fail_with
+
+    async def insert_many(self, docs, ordered=True):
+        await asyncio.sleep(0)
+        if self.fail_with is not None:
+            raise self.fail_with
+        self.batches.append(list(docs))
+
+
+def make_queue(collections, **options):
+    return WriteBehindQueue(lambda name: collections[name], **options)
+
+
+def test_batches_by_size_and_flushes_everything_on_stop():
+    collections = {"feedbacks": FakeCollection(), "trips": FakeCollection()}
+    queue = make_queue(collections, max_batch=3, max_delay=10.0)
+
+    async def run():
+        await queue.start()
+        for i in range(7):
+            queue.submit("feedbacks", {"i": i})
+        queue.submit("trips", {"i": 0})
+        await queue.stop()
+
+    asyncio.run(run())
+    inserted = [doc["i"] for batch in collections["feedbacks"].batches for doc in batch]
+    assert inserted == list(range(7))
+    assert all(len(batch) <= 3 for batch in collections["feedbacks"].batches)
+    assert collections["trips"].batches == [[{"i": 0}]]
+    assert queue.stats()["flushed"] == 8
+    assert queue.stats()["queued"] == 0
+
+
+def test_flushes_a_partial_batch_after_max_delay():
+    collections = {"feedbacks": FakeCollection()}
+    queue = make_queue(collections, max_batch=100, max_delay=0.01)
+
+    async def run():
+        await queue.start()
+        queue.submit("feedbacks", {"i": 1})
+        await asyncio.sleep(0.1)
+        flushed = list(collections["feedbacks"].batches)
+        await queue.stop()
+        return flushed
+
+    assert asyncio.run(run()) == [[{"i": 1}]]
+
+
+def test_rejects_when_full():
+    queue = make_queue({"feedbacks": FakeCollection()}, max_queue=2, max_delay=10.0)
+
+    async def run():
+        await queue.start()
+        queue.submit("feedbacks", {})
+        queue.submit("feedbacks", {})
+        with pytest.raises(WriteBehindQueueFull):
+            queue.submit("feedbacks", {})
+        await queue.stop()
+
+    asyncio.run(run())
+    assert queue.stats()["rejected"] == 1
+    assert queue.stats()["flushed"] == 2
+
+
+def test_failed_batches_are_counted_and_the_flusher_survives():
+    partial = BulkWriteError({"nInserted": 1, "writeErrors": [{"index": 1}]})
+    collections = {"feedbacks": FakeCollection(fail_with=partial), "trips": FakeCollection(fail_with=RuntimeError())}
+    queue = make_queue(collections, max_batch=2, max_delay=10.0)
+
+    async def run():
+        await queue.start()
+        queue.submit("feedbacks", {})
+        queue.submit("feedbacks", {})
+        queue.submit("trips", {})
+        await queue.stop()
+
+    asyncio.run(run())
+    assert queue.stats()["flushed"] == 1
+    assert queue.stats()["failed"] == 2